@@ -8,6 +8,7 @@ import time
 import sys
 import os
 import json
+import threading
 from typing import Dict, Any, Optional, List
 
 # 屏蔽ALSA错误消息
@@ -34,10 +35,13 @@ module_path = os.path.join(parent_dir, 'large_models_interfaces')
 if module_path not in sys.path:
     sys.path.append(module_path)
 
+VOSK_MODEL_PATH = "../models/vosk-model-small-cn-0.22"
+
 # 导入各个模块的接口
 try:
     # ASR模块 (关键词识别)
-    from utils.asr_vosk import AsrVosk
+    from utils.asr_vosk import VOICE_ACTIVITY_SIGNAL
+    from utils.hotword_engine import create_hotword_engine
     
     # Speech2Text模块 (语音转文本)
     from large_models_interfaces.Speech2Text_interface import ParaformerModel
@@ -67,6 +71,16 @@ try:
     # 音频播放工具
     from utils.audio import play_wav
     
+    # 共享音频采集服务
+    from utils.audio_capture import get_audio_capture, shutdown_audio_capture
+    
+    # 回声消除（播放参考信号与消除器）
+    from utils.audio_io import SpeakerSink
+    from utils.echo_canceller import EchoReference, ReferenceSink, EchoCanceller
+    from utils.vosk_registry import get_vosk_registry
+    from utils.command_spotter import CommandSpotter, execute_command
+    from utils.local_transcriber import LocalTranscriber
+    
 except ImportError as e:
     print(f"导入模块失败: {e}")
     print("请确保所有依赖模块路径正确，且所有依赖已安装。")
@@ -96,6 +110,26 @@ class IntegrateClient:
         
         # 对话状态
         self.conversation_active = False
+        # 下一轮语音识别在采集时间轴上的起点（唤醒时刻），None 表示从调用时刻开始
+        self.stt_start_position = None
+        # 直接说话打断时，从检测到的说话起点再向前多带的音频时长，覆盖人声检测的起点误差；
+        # 唤醒词之后从检测时刻开始识别，不向前多带（否则会带上唤醒词的最后一个音节）
+        self.stt_preroll_ms = 300
+        self.stt_start_preroll_ms = 0  # 下一轮识别实际使用的预录时长
+        # 播报期间持续说话达到该时长即打断播报（唤醒词随时可以打断）
+        self.barge_in_speech_ms = 500
+        
+        # 唤醒后先在本地识别简单的动作指令（"前进"、"挥手"……），识别到就直接执行，不经过云端
+        self.local_commands = True
+        self.command_spotter = None
+        self.action_executor = None  # 首次执行本地指令时创建
+        
+        # 语音转文本同时使用云端和本地Vosk识别，云端在预算内没有返回（网络慢或断开）时采用本地结果
+        self.hedged_stt = True
+        self.cloud_budget_ms = 1500
+        
+        # 热词检测引擎："vosk" 或 "template"（模板匹配，需先录制模板），默认读取环境变量 HOTWORD_ENGINE
+        self.hotword_engine = os.environ.get("HOTWORD_ENGINE", "vosk")
         
         # 关键词ID
         self.WAKE_UP_ID = 1
@@ -135,15 +169,51 @@ class IntegrateClient:
             hotwords = {"小新小新": self.WAKE_UP_ID, "再见": self.GOODBYE_ID}
             print(f"ASR模块已准备就绪，监听关键词 '小新小新' (ID:{self.WAKE_UP_ID}) 和 '再见' (ID:{self.GOODBYE_ID})。")
             
-            # ASR模块初始化
-            self.asr = AsrVosk("../models/vosk-model-small-cn-0.22", hotwords, sample_rate=48000)
+            # 机器人播放的所有声音都记录为回声参考信号，识别端据此从麦克风信号中消除自己的声音
+            self.echo_reference = EchoReference(get_audio_capture(48000))
+            self.wav_sink = ReferenceSink(SpeakerSink(), self.echo_reference)
+            
+            # 启动时加载并预热Vosk模型，之后猜拳游戏等模块创建识别器时直接复用
+            if self.hotword_engine == "vosk":
+                get_vosk_registry().warm_up(VOSK_MODEL_PATH)
+                print(get_vosk_registry().report())
             
-            # 语音转文本模块初始化
-            self.paraformer_model_instance = ParaformerModel()
+            # 热词检测在播报回复期间一直在听，它的回声消除器收敛最充分；
+            # 语音识别和本地指令只在提示音期间工作，它们的回声消除器每轮开始时沿用它的滤波器（fork）
+            self.echo_canceller = EchoCanceller(self.echo_reference)
+            
+            # ASR模块初始化：低延迟唤醒，每64ms送入一次音频，Vosk引擎每128ms计算一次中间结果，
+            # 并且只在有人声时解码（语音门控）
+            self.asr = create_hotword_engine(hotwords, engine=self.hotword_engine, model_path=VOSK_MODEL_PATH,
+                                             sample_rate=48000, echo_canceller=self.echo_canceller,
+                                             hop_ms=64, partial_interval_ms=128, gate=True)
+            
+            # 本地动作指令识别（与热词检测共用已加载的Vosk模型），初始化失败时所有指令走云端
+            if self.local_commands:
+                try:
+                    self.command_spotter = CommandSpotter(VOSK_MODEL_PATH, sample_rate=48000,
+                                                          echo_canceller=self.echo_canceller.fork())
+                    print(f"本地动作指令已准备就绪: {'、'.join(self.command_spotter.commands)}")
+                except Exception as e:
+                    print(f"本地动作指令初始化失败，将全部使用云端识别: {e}")
+            
+            # 语音转文本模块初始化，本地识别器初始化失败时只使用云端
+            local_transcriber = None
+            if self.hedged_stt:
+                try:
+                    local_transcriber = LocalTranscriber(VOSK_MODEL_PATH)
+                    print(f"本地语音识别已准备就绪，云端结果等待预算 {self.cloud_budget_ms}ms。")
+                except Exception as e:
+                    print(f"本地语音识别初始化失败，将只使用云端识别: {e}")
+            self.paraformer_model_instance = ParaformerModel(echo_canceller=self.echo_canceller.fork(),
+                                                             local_transcriber=local_transcriber,
+                                                             cloud_budget_ms=self.cloud_budget_ms)
             print("语音转文本模块已准备就绪。")
             
             # 文本转语音模块初始化
-            self.cosy_voice_model_instance = CosyVoiceModel()
+            self.cosy_voice_model_instance = CosyVoiceModel(
+                audio_sink=ReferenceSink(SpeakerSink(), self.echo_reference)
+            )
             print("文本转语音模块已准备就绪。")
             
             # 多轮对话LLM模块初始化
@@ -275,7 +345,7 @@ class IntegrateClient:
                     # 播放任务完成音频文件
                     wav_path = os.path.join(current_dir, "任务完成.wav")
                     if os.path.exists(wav_path):
-                        play_wav(wav_path)
+                        play_wav(wav_path, sink=self.wav_sink)
                         return ''
                     else:
                         print(f"警告：找不到音频文件 {wav_path}")
@@ -305,6 +375,89 @@ class IntegrateClient:
         # 直接复写get_response方法
         self.llm_multi_turn_model_instance.get_response = enhanced_get_response
     
+    def _execute_local_command(self, command) -> None:
+        """
+        直接执行本地识别到的动作指令
+        
+        Args:
+            command: CommandSpotter 识别到的指令
+        """
+        print(f"\n[本地指令] 执行动作: {command.name}")
+        try:
+            if self.action_executor is None:
+                from action_seq.action_executor import ActionExecutor
+                self.action_executor = ActionExecutor()
+            execute_command(command, self.action_executor)
+        except Exception as e:
+            print(f"执行本地指令时出错: {e}")
+    
+    def _run_local_command(self, start_position) -> bool:
+        """
+        在本地识别简单的动作指令，识别到就直接执行，不经过云端
+        
+        Args:
+            start_position: 从采集时间轴上的该位置开始识别（唤醒时刻）
+            
+        Returns:
+            bool: 是否执行了本地指令；False 时由云端从同一位置开始识别
+        """
+        if self.command_spotter is None:
+            return False
+        command = self.command_spotter.listen_for_command(start_position=start_position)
+        if command is None:
+            return False
+        self._execute_local_command(command)
+        return True
+    
+    def _say_goodbye(self) -> None:
+        """播报告别语并让机器人恢复站立姿态"""
+        if self.cosy_voice_model_instance:
+            self.cosy_voice_model_instance.text2speech("再见，期待下次与你对话。")
+        
+        # 执行站立动作
+        try:
+            # 导入ActionGroupControl模块
+            sys.path.append('/home/pi/TonyPi/')
+            import hiwonder.ActionGroupControl as AGC
+            
+            # 执行站立动作
+            AGC.runActionGroup('stand')
+            print("机器人姿态已恢复")
+        except Exception as e:
+            print(f"恢复机器人姿态时出错: {e}")
+    
+    def _speak_with_barge_in(self, text: str):
+        """
+        播报回复，同时监听唤醒词、结束词和人声；被打断时立即停止播报
+        唤醒词和人声打断时准备识别用户接下来的话，结束词打断时交给主循环结束程序
+        
+        Args:
+            text: 要播报的文本
+            
+        Returns:
+            打断播报的信号（WAKE_UP_ID、GOODBYE_ID 或 VOICE_ACTIVITY_SIGNAL），播报正常结束时为 None
+        """
+        handle = self.cosy_voice_model_instance.speak(text)
+        signal = self.asr.listen_for_hotword(stop_event=handle.finished,
+                                             min_speech_ms=self.barge_in_speech_ms)
+        if signal is None:
+            handle.wait()
+            return None
+        
+        handle.cancel()
+        print(f"\n播报被打断（信号 {signal}），已播报: '{handle.spoken_text}'")
+        if signal == VOICE_ACTIVITY_SIGNAL and self.asr.speech_start_position is not None:
+            # 用户直接开始说话：从说话开始处识别，打断的这句话不会丢失
+            self.stt_start_position = self.asr.speech_start_position
+            self.stt_start_preroll_ms = self.stt_preroll_ms
+            self.conversation_active = True
+        elif signal in (self.WAKE_UP_ID, VOICE_ACTIVITY_SIGNAL):
+            self.stt_start_position = self.asr.detection_position
+            self.stt_start_preroll_ms = 0
+            self.conversation_active = True
+        handle.wait(timeout=2)
+        return signal
+    
     def start_conversation(self):
         """开始语音对话"""
         print("程序启动。")
@@ -320,9 +473,23 @@ class IntegrateClient:
                     print("\r[主循环] 正在监听唤醒词 '小新小新' 或结束词 '再见'...", end="", flush=True)
                     command_id = self.asr.listen_for_hotword()
                     
+                    if getattr(self.asr, "gate", None) is not None:
+                        print(f"\n[热词检测] {self.asr.gate}")
+                    
                     if command_id == self.WAKE_UP_ID:
                         print("\n检测到关键词 '小新小新'。")
-                        play_wav("我在.wav")
+                        # 提示音在后台播放，同时立即建立语音识别会话；
+                        # 从唤醒时刻起采集到的音频都缓存在环形缓冲区里，会话就绪后一并补发
+                        # 提示音会被回声消除器从识别音频中减去
+                        threading.Thread(target=play_wav, args=("我在.wav", self.wav_sink), daemon=True).start()
+                        self.stt_start_position = self.asr.detection_position
+                        self.stt_start_preroll_ms = 0
+                        # 本地识别指令的同时在常驻连接上开好云端识别任务
+                        self.paraformer_model_instance.prepare()
+                        # 简单动作指令在本地识别后直接执行；识别不了的内容仍从唤醒时刻起交给云端
+                        if self._run_local_command(self.stt_start_position):
+                            self.stt_start_position = None
+                            continue
                         self.conversation_active = True
                         print("进入对话模式。")
                         # 重置LLM对话历史
@@ -330,21 +497,7 @@ class IntegrateClient:
                         
                     elif command_id == self.GOODBYE_ID:
                         print("\n检测到关键词 '再见'，程序将结束。")
-                        if self.cosy_voice_model_instance:
-                            self.cosy_voice_model_instance.text2speech("再见，期待下次与你对话。")
-                        
-                        # 执行站立动作
-                        try:
-                            # 导入ActionGroupControl模块
-                            sys.path.append('/home/pi/TonyPi/')
-                            import hiwonder.ActionGroupControl as AGC
-                            
-                            # 执行站立动作
-                            AGC.runActionGroup('stand')
-                            print("机器人姿态已恢复")
-                        except Exception as e:
-                            print(f"恢复机器人姿态时出错: {e}")
-                            
+                        self._say_goodbye()
                         break
                     
                     time.sleep(0.1)
@@ -352,7 +505,12 @@ class IntegrateClient:
                 else:
                     # 阶段2: 对话模式
                     print("\n[对话模式] 正在等待您的语音输入...")
-                    user_input_text = self.paraformer_model_instance.speech2text()
+                    user_input_text = self.paraformer_model_instance.speech2text(
+                        start_position=self.stt_start_position,
+                        preroll_ms=self.stt_start_preroll_ms if self.stt_start_position is not None else 0
+                    )
+                    self.stt_start_position = None
+                    self.stt_start_preroll_ms = 0
                     print(f"[对话模式] 识别到用户语音: '{user_input_text}'")
                     
                     # 检查是否要结束对话
@@ -382,9 +540,20 @@ class IntegrateClient:
                     response_text = self._process_llm_response(user_input_text)
                     print(f"[对话模式] 回复: '{response_text}'")
                     
-                    # 文本转语音并播放
+                    # 文本转语音并播放，播报期间可以用唤醒词或直接说话打断
                     if self.cosy_voice_model_instance and response_text != '':
-                        self.cosy_voice_model_instance.text2speech(response_text)
+                        # 播报期间提前开好下一轮的识别任务，被打断时可以立即上传音频
+                        self.paraformer_model_instance.prepare()
+                        signal = self._speak_with_barge_in(response_text)
+                        if signal == self.GOODBYE_ID:
+                            # 播报期间说"再见"与主循环中一样结束程序
+                            print("\n检测到关键词 '再见'，程序将结束。")
+                            self._say_goodbye()
+                            break
+                        if signal == self.WAKE_UP_ID and self._run_local_command(self.stt_start_position):
+                            # 用唤醒词打断播报后说的简单指令同样在本地直接执行
+                            self.conversation_active = False
+                            self.stt_start_position = None
                         
                     # 每10次对话清除历史
                     if (conversation_num + 1) % 10 == 0:
@@ -416,6 +585,9 @@ class IntegrateClient:
             print(f"恢复机器人姿态时出错: {e}")
             
         # 清理资源
+        if self.paraformer_model_instance:
+            self.paraformer_model_instance.close()
+        shutdown_audio_capture()
         print("客户端已停止。")
 
 
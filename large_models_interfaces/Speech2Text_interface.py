@@ -7,12 +7,16 @@
 import sys
 import os
 import time
+import queue
+import asyncio
+import threading
 from dashscope.audio.asr import *
 import dashscope
 import pyaudio
 import numpy as np
 from abc import ABC, abstractmethod
 from datetime import datetime
+from typing import AsyncIterator
 
 # 获取当前脚本所在文件夹的绝对路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,12 +25,17 @@ parent_dir = os.path.dirname(current_dir)
 
 sys.path.append(parent_dir)
 from utils.keyboard_monitor import KeyboardMonitor  # 导入键盘监控类
-from get_device_and_rate import get_input_device  # 导入获取输入设备和采样率函数
-
-
-# 新增导入
-import librosa
-import io
+from utils.audio_capture import get_audio_capture  # 导入共享音频采集服务
+from utils.audio_io import AudioSource  # 导入音频输入源接口
+from utils.resampler import StreamingResampler  # 导入流式重采样器
+from utils.vad import VADInterface, AdaptiveEnergyVAD  # 导入语音活动检测
+from utils.frame_sender import FrameSender  # 导入独立发送线程
+from utils.audio_frontend import AudioFrontEnd  # 导入音频前端（降噪、自动增益）
+from utils.echo_canceller import EchoCanceller  # 导入回声消除
+from utils.paraformer_session import ParaformerSessionManager, SetupLatency  # 导入常驻识别会话管理
+from utils.local_transcriber import LocalTranscriber  # 导入本地语音转写（离线兜底）
+from utils.transcript_stream import TranscriptTracker, TranscriptEvent  # 导入识别结果流（中间结果及稳定性）
+from utils.endpointer import EndpointPolicy  # 导入端点检测策略
 
 
 # 屏蔽ALSA错误消息
@@ -46,16 +55,9 @@ CHUNK = 512
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
 
-mindb = 3000 # 声音阈值，用于判断是否开始或停止计时
-
 model = "paraformer-realtime-v2"  # 模型名称
 sample_rate = 16000  # 音频采样率
 
-def get_delayTime(CHUNK, sample_rate):
-    end_time = 2.4  # 小声2.4秒后自动终止 公式：CHUNK * delayTime / RATE = 2.4s
-    delayTime = int(end_time * sample_rate / CHUNK)
-    return delayTime
-
 class ParaformerInterface(ABC):
     
     @abstractmethod
@@ -72,6 +74,8 @@ class Callback(RecognitionCallback):
     def __init__(self, sample_rate: int, input_device_index: int):
         super().__init__()
         self.text = ""  # 用于存储完整的识别文本
+        self.error = None  # 识别出错时的错误信息
+        self.on_sentence = None  # 可选的回调，参数为每次返回的 sentence 字典（中间结果和句末结果）
         self.sample_rate = sample_rate
 
         self.target_sample_rate = 16000  # 目标采样率
@@ -87,25 +91,11 @@ class Callback(RecognitionCallback):
         return formatted_timestamp
 
     def on_open(self) -> None:
-        global stream
-        global p
-        p = pyaudio.PyAudio()
-        input_device_index = 0
-        stream = p.open(format=FORMAT,
-                    channels=CHANNELS,
-                    rate=self.sample_rate,
-                    input=True,
-                    frames_per_buffer=CHUNK,
-			        input_device_index=self.device_index)
+        # 音频由共享采集服务提供，连接建立时无需再打开设备
+        pass
     
     def on_close(self) -> None:
-        global stream
-        global p
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
-        stream = None
-        p = None
+        pass
 
     def on_complete(self) -> None:
         print(self.get_timestamp() + ' Recognition completed 语音识别结束')  # recognition complete
@@ -113,133 +103,519 @@ class Callback(RecognitionCallback):
     def on_error(self, result: RecognitionResult) -> None:
         print('Recognition task_id: ', result.request_id)
         print('Recognition error: ', result.message)
-        if 'stream' in globals() and stream.active:
-            stream.stop_stream()
-            stream.close()
-        exit(0)
+        # 只记录错误，由调用方回退到本地识别或返回空结果，不能退出整个进程
+        self.error = result.message
 
     def on_event(self, result: RecognitionResult) -> None:
         
         sentence = result.get_sentence()
         if 'text' in sentence:
             # print(self.get_timestamp() + ' RecognitionCallback text: ', sentence['text'])
+            if self.on_sentence is not None:
+                self.on_sentence(sentence)
             if RecognitionResult.is_sentence_end(sentence):
-                self.text = sentence['text']
+                # 一轮中可能有多句话，全部保留
+                self.text += sentence['text']
                 # print(self.get_timestamp() + 
                 #     'RecognitionCallback sentence end, request_id:%s, usage:%s'
                 #     % (result.get_request_id(), result.get_usage(sentence)))
 
+
+class SdkRecognitionTask:
+    """
+    把 dashscope Recognition 包装成与常驻连接上的 RecognitionTask 相同的接口
+    创建时调用 Recognition.start()，每轮都会重新建立连接
+    """
+    def __init__(self, recognition: Recognition, callback: Callback, on_sentence=None):
+        self.recognition = recognition
+        self.callback = callback
+        self.callback.error = None
+        self.callback.on_sentence = on_sentence
+        self.recognition.start()
+
+    @property
+    def error(self):
+        return self.callback.error
+
+    def send_audio_frame(self, data: bytes) -> None:
+        self.recognition.send_audio_frame(data)
+
+    def stop(self, timeout: float = None) -> str:
+        try:
+            self.recognition.stop()
+        except Exception as e:
+            self.callback.error = self.callback.error or str(e)
+        return self.callback.text
+
+    def cancel(self) -> None:
+        try:
+            self.recognition.stop()
+        except Exception:
+            pass
+
+
+class HedgeResult:
+    """一轮云端与本地同时识别的结果：采用了哪个引擎，以及各自从录音结束到给出结果的耗时"""
+    def __init__(self, winner: str, cloud_ms: float, local_ms: float, budget_ms: int, cloud_error=None):
+        self.winner = winner  # "cloud" 或 "local"
+        self.cloud_ms = cloud_ms  # 云端结果的耗时，预算内没有返回时为 None
+        self.local_ms = local_ms  # 本地结果的耗时，采用云端结果时本地解码被取消，为 None
+        self.budget_ms = budget_ms  # 等待云端结果的预算
+        self.cloud_error = cloud_error  # 云端识别的错误
+
+    @property
+    def margin_ms(self):
+        """本地耗时减去云端耗时，正数表示云端更快；任一方没有给出结果时为 None"""
+        if self.cloud_ms is None or self.local_ms is None:
+            return None
+        return self.local_ms - self.cloud_ms
+
+    def __repr__(self):
+        if self.winner == "cloud" and self.local_ms is None:
+            return f"HedgeResult(采用云端, 云端={self.cloud_ms:.0f}ms, 本地解码未完成已取消)"
+        if self.winner == "cloud":
+            faster = "云端" if self.margin_ms >= 0 else "本地"
+            return (f"HedgeResult(采用云端, 云端={self.cloud_ms:.0f}ms, 本地={self.local_ms:.0f}ms, "
+                    f"{faster}快{abs(self.margin_ms):.0f}ms)")
+        if self.cloud_error is not None:
+            return f"HedgeResult(采用本地, 本地={self.local_ms:.0f}ms, 云端出错: {self.cloud_error})"
+        if self.cloud_ms is not None:
+            return f"HedgeResult(采用本地, 本地={self.local_ms:.0f}ms, 云端={self.cloud_ms:.0f}ms 结果为空)"
+        return f"HedgeResult(采用本地, 本地={self.local_ms:.0f}ms, 云端超出预算{self.budget_ms}ms未返回)"
+
 class ParaformerModel(ParaformerInterface):
-    def __init__(self,model: str="paraformer-realtime-v2",sample_rate: int=16000,format: str='wav'):
+    def __init__(self,model: str="paraformer-realtime-v2",sample_rate: int=16000,format: str='wav',
+                 vad: VADInterface=None, audio_source: AudioSource=None, frontend: AudioFrontEnd=None,
+                 echo_canceller: EchoCanceller=None, warm_sessions: bool=True,
+                 local_transcriber: LocalTranscriber=None, cloud_budget_ms: int=1500,
+                 endpointer: EndpointPolicy=None):
         """
         初始化模型
         Args:
             model (str, optional): 模型名称. Defaults to "paraformer-realtime-v2".
             sample_rate (int, optional): 音频采样率. Defaults to 16000.
             format (str, optional): 音频格式. Defaults to 'wav'.
+            vad (VADInterface, optional): 判断一句话何时结束的语音活动检测器，作用于16kHz音频.
+                默认使用说话后静音1秒即结束的 AdaptiveEnergyVAD.
+            audio_source (AudioSource, optional): 音频输入源，默认使用共享的麦克风采集服务.
+            echo_canceller (EchoCanceller, optional): 从16kHz音频中减去机器人自己播放的声音（如提示音），
+                在前端处理之前进行，默认不处理.
+            frontend (AudioFrontEnd, optional): 重采样之后对16kHz音频做降噪和增益的音频前端，默认不处理.
+            warm_sessions (bool, optional): 保持识别连接常驻，每轮直接在已建立的连接上开始识别任务，
+                省去每轮的连接握手；为 False 时每轮通过 dashscope Recognition 重新建立连接. Defaults to True.
+            local_transcriber (LocalTranscriber, optional): 本地 Vosk 全文识别器。提供时同一份音频同时送给云端和本地，
+                录音结束后云端结果在预算内返回则采用云端，否则采用本地结果（网络慢或断开时仍能继续对话）.
+                默认只使用云端.
+            cloud_budget_ms (int, optional): 同时识别时，从录音结束起等待云端结果的最长时间. Defaults to 1500.
+            endpointer (EndpointPolicy, optional): 判断一句话何时说完的端点检测策略，作用于 vad.
+                默认收到句末识别结果且本地静音300ms即结束，否则按 VAD 的静音计时，最长20秒.
         """
         self.target_device_name = "USB PnP Audio Device"  # 指定目标设备名称
-        self.device_index, self.sample_rate = get_input_device(sample_rate, self.target_device_name)
+        # 共享进程级采集服务，麦克风常开，每轮对话只需新建一个读取器
+        if audio_source is None:
+            audio_source = get_audio_capture(sample_rate, self.target_device_name)
+        self.audio_source = audio_source
+        self.device_index = getattr(audio_source, 'device_index', None)
+        self.sample_rate = audio_source.sample_rate
+        self.reader = None
 
         self.callback = Callback(self.sample_rate, self.device_index)
         self.model = model
         self.format = format
         self.keyboard_monitor = KeyboardMonitor()  # 创建键盘监控实例
-        self.delayTime = get_delayTime(CHUNK, self.sample_rate)  # 获取延迟时间
+        self.vad = vad if vad is not None else AdaptiveEnergyVAD(sample_rate=self.callback.target_sample_rate)
+        self.endpointer = endpointer if endpointer is not None else EndpointPolicy(self.vad)
+        self.last_utterance_stats = None  # 最近一次录音的语音统计信息
+        self.sender = None  # 上传音频的独立发送线程，每轮识别新建一个
+        self.resampler = StreamingResampler(self.sample_rate, self.callback.target_sample_rate)
+        self.echo_canceller = echo_canceller
+        self.frontend = frontend
         self.recognition = Recognition(model=model,
                             format=format,
                             sample_rate=16000,
                             # "language_hints"只支持paraformer-realtime-v2模型
                             language_hints=['zh', 'en'],
                             callback=self.callback)
+        self.sessions = None  # 常驻识别连接
+        self.last_setup_latency = None  # 最近一轮发送第一帧音频前的准备耗时
+        self.local_transcriber = local_transcriber
+        self.cloud_budget_ms = cloud_budget_ms
+        self.last_hedge = None  # 最近一轮同时识别的结果
+        self.last_text = None  # 最近一轮的识别结果
+        self.stop_requested = threading.Event()  # 其他线程请求立即结束本轮录音
+        if warm_sessions:
+            self.sessions = ParaformerSessionManager(model=model, sample_rate=self.callback.target_sample_rate,
+                                                     format=format, language_hints=['zh', 'en'], api_key=api_key)
+            self.sessions.start()
+
+    def prepare(self) -> None:
+        """提前开好下一轮的识别任务（例如在唤醒或播报回复时调用），使用常驻连接时有效"""
+        if self.sessions is not None:
+            self.sessions.prepare()
+
+    def close(self) -> None:
+        """关闭常驻识别连接"""
+        if self.sessions is not None:
+            self.sessions.close()
+
+    def stop_recording(self) -> None:
+        """请求立即结束当前这轮录音（可在任意线程中调用，效果与按下回车键相同），已录到的音频照常识别"""
+        self.stop_requested.set()
 
     def resample_audio(self, data: bytes) -> bytes:
-        """将音频数据重采样到16kHz"""
-        # 将字节数据转换为numpy数组
-        audio_array = np.frombuffer(data, dtype=np.int16)
-        
-        # 重采样
-        resampled = librosa.resample(
-            audio_array.astype(np.float32),
-            orig_sr=self.callback.actual_sample_rate,
-            target_sr=self.callback.target_sample_rate
-        )
-        
-        # 转换回int16并打包为字节
-        resampled = resampled.astype(np.int16).tobytes()
-        return resampled
+        """将音频数据重采样到16kHz，滤波器状态跨块保留"""
+        return self.resampler.process_bytes(data)
         
     def record(self) -> None:
         """
         录音函数
-        运行后会进行录音，声音过小到一定时间后会自动停止
-        按下回车键可以立即结束录音
+        运行后会进行录音，识别服务返回句末结果并且本地确认静音、VAD静音达到结束时长或达到最长时长时自动停止
+        按下回车键或调用 stop_recording() 可以立即结束录音
         """
         try:
             frames = []
             start = True # 是否继续录音
-            start2 = False # 是否开始进行停止计时
-
-            tempnum = 0  # tempnum、tempnum2为计时量
-            tempnum2 = 0
+            self.vad.reset()
+            self.endpointer.reset()
 
             print("开始录音 (按回车键结束)")
             while start:
-                data = stream.read(CHUNK, exception_on_overflow=False)
+                audio_data = self.reader.read(CHUNK)
+                if audio_data is None:
+                    break
+                data = audio_data.tobytes()
                 frames.append(data)
-                audio_data = np.frombuffer(data, dtype=np.short)
                 temp = np.max(audio_data)
 
                 # 如果需要重采样
                 if self.callback.need_resample:
                     data = self.resample_audio(data)
-
-                if (temp < mindb and start2 == False): # 小声检测
-                    start2 = True
-                    tempnum2 = tempnum
-
-                if (temp > mindb):
-                    start2 = False
-                    tempnum2 = tempnum
-
-                if (tempnum > tempnum2 + self.delayTime and start2 == True): # 停止录音判断
-                    if (start2 and temp < mindb):
-                        start = False
-                    else:
-                        start2 = False
+                if self.echo_canceller is not None:
+                    data = self.echo_canceller.process(np.frombuffer(data, dtype=np.int16)).tobytes()
+                if self.frontend is not None:
+                    data = self.frontend.process(np.frombuffer(data, dtype=np.int16)).tobytes()
+
+                # 语音活动检测，结合服务端句末结果判断是否说完
+                self.vad.process(np.frombuffer(data, dtype=np.int16))
+                if self.endpointer.update():
+                    start = False
                 
                 # 检测是否按下回车键
                 if self.keyboard_monitor.is_enter_pressed():
                     print("\n检测到回车键，立即结束录音")
                     start = False
+                if self.stop_requested.is_set():
+                    print("\n收到结束请求，立即结束录音")
+                    start = False
                 
                 # 添加实时音量可视化
                 vol_bar = "|" * min(20, int(temp / 500))  # 简易音量条
-                print(f"\r倒计时: {max(0, (tempnum2 + self.delayTime - tempnum)*CHUNK/self.sample_rate):.1f}s 音量: [{vol_bar:<20}]", end="")
+                print(f"\r倒计时: {self.endpointer.remaining_ms() / 1000:.1f}s 音量: [{vol_bar:<20}]", end="")
                 
-                # 发送音频数据到服务端
-                self.recognition.send_audio_frame(data)
-
-                tempnum += 1
-
-            print("\n录音结束")
+                # 交给发送线程上传，采集循环不等待网络
+                self.sender.put(data)
+                if self.local_transcriber is not None:
+                    self.local_transcriber.put(data)
+
+            self.last_utterance_stats = self.vad.stats()
+            reason = self.endpointer.reason or "手动结束"
+            if self.endpointer.final_latency_ms is not None:
+                reason += f"，句末结果后 {self.endpointer.final_latency_ms:.0f}ms"
+            print(f"\n录音结束（{reason}）", self.last_utterance_stats)
                 
         except Exception as e:
             raise e
 
 
-    def speech2text(self) -> str:
+    def _open_task(self, on_sentence=None):
+        """
+        开始一轮云端识别，返回可以发送音频的任务（RecognitionTask 或 SdkRecognitionTask）
+        Args:
+            on_sentence (callable, optional): 服务端返回的每条结果（sentence 字典）都交给它.
+        """
+        if self.sessions is not None:
+            task = self.sessions.acquire()
+            task.on_sentence = on_sentence
+            self.last_setup_latency = self.sessions.last_latency
+        else:
+            start = time.monotonic()
+            task = SdkRecognitionTask(self.recognition, self.callback, on_sentence)
+            self.last_setup_latency = SetupLatency((time.monotonic() - start) * 1000, 0.0, False, False)
+        backlog_ms = self.reader.available() * 1000 // self.sample_rate if self.reader is not None else 0
+        print(f"识别会话已就绪 {self.last_setup_latency}，补发缓存音频 {backlog_ms}ms")
+        return task
+
+    def _cloud_turn(self, on_sentence=None) -> str:
+        """只使用云端识别的一轮对话"""
+        task = self._open_task(on_sentence)
+        self.sender = FrameSender(task.send_audio_frame, bytes_per_second=self.callback.target_sample_rate * 2)
+        self.sender.start()
+        try:
+            try:
+                self.record()
+            finally:
+                # 先把队列中剩余的音频发完，再结束识别任务
+                self.sender.stop()
+                print(f"音频上传统计: {self.sender.stats()}")
+        except BaseException:
+            task.cancel()  # 出错时结束任务，连接留给下一轮使用
+            raise
+        text = task.stop()
+        if task.error is not None:
+            print(f"云端识别出错: {task.error}")
+        return text
+
+    def _hedged_turn(self, on_sentence=None) -> str:
+        """
+        云端和本地同时识别的一轮对话
+        录音在本线程进行，不等待云端连接；云端任务的建立、上传和结束都在后台线程中完成，
+        连接较慢时音频先缓存在发送队列里，连接失败时直接采用本地结果。
+        录音结束后先在预算内等待云端结果，云端给出非空结果时直接取消本地解码，
+        只有云端超出预算、出错或结果为空时才等待本地解码完成
+        """
+        cloud = {"task": None, "text": None, "error": None, "aborted": False}
+        cloud_done = threading.Event()
+        recording_done = threading.Event()
+        end = [None]  # 录音结束的时刻
+        sender = FrameSender(lambda data: cloud["task"].send_audio_frame(data),
+                             bytes_per_second=self.callback.target_sample_rate * 2, max_queue_ms=30000)
+        self.sender = sender
+
+        def run_cloud():
+            try:
+                cloud["task"] = self._open_task(on_sentence)
+                sender.start()
+                recording_done.wait()
+                sender.stop()
+                if cloud["aborted"]:
+                    cloud["task"].cancel()
+                    return
+                cloud["text"] = cloud["task"].stop()
+                cloud["error"] = cloud["task"].error
+            except Exception as e:
+                cloud["error"] = e
+            finally:
+                cloud["ms"] = (time.monotonic() - end[0]) * 1000 if end[0] is not None else 0.0
+                cloud_done.set()
+            if late.is_set():
+                print(f"\n[语音识别] 云端结果晚到: 录音结束后 {cloud['ms']:.0f}ms（预算 {self.cloud_budget_ms}ms），"
+                      f"结果 '{cloud['text']}'，错误: {cloud['error']}")
+
+        late = threading.Event()  # 已经采用本地结果，云端之后返回时只记录日志
+        self.local_transcriber.start()
+        threading.Thread(target=run_cloud, daemon=True).start()
+        try:
+            self.record()
+        except BaseException:
+            cloud["aborted"] = True
+            recording_done.set()
+            self.local_transcriber.cancel()
+            raise
+        end[0] = time.monotonic()
+        recording_done.set()
+
+        # 本地解码跟不上时队列里可能积压了数秒音频，不能让它拖住预算内返回的云端结果
+        cloud_done.wait(self.cloud_budget_ms / 1000)
+        if cloud_done.is_set() and cloud["error"] is None and cloud["text"]:
+            self.local_transcriber.cancel()
+            local_text = None
+            self.last_hedge = HedgeResult("cloud", cloud["ms"], None, self.cloud_budget_ms)
+            text = cloud["text"]
+        else:
+            if not cloud_done.is_set():
+                late.set()
+            local_text = self.local_transcriber.finish()
+            local_ms = (time.monotonic() - end[0]) * 1000
+            cloud_ms = cloud["ms"] if cloud_done.is_set() else None
+            self.last_hedge = HedgeResult("local", cloud_ms, local_ms, self.cloud_budget_ms, cloud["error"])
+            text = local_text
+        print(f"音频上传统计: {sender.stats()}")
+        local_shown = "已取消" if local_text is None else f"'{local_text}'"
+        print(f"[语音识别] {self.last_hedge} 云端: '{cloud['text']}' 本地: {local_shown}")
+        return text
+
+    def speech2text(self, start_position: int = None, preroll_ms: int = 0, on_transcript=None) -> str:
+        """
+        录音并识别一句话
+        Args:
+            start_position (int, optional): 从采集时间轴上的该位置开始识别（例如检测到唤醒词的时刻）。
+                位置之后已经采集到的音频保存在环形缓冲区中，会话建立后会立即补发. Defaults to 当前时刻.
+            preroll_ms (int, optional): 在起点之前额外带上的音频时长. Defaults to 0.
+            on_transcript (callable, optional): 识别结果回调，参数为 TranscriptEvent：识别过程中的中间结果
+                （带稳定性标记）和句末结果，最后是一条 utterance_end 事件。在结果的接收线程中调用，应尽快返回.
+                Defaults to None.
+        Returns:
+            str: 识别结果
+        """
         self.callback.text = ""
+        self.resampler.reset()
+        if self.frontend is not None:
+            self.frontend.reset()
+        if start_position is None:
+            start_position = self.audio_source.position
+        # 在建立连接之前开始读取，握手期间采集到的音频会缓存在环形缓冲区中
+        self.reader = self.audio_source.open_reader()
+        self.reader.seek(start_position - preroll_ms * self.sample_rate // 1000)
+        if self.echo_canceller is not None:
+            self.echo_canceller.reset(self.reader.position)
         
+        tracker = TranscriptTracker(on_transcript) if on_transcript is not None else None
+        turn_done = threading.Event()
+
+        def on_sentence(sentence, source="cloud"):
+            # 本轮结束后晚到的结果（同时识别时云端可能晚于本地）不再影响端点检测和结果流
+            if turn_done.is_set():
+                return
+            self.endpointer.on_sentence(sentence, source)
+            if tracker is not None and source == "cloud":
+                tracker.on_sentence(sentence, source)
+
+        if self.local_transcriber is not None:
+            # 本地识别的句末结果只用于端点检测，网络断开时也能提前结束录音
+            self.local_transcriber.on_sentence = lambda sentence: on_sentence(sentence, "local")
         try:
-            self.recognition.start()
-            self.record()
-            self.recognition.stop()
+            if self.local_transcriber is not None:
+                text = self._hedged_turn(on_sentence)
+                source = self.last_hedge.winner
+            else:
+                text = self._cloud_turn(on_sentence)
+                source = "cloud"
         finally:
+            turn_done.set()
+            self.stop_requested.clear()
+            self.audio_source.close_reader(self.reader)
+            self.reader = None
             # 确保恢复终端设置
             self.keyboard_monitor.restore_terminal()
 
-        return self.callback.text
+        self.last_text = text
+        if tracker is not None:
+            tracker.finish(text, source)
+        return text
+
+    def stream(self, start_position: int = None, preroll_ms: int = 0):
+        """
+        录音并识别一句话，边识别边产出 TranscriptEvent（参数同 speech2text）
+        用法：
+            for event in model.stream():
+                if event.stable and not event.utterance_end:
+                    ...  # 根据稳定的中间结果提前做准备
+            text = model.last_text
+        录音和识别在后台线程中进行，生成器提前退出时本轮识别仍会正常结束
+        """
+        events = queue.Queue()
+        result = {}
+
+        def run():
+            try:
+                result["text"] = self.speech2text(start_position, preroll_ms, on_transcript=events.put)
+            except Exception as e:
+                result["error"] = e
+            finally:
+                events.put(None)
+
+        threading.Thread(target=run, daemon=True).start()
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield event
+        if "error" in result:
+            raise result["error"]
+        return result["text"]
+
+
+class AsyncParaformerInterface(ABC):
+
+    @abstractmethod
+    async def speech2text(self) -> str:
+        '''
+        语音转文本接口，可以与其他协程并行，任务被取消时结束录音
+        return:
+            str: 语音转文本结果
+        '''
+        pass
+
+
+class AsyncParaformerModel(AsyncParaformerInterface):
+    """
+    ParaformerModel 的异步版本。
+    采集循环、上传线程和识别连接仍由 ParaformerModel 负责（dashscope 没有 asyncio 的实时识别客户端），
+    这里在线程池中运行一轮识别，不阻塞事件循环。任务被取消时请求结束录音，等本轮收尾（关闭读取器、
+    结束识别任务）完成后再抛出 CancelledError，麦克风和识别连接不会停在半途。
+    用法：
+        asr = AsyncParaformerModel(ParaformerModel())
+        text = await asr.speech2text()
+        async for event in asr.stream():
+            ...
+    """
+
+    def __init__(self, model: ParaformerModel = None, **kwargs):
+        """
+        Args:
+            model (ParaformerModel, optional): 与同步代码共用的识别模型（共用麦克风读取和常驻连接）.
+                Defaults to 按 kwargs 新建.
+        """
+        self.model = model if model is not None else ParaformerModel(**kwargs)
+
+    @property
+    def last_text(self):
+        return self.model.last_text
+
+    def prepare(self) -> None:
+        self.model.prepare()
+
+    def close(self) -> None:
+        self.model.close()
+
+    async def speech2text(self, start_position: int = None, preroll_ms: int = 0, on_transcript=None) -> str:
+        """
+        录音并识别一句话，参数同 ParaformerModel.speech2text（on_transcript 在识别结果的接收线程中调用）
+        Returns:
+            str: 识别结果
+        """
+        turn = asyncio.ensure_future(asyncio.to_thread(self.model.speech2text, start_position, preroll_ms,
+                                                       on_transcript))
+        try:
+            return await asyncio.shield(turn)
+        except asyncio.CancelledError:
+            self.model.stop_recording()
+            await asyncio.wait([turn])
+            self.model.stop_requested.clear()  # 取消时本轮可能已经结束，清除请求以免影响下一轮
+            raise
+
+    async def stream(self, start_position: int = None, preroll_ms: int = 0) -> AsyncIterator[TranscriptEvent]:
+        """
+        录音并识别一句话，边识别边产出 TranscriptEvent（参数同 speech2text）
+        用法：
+            async for event in asr.stream():
+                if event.stable and not event.utterance_end:
+                    ...  # 根据稳定的中间结果提前做准备
+            text = asr.last_text
+        与同步的 stream() 一样，提前退出循环时本轮识别仍会正常结束；任务被取消时结束录音
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        async def run():
+            try:
+                return await self.speech2text(start_position, preroll_ms,
+                                              lambda event: loop.call_soon_threadsafe(events.put_nowait, event))
+            finally:
+                events.put_nowait(None)
+
+        turn = asyncio.ensure_future(run())
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+        except asyncio.CancelledError:
+            turn.cancel()
+            await asyncio.wait([turn])
+            raise
+        await turn  # 抛出识别过程中的异常
 
 if __name__ == '__main__':
     model = ParaformerModel(model=model,sample_rate=sample_rate)
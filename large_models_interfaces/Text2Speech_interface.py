@@ -27,6 +27,13 @@ from datetime import datetime
 import re
 import sys
 import ctypes
+import queue
+import asyncio
+import threading
+from typing import AsyncIterator
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.audio_io import AudioSink, SpeakerSink
 
 # 若没有将API Key配置到环境变量中，需将your-api-key替换为自己的API Key
 api_key = os.environ.get("ALI_APIKEY")
@@ -48,13 +55,79 @@ class CosyVoiceInterface(ABC):
         pass
 
 
+class AsyncCosyVoiceInterface(ABC):
+    @abstractmethod
+    async def text2speech(self, text) -> None:
+        """
+        文本转音频并直接输出音频，播放结束后返回；任务被取消时打断播报
+        Args:
+            text: 待合成语音的文本
+        """
+        pass
+
+
+class SpeechHandle:
+    """
+    一次语音播报的控制句柄，由 CosyVoiceModel.speak() 返回。
+    可以在任意线程中调用 cancel() 打断播报：已缓冲的音频立即丢弃，合成任务随之取消。
+    """
+
+    SAMPLE_RATE = 22050  # 合成音频的采样率（16bit单声道）
+
+    def __init__(self, text: str, chars_per_second: float):
+        self.text = text
+        self.chars_per_second = chars_per_second  # 用于估算已播报文本的语速
+        self.audio_bytes = 0  # 已写入输出端的音频字节数
+        self.cancelled = False
+        self.finished = threading.Event()  # 播报结束（正常结束或被打断）时置位
+        self.synthesizer = None
+        self.sink = None
+
+    @property
+    def played_ms(self) -> int:
+        return self.audio_bytes * 1000 // (self.SAMPLE_RATE * 2)
+
+    @property
+    def spoken_text(self) -> str:
+        """
+        已经播报出的文本。正常结束时为全文；被打断时按已播放时长和语速估算
+        """
+        if not self.cancelled:
+            return self.text
+        count = int(self.played_ms / 1000 * self.chars_per_second)
+        return self.text[:min(count, len(self.text))]
+
+    def cancel(self) -> None:
+        """打断播报：先中止音频输出，再取消合成任务"""
+        if self.cancelled or self.finished.is_set():
+            return
+        self.cancelled = True
+        if self.sink is not None:
+            self.sink.abort()
+        if self.synthesizer is not None:
+            try:
+                self.synthesizer.streaming_cancel()
+            except Exception as e:
+                print(f"取消语音合成任务失败: {e}")
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.finished.wait(timeout)
+
+
 # 定义回调接口
 class Callback(ResultCallback):
-    _player = None
-    _stream = None
     _stderr_fd = None
     _original_stderr_fd = None
 
+    def __init__(self, sink: AudioSink = None):
+        """
+        Args:
+            sink (AudioSink, optional): 合成音频的输出端，默认输出到扬声器.
+        """
+        super().__init__()
+        self.sink = sink if sink is not None else SpeakerSink()
+        self.handle = None  # 当前播报的控制句柄
+
     def suppress_alsa_errors(self):
         # 保存原始stderr
         self._original_stderr_fd = os.dup(sys.stderr.fileno())
@@ -73,11 +146,10 @@ class Callback(ResultCallback):
     def on_open(self):
         print("连接建立：" + self.get_timestamp())
         self.suppress_alsa_errors()  # <-- 屏蔽底层 stderr 输出
-        self._player = pyaudio.PyAudio()
-        self._stream = self._player.open(
-            format=pyaudio.paInt16, channels=1, rate=22050, output=True
-        )
-        self.restore_stderr()  # <-- 语音设备初始化后恢复 stderr 输出
+        try:
+            self.sink.open(sample_rate=22050, channels=1, sample_width=2)
+        finally:
+            self.restore_stderr()  # <-- 语音设备初始化后恢复 stderr 输出
 
     def on_complete(self):
         print("语音合成完成，所有合成结果已被接收：" + self.get_timestamp())
@@ -87,25 +159,33 @@ class Callback(ResultCallback):
 
     def on_close(self):
         print("连接关闭：" + self.get_timestamp())
-        self._stream.stop_stream()
-        self._stream.close()
-        self._player.terminate()
+        self.sink.close()
 
     def on_event(self, message):
         pass
 
     def on_data(self, data: bytes) -> None:
-        self._stream.write(data)
+        handle = self.handle
+        if handle is not None and handle.cancelled:
+            return  # 已被打断，丢弃取消前还在路上的音频
+        self.sink.write(data)
+        if handle is not None:
+            handle.audio_bytes += len(data)
 
 class CosyVoiceModel(CosyVoiceInterface):
-    def __init__(self, model: str="cosyvoice-v2", voice: str="longshu_v2"):
-        self.callback = Callback()
+    PUNCTUATION = "，。！？；：,.!?;:"  # 分段用的标点符号
+
+    def __init__(self, model: str="cosyvoice-v2", voice: str="longshu_v2", audio_sink: AudioSink=None):
+        self.callback = Callback(audio_sink)
         '''
         model: 语音合成模型，默认为cosyvoice-v2
         voice: 语音合成音色，默认为longshu_v2
+        audio_sink: 合成音频的输出端（utils.audio_io.AudioSink），默认输出到扬声器；
+                    测试时可传入 NullSink 或 WavFileSink
         '''
         self.model = model
         self.voice = voice
+        self.chars_per_second = 4.5  # 语速估计，每次完整播报后按实际时长校准
     
     # 文本分段
     def segment(self, text) -> list[str]:
@@ -114,7 +194,7 @@ class CosyVoiceModel(CosyVoiceInterface):
         # 去除换行符（替换为空格）
         text = text.replace('\n', ' ')
         # 使用正则表达式按标点符号分段，同时保留标点符号
-        pattern = r'([，。！？；：,.!?;:])'
+        pattern = f'([{self.PUNCTUATION}])'
         segments = re.split(pattern, text)
         
         # 过滤空字符串
@@ -131,10 +211,25 @@ class CosyVoiceModel(CosyVoiceInterface):
                 result.append(segments[i])
         return result
 
-    def text2speech(self, text) -> None:
+    def text2speech(self, text, handle: SpeechHandle=None) -> None:
+        """
+        合成并播放文本，阻塞到播放结束或被打断
+        Args:
+            text: 待合成语音的文本
+            handle (SpeechHandle, optional): 控制句柄，其他线程可通过它打断播报.
+        """
+        if handle is None:
+            handle = SpeechHandle(text, self.chars_per_second)
         # 文本分段
-        textList = self.segment(text)
+        self.synthesize_segments(self.segment(text), handle)
 
+    def synthesize_segments(self, segments, handle: SpeechHandle) -> None:
+        """
+        依次合成并播放文本段，阻塞到播放结束或被打断
+        Args:
+            segments: 文本段的可迭代对象，可以是边生成边产出的迭代器（例如读取队列）.
+            handle (SpeechHandle): 控制句柄，handle.text 应为已给出的全部文本，用于估算播报进度和校准语速.
+        """
         # 实例化SpeechSynthesizer，并在构造方法中传入模型（model）、音色（voice）等请求参数
         synthesizer = SpeechSynthesizer(
             model=self.model,
@@ -142,14 +237,133 @@ class CosyVoiceModel(CosyVoiceInterface):
             format=AudioFormat.PCM_22050HZ_MONO_16BIT,  
             callback=self.callback,
         )
+        handle.synthesizer = synthesizer
+        handle.sink = self.callback.sink
+        self.callback.handle = handle
+
+        try:
+            # 流式发送待合成文本。在回调接口的on_data方法中实时获取二进制音频
+            for segment in segments:
+                if handle.cancelled:
+                    break
+                synthesizer.streaming_call(segment)
+                time.sleep(0.1)
+
+            # 结束流式语音合成；被打断时由 handle.cancel() 取消合成任务
+            if not handle.cancelled:
+                synthesizer.streaming_complete()
+        except Exception as e:
+            if not handle.cancelled:
+                raise
+            print(f"语音合成已被打断: {e}")
+        finally:
+            self.callback.handle = None
+            handle.finished.set()
+
+        if handle.cancelled:
+            print(f"播报被打断，已播放 {handle.played_ms}ms，约播报到: '{handle.spoken_text}'")
+        elif handle.played_ms > 0:
+            # 按本次的实际时长校准语速
+            rate = len(handle.text) / (handle.played_ms / 1000)
+            self.chars_per_second = 0.5 * self.chars_per_second + 0.5 * rate
+
+    def speak(self, text) -> SpeechHandle:
+        """
+        在后台线程中合成并播放文本，立即返回控制句柄
+        Returns:
+            SpeechHandle: 可用于等待播报结束（wait）或打断播报（cancel）
+        """
+        handle = SpeechHandle(text, self.chars_per_second)
+        threading.Thread(target=self.text2speech, args=(text, handle), daemon=True).start()
+        return handle
+
+
+class AsyncCosyVoiceModel(AsyncCosyVoiceInterface):
+    """
+    CosyVoiceModel 的异步版本。dashscope 的语音合成只提供回调式的客户端，合成和播放仍由 CosyVoiceModel 的线程完成，
+    这里等待播报结束而不阻塞事件循环：任务被取消时立即打断播报（丢弃已缓冲的音频并取消合成任务）。
+    用法：
+        tts = AsyncCosyVoiceModel()
+        await tts.text2speech("你好")
+        handle = await tts.speak_stream(llm.stream_response(question))   # 边生成边播报
+    """
+
+    def __init__(self, model: str="cosyvoice-v2", voice: str="longshu_v2", audio_sink: AudioSink=None,
+                 tts: CosyVoiceModel=None):
+        """
+        Args:
+            model (str, optional): 语音合成模型. Defaults to "cosyvoice-v2".
+            voice (str, optional): 语音合成音色. Defaults to "longshu_v2".
+            audio_sink (AudioSink, optional): 合成音频的输出端，默认输出到扬声器.
+            tts (CosyVoiceModel, optional): 与同步代码共用的合成模型（共用输出端和语速估计），提供时忽略以上参数.
+        """
+        self.tts = tts if tts is not None else CosyVoiceModel(model, voice, audio_sink)
+
+    @staticmethod
+    async def _wait(handle: SpeechHandle) -> None:
+        try:
+            await asyncio.to_thread(handle.wait)
+        except asyncio.CancelledError:
+            handle.cancel()
+            raise
+
+    async def text2speech(self, text) -> SpeechHandle:
+        """
+        合成并播放文本，播放结束或被打断后返回
+        Args:
+            text: 待合成语音的文本
+        Returns:
+            SpeechHandle: 本次播报的控制句柄，可查询是否被打断和已播报的文本
+        """
+        handle = self.tts.speak(text)
+        await self._wait(handle)
+        return handle
+
+    async def speak_stream(self, text_stream: AsyncIterator[str]) -> SpeechHandle:
+        """
+        边接收文本边合成播放，例如传入 AsyncQwenModelInterface.stream_response() 的结果，
+        第一句生成完就开始播报，不必等待完整回复。文本在标点处切分后送去合成
+        Args:
+            text_stream (AsyncIterator[str]): 逐段产出文本的异步迭代器.
+        Returns:
+            SpeechHandle: 本次播报的控制句柄，被打断（handle.cancel() 或任务取消）时停止读取文本流
+        """
+        segments = queue.Queue()
+        handle = SpeechHandle("", self.tts.chars_per_second)
+
+        def feed(text):
+            if not handle.text:
+                # 收到第一句时才开始合成任务，文本流为空时不建立连接
+                threading.Thread(target=self.tts.synthesize_segments, args=(iter(segments.get, None), handle),
+                                 daemon=True).start()
+            for segment in self.tts.segment(text):
+                handle.text += segment
+                segments.put(segment)
 
-        # 流式发送待合成文本。在回调接口的on_data方法中实时获取二进制音频
-        for text in textList:
-            synthesizer.streaming_call(text)
-            time.sleep(0.1)
-            
-        # 结束流式语音合成
-        synthesizer.streaming_complete()
+        buffer = ""
+        try:
+            async for delta in text_stream:
+                if handle.cancelled:
+                    break
+                buffer += delta
+                # 最后一个标点之前是完整的句子，先送去合成
+                cut = max(buffer.rfind(p) for p in self.tts.PUNCTUATION) + 1
+                if cut > 0:
+                    feed(buffer[:cut])
+                    buffer = buffer[cut:]
+            if buffer.strip() and not handle.cancelled:
+                feed(buffer)
+        except asyncio.CancelledError:
+            handle.cancel()
+            raise
+        finally:
+            segments.put(None)  # 没有更多文本，合成线程结束本次任务
+            if hasattr(text_stream, "aclose"):
+                await text_stream.aclose()
+        if not handle.text:
+            handle.finished.set()
+        await self._wait(handle)
+        return handle
 
 
 if __name__ == '__main__':
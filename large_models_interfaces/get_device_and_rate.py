@@ -1,19 +1,142 @@
 """
 获取音频设备接口 V2.0
 核心功能是获取设备信息和音频采样率，主要用于扫描系统中所有可用的音频输入设备。
+扫描结果按设备名称、ALSA声卡ID和USB路径缓存到磁盘，声卡集合没有变化时直接复用，
+插拔设备后缓存自动失效并重新扫描。
 """
 
+import os
+import re
+import json
 import pyaudio
 
 FORMAT = pyaudio.paInt16  # 音频数据格式
 
+# 设备缓存文件路径，可通过环境变量 ROBOT_AUDIO_CACHE 修改
+CACHE_PATH = os.environ.get("ROBOT_AUDIO_CACHE",
+                            os.path.join(os.path.expanduser("~"), ".cache", "robot_voice", "audio_devices.json"))
+
+# 探测设备支持的采样率时尝试的候选值
+PROBE_RATES = [16000, 48000, 44100, 22050, 8000]
+
+# 进程内缓存，同一进程内重复调用无需再读文件
+_memory_cache = {}
+
+
+def get_alsa_cards() -> list:
+    """
+    读取 /proc/asound/cards 和 /sys/class/sound，列出当前所有声卡。
+    只读取几个小文件，不初始化PyAudio，开销可以忽略。
+    Returns:
+        list: [{"card": 声卡号, "id": ALSA声卡ID, "name": 声卡名称, "usb_path": 设备在sysfs中的路径}]，
+              非Linux系统返回 None
+    """
+    try:
+        with open("/proc/asound/cards", "r") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    cards = []
+    for i, line in enumerate(lines):
+        match = re.match(r"^\s*(\d+)\s+\[(\S+)\s*\]:\s*(.*)$", line)
+        if not match:
+            continue
+        card = int(match.group(1))
+        long_name = lines[i + 1].strip() if i + 1 < len(lines) else ""
+        device_link = f"/sys/class/sound/card{card}/device"
+        usb_path = os.path.realpath(device_link) if os.path.exists(device_link) else ""
+        cards.append({
+            "card": card,
+            "id": match.group(2),
+            "name": f"{match.group(3)} {long_name}",
+            "usb_path": usb_path,
+        })
+    return cards
+
+
+def _cache_key(device_name: str, sample_rate: int, cards: list) -> str:
+    """缓存键：目标设备名称 + 匹配到的声卡ID和USB路径 + 期望采样率"""
+    card = next((c for c in cards if device_name in c["name"]), None)
+    card_id = card["id"] if card else ""
+    usb_path = card["usb_path"] if card else ""
+    return f"{device_name}|{card_id}|{usb_path}|{sample_rate}"
+
+
+def _load_cache(cards: list) -> dict:
+    """读取磁盘缓存，声卡集合发生变化（插拔设备）时视为失效"""
+    try:
+        with open(CACHE_PATH, "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("cards") != cards:
+        print("音频设备发生变化，设备缓存已失效")
+        return {}
+    return cache.get("entries", {})
+
+
+def _save_cache(cards: list, entries: dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        tmp_path = CACHE_PATH + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"cards": cards, "entries": entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        print(f"写入音频设备缓存失败: {e}")
+
+
+def clear_device_cache() -> None:
+    """清空进程内和磁盘上的设备缓存"""
+    _memory_cache.clear()
+    try:
+        os.remove(CACHE_PATH)
+    except OSError:
+        pass
+
+
 # 获取设备信息和音频采样率
-def get_input_device(sample_rate: int, device_name: str="USB PnP Audio Device"):
-        """查找特定USB音频设备并检查支持的采样率"""
+def get_input_device(sample_rate: int, device_name: str="USB PnP Audio Device", use_cache: bool=True):
+        """
+        查找特定USB音频设备并检查支持的采样率，优先使用缓存结果
+        Returns:
+            tuple: (设备索引, 采样率)
+        """
+        if not use_cache:
+            device_index, rate, _ = _probe_input_device(sample_rate, device_name)
+            return device_index, rate
+
+        cards = get_alsa_cards()
+        memory_key = (device_name, sample_rate)
+        cached = _memory_cache.get(memory_key)
+        if cached is not None and cached["cards"] == cards:
+            return cached["device_index"], cached["sample_rate"]
+
+        # 非Linux系统无法判断设备是否变化，只使用进程内缓存
+        entries = _load_cache(cards) if cards is not None else {}
+        key = _cache_key(device_name, sample_rate, cards or [])
+        entry = entries.get(key)
+        if entry is not None:
+            print(f"使用缓存的音频设备: {entry['device_index']} ({entry['sample_rate']}Hz)")
+        else:
+            device_index, rate, supported_rates = _probe_input_device(sample_rate, device_name)
+            entry = {"device_index": device_index, "sample_rate": rate, "supported_rates": supported_rates}
+            if cards is not None and device_index is not None:
+                entries[key] = entry
+                _save_cache(cards, entries)
+
+        _memory_cache[memory_key] = {"cards": cards, **entry}
+        return entry["device_index"], entry["sample_rate"]
+
+
+def _probe_input_device(sample_rate: int, device_name: str):
+        """扫描所有输入设备，返回 (设备索引, 采样率, 目标设备支持的采样率列表)"""
         target_device_index = None
         target_rate = sample_rate
         target_device_name = device_name
-        
+        supported_rates = []
+
         p = pyaudio.PyAudio()
 
         print("搜索音频设备...")
@@ -22,12 +145,13 @@ def get_input_device(sample_rate: int, device_name: str="USB PnP Audio Device"):
             if dev_info['maxInputChannels'] > 0:
                 device_name = dev_info['name']
                 print(f"设备 {i}: {device_name}")
-                
+
                 # 检查是否为目标USB设备
                 if target_device_name in device_name:
                     print(f"  → 找到目标设备: {target_device_name}")
                     target_device_index = i
-                    
+                    supported_rates = _probe_rates(p, i)
+
                     # 检查支持的采样率
                     try:
                         # 优先尝试16000Hz
@@ -39,7 +163,7 @@ def get_input_device(sample_rate: int, device_name: str="USB PnP Audio Device"):
                         ):
                             print(f"  ✓ 支持 {target_rate}Hz 采样率")
                             break
-                        
+
                         # 尝试设备默认采样率
                         default_rate = int(dev_info['defaultSampleRate'])
                         print(f"  ! 不支持 {target_rate}Hz, 尝试默认采样率: {default_rate}Hz")
@@ -50,20 +174,12 @@ def get_input_device(sample_rate: int, device_name: str="USB PnP Audio Device"):
                         # 尝试通用采样率
                         common_rates = [44100, 48000, 22050, 16000, 8000]
                         for rate in common_rates:
-                            try:
-                                if p.is_format_supported(
-                                    rate,
-                                    input_device=i,
-                                    input_channels=1,
-                                    input_format=FORMAT
-                                ):
-                                    print(f"  → 使用备用采样率: {rate}Hz")
-                                    sample_rate = rate
-                                    break
-                            except:
-                                continue
+                            if rate in supported_rates:
+                                print(f"  → 使用备用采样率: {rate}Hz")
+                                sample_rate = rate
+                                break
                         break
-        
+
         if target_device_index is None:
             print("警告: 未找到目标USB设备，使用默认输入设备")
             for i in range(p.get_device_count()):
@@ -74,4 +190,21 @@ def get_input_device(sample_rate: int, device_name: str="USB PnP Audio Device"):
                     break
         p.terminate()
 
-        return target_device_index, sample_rate
\ No newline at end of file
+        return target_device_index, sample_rate, supported_rates
+
+
+def _probe_rates(p, device_index: int) -> list:
+        """逐个检查候选采样率是否被设备支持"""
+        supported = []
+        for rate in PROBE_RATES:
+            try:
+                if p.is_format_supported(
+                    rate,
+                    input_device=device_index,
+                    input_channels=1,
+                    input_format=FORMAT
+                ):
+                    supported.append(rate)
+            except:
+                continue
+        return supported
@@ -4,11 +4,16 @@
 """
 
 import os
+import sys
 import base64
+import asyncio
 from abc import ABC, abstractmethod
-from openai import OpenAI
+from openai import AsyncOpenAI
 from typing import Optional
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.async_runner import run_sync  # 导入后台事件循环（同步接口在其中运行异步接口）
+
 # -------------------- 步骤 1: 定义图片描述服务的接口 (抽象基类) --------------------
 class ImageDescriptionInterface(ABC):
     """
@@ -31,15 +36,37 @@ class ImageDescriptionInterface(ABC):
         pass
 
 
-# -------------------- 步骤 2: 实现接口，封装通义千问视觉语言模型 --------------------
-class QwenVLModelInterface(ImageDescriptionInterface):
+# -------------------- 步骤 2: 定义异步接口，可以用 asyncio.gather 与其他请求并行 --------------------
+class AsyncImageDescriptionInterface(ABC):
     """
-    通义千问视觉语言（Qwen-VL）模型的具体实现，遵循 ImageDescriptionInterface 接口。
+    ImageDescriptionInterface 的异步版本。
+    """
+
+    @abstractmethod
+    async def describe_image(self, image_path: str, prompt: Optional[str] = None) -> str:
+        """
+        接收一个本地图片路径，返回模型对图片的文字描述。
+
+        Args:
+            image_path (str): 本地图像文件的绝对或相对路径。
+            prompt (str, optional): 自定义提问。如果为 None，则使用默认提问。
+
+        Returns:
+            str: 模型生成的对图片的描述文本。
+        """
+        pass
+
+
+# -------------------- 步骤 3: 实现异步接口，封装通义千问视觉语言模型 --------------------
+class AsyncQwenVLModelInterface(AsyncImageDescriptionInterface):
+    """
+    通义千问视觉语言（Qwen-VL）模型的异步实现，使用 AsyncOpenAI 客户端。
+    读取和编码图片在线程池中进行，不阻塞事件循环。
     """
 
     def __init__(self, model: str = "qwen-vl-max"):
         """
-        初始化通义千问视觉语言模型客户端。
+        初始化通义千问视觉语言模型的异步客户端。
 
         Args:
             model (str): 要使用的具体模型名称，例如 "qwen-vl-max", "qwen-vl-plus" 等。
@@ -51,12 +78,12 @@ class QwenVLModelInterface(ImageDescriptionInterface):
             if not api_key:
                 raise ValueError("环境变量 'DASHSCOPE_API_KEY' 未设置，请先设置。")
             
-            self.client = OpenAI(
+            self.client = AsyncOpenAI(
                 api_key=api_key,
                 base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
             )
         except Exception as e:
-            print(f"初始化OpenAI客户端失败: {e}")
+            print(f"初始化AsyncOpenAI客户端失败: {e}")
             raise
 
     def _encode_image_and_get_mime_type(self, image_path: str) -> (str, str):
@@ -77,7 +104,7 @@ class QwenVLModelInterface(ImageDescriptionInterface):
         
         return encoded_string, mime_type
 
-    def describe_image(self, image_path: str, prompt: Optional[str] = None) -> str:
+    async def describe_image(self, image_path: str, prompt: Optional[str] = None) -> str:
         """
         实现接口定义的 describe_image 方法。
         """
@@ -85,7 +112,7 @@ class QwenVLModelInterface(ImageDescriptionInterface):
             return f"错误：找不到图片文件 '{image_path}'"
             
         try:
-            base64_image, mime_type = self._encode_image_and_get_mime_type(image_path)
+            base64_image, mime_type = await asyncio.to_thread(self._encode_image_and_get_mime_type, image_path)
         except (ValueError, FileNotFoundError) as e:
             return f"处理图片时出错: {e}"
 
@@ -111,7 +138,7 @@ class QwenVLModelInterface(ImageDescriptionInterface):
 
         try:
             print(f"正在向 {self.model_name} 模型发送图片和请求...")
-            completion = self.client.chat.completions.create(
+            completion = await self.client.chat.completions.create(
                 model=self.model_name,
                 messages=messages
             )
@@ -123,7 +150,31 @@ class QwenVLModelInterface(ImageDescriptionInterface):
             return error_message
 
 
-# -------------------- 步骤 3: 在主程序块中测试接口实现 --------------------
+# -------------------- 步骤 4: 同步接口，在后台事件循环中调用异步实现 --------------------
+class QwenVLModelInterface(ImageDescriptionInterface):
+    """
+    通义千问视觉语言（Qwen-VL）模型的具体实现，遵循 ImageDescriptionInterface 接口。
+    请求由 AsyncQwenVLModelInterface 完成，这里只是在后台事件循环中等待它的结果。
+    """
+
+    def __init__(self, model: str = "qwen-vl-max"):
+        """
+        初始化通义千问视觉语言模型客户端。
+
+        Args:
+            model (str): 要使用的具体模型名称，例如 "qwen-vl-max", "qwen-vl-plus" 等。
+        """
+        self.model_name = model
+        self.async_model = AsyncQwenVLModelInterface(model)
+
+    def describe_image(self, image_path: str, prompt: Optional[str] = None) -> str:
+        """
+        实现接口定义的 describe_image 方法。
+        """
+        return run_sync(self.async_model.describe_image(image_path, prompt))
+
+
+# -------------------- 步骤 5: 在主程序块中测试接口实现 --------------------
 if __name__ == "__main__":
     print("--- 开始测试通义千问视觉模型接口 ---")
     
@@ -4,39 +4,46 @@
 """
 
 import os
+import asyncio
 from typing import Optional
 # 假设 llm_single_turn_interface.py 在 large_models_interfaces 目录下
 # 如果不在，请根据实际路径调整导入语句
-from .llm_single_turn_interface import QwenModelInterface
+from .llm_single_turn_interface import QwenModelInterface, AsyncQwenModelInterface
 import sys
+from utils.async_runner import run_sync  # 导入后台事件循环
 
 print(f"Python sys.stdin.encoding: {sys.stdin.encoding}")
 
-class QwenMultiTurnModelInterface(QwenModelInterface):
+DEFAULT_MULTI_TURN_SYSTEM_PROMPT = "你是一个大语言模型助手，注意，你应该生成纯文本段来描述，不要包含任何特殊符号！"
+
+
+class AsyncQwenMultiTurnModelInterface(AsyncQwenModelInterface):
     """
-    通义千问（Qwen）模型的多轮对话实现，继承自 QwenModelInterface。
+    通义千问（Qwen）模型多轮对话的异步实现，继承自 AsyncQwenModelInterface。
     该类维护一个内部的对话历史列表，以支持连续对话。
+    请求被取消时撤回本轮的用户消息，对话历史保持一问一答的结构。
     """
 
-    def __init__(self, model: str = "qwen-plus", initial_system_prompt: Optional[str] = None):
+    def __init__(self, model: str = "qwen-plus", initial_system_prompt: Optional[str] = None,
+                 messages: Optional[list] = None):
         """
-        初始化多轮对话模型客户端。
+        初始化多轮对话模型的异步客户端。
 
         Args:
             model (str): 要使用的具体模型名称，例如 "qwen-plus", "qwen-turbo" 等。
             initial_system_prompt (str, optional): 对话开始时设定的系统级指令。
                                                     如果为 None，则使用默认的通用助手提示。
+            messages (list, optional): 沿用已有的对话历史列表（直接共用，不复制），
+                                       例如同步接口的 messages；提供时忽略 initial_system_prompt. Defaults to None.
         """
         super().__init__(model=model)
-        self.messages = []
-        # 初始化对话历史，添加系统提示
-        if initial_system_prompt:
-            self.messages.append({"role": "system", "content": initial_system_prompt})
+        if messages is not None:
+            self.messages = messages
         else:
-            # 默认的系统提示，与单轮对话接口中的默认值保持一致
-            self.messages.append({"role": "system", "content": "你是一个大语言模型助手，注意，你应该生成纯文本段来描述，不要包含任何特殊符号！"})
+            self.messages = []
+            self.reset_conversation(initial_system_prompt, quiet=True)
 
-    def get_response(self, user_prompt: str) -> str:
+    async def get_response(self, user_prompt: str) -> str:
         """
         获取模型对多轮对话中单个用户输入的回复，并维护对话历史。
 
@@ -50,28 +57,28 @@ class QwenMultiTurnModelInterface(QwenModelInterface):
             return "用户输入不能为空。"
 
         # 将当前用户输入添加到对话历史中
-        
-        self.messages.append({"role": "user", "content": user_prompt})
-        #print("messages", self.messages)
-        # --- 添加以下调试打印 ---
-        #print(f"DEBUG: user_prompt (repr): {repr(user_prompt)}")
-        #print(f"DEBUG: messages (repr): {repr(self.messages)}")
-        # --- 调试打印结束 ---
-        
+        user_message = {"role": "user", "content": user_prompt}
+        self.messages.append(user_message)
+
         try:
             print("正在向通义千问模型发送请求 (多轮对话)...")
-            # 调用父类的客户端进行API请求，传入完整的对话历史
-            completion = self.client.chat.completions.create(
+            # 传入完整的对话历史
+            completion = await self.client.chat.completions.create(
                 model=self.model_name,
                 messages=self.messages, # 使用累积的对话历史列表
             )
             response_content = completion.choices[0].message.content
-            
+
             # 将模型的回复添加到对话历史中
             self.messages.append({"role": "assistant", "content": response_content.strip() if response_content else ""})
-            
+
             return response_content.strip() if response_content else ""
 
+        except asyncio.CancelledError:
+            # 被打断的提问没有回复，从历史中撤回，避免下一轮出现连续两条用户消息
+            if self.messages and self.messages[-1] is user_message:
+                self.messages.pop()
+            raise
         except Exception as e:
             error_message = f"调用API时出错: {e}"
             print(error_message)
@@ -79,18 +86,16 @@ class QwenMultiTurnModelInterface(QwenModelInterface):
             # 但这里为了简单，直接返回错误信息
             return error_message
 
-    def reset_conversation(self, new_system_prompt: Optional[str] = None):
+    def reset_conversation(self, new_system_prompt: Optional[str] = None, quiet: bool = False):
         """
         重置对话历史，可以选择设置新的系统提示。
         这对于开始一个全新的对话非常有用。
         """
-        self.messages = []
-        if new_system_prompt:
-            self.messages.append({"role": "system", "content": new_system_prompt})
-        else:
-            # 如果没有提供新的系统提示，则使用默认的通用助手提示
-            self.messages.append({"role": "system", "content": "你是一个大语言模型助手，注意，你应该生成纯文本段来描述，不要包含任何特殊符号！"})
-        print("对话历史已重置。")
+        # 如果没有提供新的系统提示，则使用默认的通用助手提示
+        # 原地修改列表，与其他接口共用的对话历史一起重置
+        self.messages[:] = [{"role": "system", "content": new_system_prompt or DEFAULT_MULTI_TURN_SYSTEM_PROMPT}]
+        if not quiet:
+            print("对话历史已重置。")
 
     def get_conversation_history(self) -> list:
         """
@@ -98,6 +103,60 @@ class QwenMultiTurnModelInterface(QwenModelInterface):
         """
         return self.messages
 
+
+class QwenMultiTurnModelInterface(QwenModelInterface):
+    """
+    通义千问（Qwen）模型的多轮对话实现，继承自 QwenModelInterface。
+    对话历史保存在内部的 AsyncQwenMultiTurnModelInterface（async_model）中，messages 与它共用同一个列表。
+    async_model 的异步客户端绑定在后台事件循环（utils.async_runner）上，只能经由同步接口使用，
+    不要在自己的事件循环中 await 它；需要在异步代码中继续同一段对话时，另建一个异步接口并共用对话历史：
+        AsyncQwenMultiTurnModelInterface(model, messages=sync_model.messages)
+    共用的只是对话历史列表，同一时刻只应有一方在提问。
+    """
+
+    def __init__(self, model: str = "qwen-plus", initial_system_prompt: Optional[str] = None):
+        """
+        初始化多轮对话模型客户端。
+
+        Args:
+            model (str): 要使用的具体模型名称，例如 "qwen-plus", "qwen-turbo" 等。
+            initial_system_prompt (str, optional): 对话开始时设定的系统级指令。
+                                                    如果为 None，则使用默认的通用助手提示。
+        """
+        super().__init__(model=model, async_model=AsyncQwenMultiTurnModelInterface(model, initial_system_prompt))
+
+    @property
+    def messages(self) -> list:
+        return self.async_model.messages
+
+    @messages.setter
+    def messages(self, value: list) -> None:
+        self.async_model.messages = value
+
+    def get_response(self, user_prompt: str) -> str:
+        """
+        获取模型对多轮对话中单个用户输入的回复，并维护对话历史。
+
+        Args:
+            user_prompt (str): 用户输入的内容。
+
+        Returns:
+            str: 模型生成的回复文本。
+        """
+        return run_sync(self.async_model.get_response(user_prompt))
+
+    def reset_conversation(self, new_system_prompt: Optional[str] = None):
+        """
+        重置对话历史，可以选择设置新的系统提示。
+        """
+        self.async_model.reset_conversation(new_system_prompt)
+
+    def get_conversation_history(self) -> list:
+        """
+        获取当前的完整对话历史列表。
+        """
+        return self.async_model.get_conversation_history()
+
 # -------------------- 测试多轮对话接口实现 --------------------
 if __name__ == "__main__":
     print("--- 开始测试通义千问多轮对话模型接口 ---")
@@ -4,9 +4,25 @@
 """
 
 import os
+import sys
 from abc import ABC, abstractmethod
-from openai import OpenAI
-from typing import Optional
+from openai import OpenAI, AsyncOpenAI
+from typing import Optional, AsyncIterator
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.async_runner import run_sync  # 导入后台事件循环（同步接口在其中运行异步接口）
+
+DASHSCOPE_COMPATIBLE_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+DEFAULT_SYSTEM_PROMPT = "你是一个大语言模型助手，注意，你应该生成纯文本段来描述, 不要生成任何特殊符号或者emoji"
+
+
+def get_api_key() -> str:
+    """从环境变量 ALI_APIKEY 中获取 API Key，这是一种更安全的做法"""
+    api_key = os.getenv("ALI_APIKEY")
+    if not api_key:
+        raise ValueError("环境变量 'ALI_APIKEY' 未设置，请先设置或直接在代码中提供。")
+    return api_key
+
 
 # -------------------- 步骤 1: 定义大模型服务的接口 (抽象基类) --------------------
 class LLMInterface(ABC):
@@ -30,53 +46,72 @@ class LLMInterface(ABC):
         pass
 
 
-# -------------------- 步骤 2: 实现接口，封装通义千问模型 --------------------
-class QwenModelInterface(LLMInterface):
+# -------------------- 步骤 2: 定义异步接口，可以用 asyncio.gather 组合并随时取消 --------------------
+class AsyncLLMInterface(ABC):
     """
-    通义千问（Qwen）模型的具体实现，它遵循 LLMInterface 接口。
+    LLMInterface 的异步版本。
+    """
+
+    @abstractmethod
+    async def get_response(self, user_prompt: str, system_prompt: Optional[str] = None) -> str:
+        """
+        获取模型对单个用户输入的回复。
+
+        Args:
+            user_prompt (str): 用户输入的内容。
+            system_prompt (str, optional): 给模型设定的系统级指令（角色扮演等）。如果为 None，则使用默认值。
+
+        Returns:
+            str: 模型生成的回复文本。
+        """
+        pass
+
+
+# -------------------- 步骤 3: 实现异步接口，封装通义千问模型 --------------------
+class AsyncQwenModelInterface(AsyncLLMInterface):
+    """
+    通义千问（Qwen）模型的异步实现，使用 AsyncOpenAI 客户端。
+    用法：
+        llm = AsyncQwenModelInterface()
+        answer, description = await asyncio.gather(llm.get_response("你好"), vision.describe_image(path))
+        async for delta in llm.stream_response("讲个故事"):
+            ...
+    任务被取消时请求随之中止，CancelledError 会照常抛出。
     """
 
     def __init__(self, model: str = "qwen-plus"):
         """
-        初始化通义千问模型客户端。
+        初始化通义千问模型的异步客户端。
 
         Args:
             model (str): 要使用的具体模型名称，例如 "qwen-plus", "qwen-turbo" 等。
         """
         self.model_name = model
         try:
-            # 优先从环境变量 ALI_APIKEY 中获取 API Key，这是一种更安全的做法
-            api_key = os.getenv("ALI_APIKEY")
-            if not api_key:
-                raise ValueError("环境变量 'ALI_APIKEY' 未设置，请先设置或直接在代码中提供。")
-            
-            self.client = OpenAI(
-                api_key=api_key,
-                base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-            )
+            self.client = AsyncOpenAI(api_key=get_api_key(), base_url=DASHSCOPE_COMPATIBLE_BASE_URL)
         except Exception as e:
-            print(f"初始化OpenAI客户端失败: {e}")
-            # 你也可以在这里处理，比如从配置文件读取 key
-            # self.client = OpenAI(api_key="sk-xxx", base_url=...)
+            print(f"初始化AsyncOpenAI客户端失败: {e}")
             raise
 
-    def get_response(self, user_prompt: str, system_prompt: Optional[str] = "你是一个大语言模型助手，注意，你应该生成纯文本段来描述, 不要生成任何特殊符号或者emoji") -> str:
+    @staticmethod
+    def _build_messages(user_prompt: str, system_prompt: Optional[str]) -> list:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+    async def get_response(self, user_prompt: str, system_prompt: Optional[str] = DEFAULT_SYSTEM_PROMPT) -> str:
         """
         实现接口定义的 get_response 方法。
         """
         if not user_prompt:
             return "用户输入不能为空。"
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-
         try:
             print("正在向通义千问模型发送请求...")
-            completion = self.client.chat.completions.create(
+            completion = await self.client.chat.completions.create(
                 model=self.model_name,
-                messages=messages,
+                messages=self._build_messages(user_prompt, system_prompt),
             )
             # 从返回结果中提取模型的回复内容
             # 根据OpenAI的格式，内容在 choices[0].message.content
@@ -84,13 +119,74 @@ class QwenModelInterface(LLMInterface):
             return response_content.strip()
 
         except Exception as e:
-            # 捕获并处理API调用中可能出现的任何错误
+            # 捕获并处理API调用中可能出现的任何错误（取消不属于 Exception，会继续向上抛出）
             error_message = f"调用API时出错: {e}"
             print(error_message)
             return error_message
 
+    async def stream_response(self, user_prompt: str,
+                              system_prompt: Optional[str] = DEFAULT_SYSTEM_PROMPT) -> AsyncIterator[str]:
+        """
+        流式获取回复，逐段产出新生成的文本，可以边生成边交给语音合成
+
+        Args:
+            user_prompt (str): 用户输入的内容。
+            system_prompt (str, optional): 给模型设定的系统级指令.
+
+        Yields:
+            str: 新生成的一段文本。
+        """
+        if not user_prompt:
+            yield "用户输入不能为空。"
+            return
+
+        print("正在向通义千问模型发送流式请求...")
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=self._build_messages(user_prompt, system_prompt),
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # 提前退出或被取消时关闭连接，不再接收剩余内容
+            await stream.close()
+
+
+# -------------------- 步骤 4: 同步接口，在后台事件循环中调用异步实现 --------------------
+class QwenModelInterface(LLMInterface):
+    """
+    通义千问（Qwen）模型的具体实现，它遵循 LLMInterface 接口。
+    请求由 AsyncQwenModelInterface 完成，这里只是在后台事件循环中等待它的结果。
+    """
+
+    def __init__(self, model: str = "qwen-plus", async_model: AsyncQwenModelInterface = None):
+        """
+        初始化通义千问模型客户端。
+
+        Args:
+            model (str): 要使用的具体模型名称，例如 "qwen-plus", "qwen-turbo" 等。
+            async_model (AsyncQwenModelInterface, optional): 实际发送请求的异步模型，默认按 model 新建.
+        """
+        self.model_name = model
+        self.async_model = async_model if async_model is not None else AsyncQwenModelInterface(model)
+        try:
+            # 同步客户端保留给需要直接调用 chat.completions 的代码（例如带工具调用的对话）
+            self.client = OpenAI(api_key=get_api_key(), base_url=DASHSCOPE_COMPATIBLE_BASE_URL)
+        except Exception as e:
+            print(f"初始化OpenAI客户端失败: {e}")
+            raise
+
+    def get_response(self, user_prompt: str, system_prompt: Optional[str] = DEFAULT_SYSTEM_PROMPT) -> str:
+        """
+        实现接口定义的 get_response 方法。
+        """
+        return run_sync(self.async_model.get_response(user_prompt, system_prompt))
+
 
-# -------------------- 步骤 3: 在主程序块中测试接口实现 --------------------
+# -------------------- 步骤 5: 在主程序块中测试接口实现 --------------------
 if __name__ == "__main__":
     print("--- 开始测试通义千问模型接口 ---")
     
@@ -4,21 +4,33 @@ MCP接口 V2.0
 """
 
 import os
+import sys
+import asyncio
 from http import HTTPStatus
 from dashscope import Application
 from abc import ABC, abstractmethod
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.async_runner import run_sync  # 导入后台事件循环（同步接口在其中运行异步接口）
+
 class MCPInterface(ABC):
     @abstractmethod
     def get_response(self, text) -> str:
         pass
 
-class MCPModel(MCPInterface):
+class AsyncMCPInterface(ABC):
+    @abstractmethod
+    async def get_response(self, text) -> str:
+        pass
+
+class AsyncMCPModel(AsyncMCPInterface):
     def __init__(self, app_id: str='', system_prompt: str='', memory: bool = True):
         '''
         app_id: (必选)阿里云MCP应用ID
         system_prompt: 系统提示语
         memory: 是否进行上下文多轮对话
+        dashscope 没有提供 Application 的异步客户端，调用在线程池中进行；
+        任务被取消时立即返回并撤回本轮的用户消息，已发出的请求在后台结束后丢弃结果
         '''
         self.API_KEY = os.environ.get("ALI_APIKEY")
         if self.API_KEY is None:
@@ -46,7 +58,7 @@ class MCPModel(MCPInterface):
                 self.message = []
     
     # 获取大模型回复
-    def get_response(self, text) -> str:
+    async def get_response(self, text) -> str:
         '''
         text: 用户输入的文本
         '''
@@ -54,11 +66,18 @@ class MCPModel(MCPInterface):
         if not self.memory:
             self.reset_message()
         
-        self.message.append({"role": "user", "content": text})
+        user_message = {"role": "user", "content": text}
+        self.message.append(user_message)
         
         print("正在调用大模型")
-        # 调用阿里云MCP接口
-        response = Application.call(app_id=self.APP_ID, api_key=self.API_KEY, messages=self.message)
+        # 调用阿里云MCP接口，传入消息列表的副本，取消后后台请求不会再读到被修改的历史
+        try:
+            response = await asyncio.to_thread(Application.call, app_id=self.APP_ID, api_key=self.API_KEY,
+                                               messages=list(self.message))
+        except asyncio.CancelledError:
+            if self.message and self.message[-1] is user_message:
+                self.message.pop()
+            raise
         print("调用大模型结束")
         
         if response.status_code == HTTPStatus.OK:
@@ -74,6 +93,36 @@ class MCPModel(MCPInterface):
             print("重置大模型对话信息")
             self.reset_message()
             return "调用大模型失败"
+
+class MCPModel(MCPInterface):
+    def __init__(self, app_id: str='', system_prompt: str='', memory: bool = True):
+        '''
+        app_id: (必选)阿里云MCP应用ID
+        system_prompt: 系统提示语
+        memory: 是否进行上下文多轮对话
+        请求由 AsyncMCPModel 完成，这里只是在后台事件循环中等待它的结果
+        '''
+        self.async_model = AsyncMCPModel(app_id=app_id, system_prompt=system_prompt, memory=memory)
+
+    # 对话历史与异步模型共用
+    @property
+    def message(self) -> list:
+        return self.async_model.message
+
+    @message.setter
+    def message(self, value: list) -> None:
+        self.async_model.message = value
+
+    # 重置消息
+    def reset_message(self) -> None:
+        self.async_model.reset_message()
+    
+    # 获取大模型回复
+    def get_response(self, text) -> str:
+        '''
+        text: 用户输入的文本
+        '''
+        return run_sync(self.async_model.get_response(text))
         
 if __name__ == '__main__':
     mcp_model = MCPModel(app_id='', system_prompt='', memory=True)
@@ -37,3 +37,38 @@ action_group_dict = {
     '39': 'cry',
     '40': 'dance'
 }
+
+#动作组的中文名称，用于本地语音指令（utils/command_spotter.py）直接识别动作名称，左为动作编号(Chinese action names used by local voice commands, keyed by action number)
+#同一名称对应多个动作时取编号较小的一个(when several actions share a name, the smaller number is used)
+action_chinese_name_dict = {
+    '0': '立正',
+    '1': '前进',
+    '2': '后退',
+    '3': '左移',
+    '4': '右移',
+    '5': '俯卧撑',
+    '6': '仰卧起坐',
+    '7': '左转',
+    '8': '右转',
+    '9': '挥手',
+    '10': '鞠躬',
+    '11': '下蹲',
+    '12': '庆祝',
+    '13': '左脚踢',
+    '14': '右脚踢',
+    '15': '咏春',
+    '16': '左勾拳',
+    '17': '右勾拳',
+    '18': '左侧踢',
+    '19': '右侧踢',
+    '20': '前跌倒起立',
+    '21': '后跌倒起立',
+    '22': '扭腰',
+    '24': '原地踏步',
+    '35': '举重',
+    '36': '剪刀',
+    '37': '石头',
+    '38': '布',
+    '39': '哭',
+    '40': '跳舞'
+}
@@ -13,7 +13,7 @@ import traceback
 # 添加utils的asr_vosk.py路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.asr_vosk import AsrVosk
+from utils.hotword_engine import create_hotword_engine
 # 替换hiwonder.TTS为大模型接口
 from large_models_interfaces.Text2Speech_interface import CosyVoiceModel
 import hiwonder.ros_robot_controller_sdk as rrc
@@ -69,7 +69,8 @@ class RobotController:
                     print("下载地址：https://alphacephei.com/vosk/models/vosk-model-small-cn-0.22.zip")
                     return False
                 
-                self.asr = AsrVosk(model_path, self.hotwords_dict)
+                # 引擎由环境变量 HOTWORD_ENGINE 选择；Vosk 模型由进程级注册表共享，每局游戏不会重复加载
+                self.asr = create_hotword_engine(self.hotwords_dict, model_path=model_path)
                 return True
             except Exception as e:
                 print(f"ASR初始化失败: {e}")
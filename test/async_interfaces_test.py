@@ -0,0 +1,50 @@
+"""
+异步接口 测试脚本 V2.0
+用 asyncio.gather 同时请求文本回复和图片描述，再把流式回复边生成边交给语音合成播报，
+播报超过3秒时取消任务，检查播报能否被干净地打断。
+用法: python async_interfaces_test.py [图片路径]
+"""
+
+import sys
+import os
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 1. 导入异步接口
+from large_models_interfaces.llm_single_turn_interface import AsyncQwenModelInterface
+from large_models_interfaces.image_describe_interface import AsyncQwenVLModelInterface
+from large_models_interfaces.Text2Speech_interface import AsyncCosyVoiceModel
+
+
+async def main(image_path):
+    # 2. 初始化接口
+    llm = AsyncQwenModelInterface(model="qwen-plus")
+    vision = AsyncQwenVLModelInterface(model="qwen-vl-max")
+    tts = AsyncCosyVoiceModel()
+
+    # 3. 并行请求：总耗时接近较慢的一个，而不是两者之和
+    start = time.monotonic()
+    requests = [llm.get_response("用一句话介绍你自己")]
+    if image_path:
+        requests.append(vision.describe_image(image_path))
+    results = await asyncio.gather(*requests)
+    print(f"\n[并行请求] 耗时 {time.monotonic() - start:.2f}s")
+    for result in results:
+        print(f"  {result}")
+
+    # 4. 流式回复直接交给语音合成，第一句生成后即开始播报
+    handle = await tts.speak_stream(llm.stream_response("讲一个简短的小故事"))
+    print(f"\n[流式播报] {handle.text}")
+
+    # 5. 取消：播报3秒后取消任务
+    task = asyncio.create_task(tts.speak_stream(llm.stream_response("讲一个很长的故事")))
+    await asyncio.sleep(3)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        print("\n[取消] 播报已被打断")
+
+
+asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else None))
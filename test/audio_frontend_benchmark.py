@@ -0,0 +1,86 @@
+"""
+音频前端 性能测试脚本 V2.0
+以合成的“人声 + 风扇噪声”信号测试 AudioFrontEnd，输出每秒音频消耗的CPU时间（及占单个CPU核心的比例），
+并给出各处理阶段开关组合下静音段噪声与人声段的电平，以及输出信噪比。
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audio_frontend import AudioFrontEnd
+
+CHUNK = 512  # 与 Speech2Text_interface 中的采集块大小一致
+SAMPLE_RATE = 16000
+SECONDS = 30
+
+
+def make_speech(seconds):
+    """带颤音和音节包络的谐波信号，近似浊音"""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    f0 = 150 + 30 * np.sin(2 * np.pi * 3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    harmonics = sum(np.sin(k * phase) / k for k in range(1, 15))
+    return 3000 * harmonics * (0.5 + 0.5 * np.sin(2 * np.pi * 2 * t) ** 2)
+
+
+def make_test_signal(seconds):
+    """每5秒一段：2秒静音 + 3秒人声；叠加宽带噪声、直流偏置和50Hz工频干扰"""
+    rng = np.random.default_rng(0)
+    blocks = []
+    for _ in range(int(seconds // 5)):
+        blocks.append(np.zeros(SAMPLE_RATE * 2))
+        blocks.append(make_speech(3))
+    clean = np.concatenate(blocks)
+    t = np.arange(len(clean)) / SAMPLE_RATE
+    noise = rng.normal(0, 800, len(clean)) + 500 + 600 * np.sin(2 * np.pi * 50 * t)
+    noisy = np.clip(clean + noise, -32768, 32767).astype(np.int16)
+    speech_mask = np.tile(np.concatenate([np.zeros(SAMPLE_RATE * 2, bool), np.ones(SAMPLE_RATE * 3, bool)]),
+                          int(seconds // 5))
+    return noisy, speech_mask
+
+
+def run(frontend, audio):
+    start = time.process_time()
+    out = np.concatenate([frontend.process(audio[i:i + CHUNK]) for i in range(0, len(audio), CHUNK)])
+    elapsed = time.process_time() - start
+    # 补偿前端固定的处理延迟，使输出与输入对齐
+    delay = frontend.frame_len - frontend.hop
+    out = np.concatenate([out[delay:], np.zeros(len(audio) - len(out) + delay, dtype=np.int16)])
+    return elapsed / (len(audio) / SAMPLE_RATE), out
+
+
+def levels(audio, speech_mask):
+    """跳过第一段（噪声谱和增益仍在收敛），并去掉段边界附近各0.25秒"""
+    x = audio.astype(np.float64)
+    edge = SAMPLE_RATE // 4
+    boundary = np.convolve(np.diff(speech_mask.astype(int), prepend=0) != 0, np.ones(2 * edge), mode="same") > 0
+    valid = ~boundary
+    valid[:SAMPLE_RATE * 5] = False
+    noise = np.std(x[valid & ~speech_mask])
+    speech = np.std(x[valid & speech_mask])
+    return noise, speech, 20 * np.log10(speech / noise)
+
+
+def main():
+    audio, speech_mask = make_test_signal(SECONDS)
+    noise, speech, snr = levels(audio, speech_mask)
+    print(f"输入: 噪声 {noise:7.0f} rms  人声段 {speech:7.0f} rms  信噪比 {snr:5.1f} dB")
+
+    configs = [
+        ("高通", dict(noise_suppression=False, agc=False)),
+        ("高通+降噪", dict(agc=False)),
+        ("高通+降噪+AGC", dict()),
+    ]
+    for name, kwargs in configs:
+        cpu, out = run(AudioFrontEnd(SAMPLE_RATE, **kwargs), audio)
+        noise, speech, snr = levels(out, speech_mask)
+        print(f"{name:<14} CPU {cpu * 1000:6.2f} ms/音频秒 ({cpu * 100:4.2f}% 单核)  "
+              f"噪声 {noise:7.0f} rms  人声段 {speech:7.0f} rms  信噪比 {snr:5.1f} dB")
+
+
+if __name__ == "__main__":
+    main()
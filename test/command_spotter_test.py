@@ -0,0 +1,85 @@
+"""
+本地动作指令 离线回放测试脚本 V2.0
+模拟"唤醒 → 提示音 → 说指令"：唤醒提示音（我在.wav）经过带延迟和混响的回声路径传到麦克风，
+并作为回声参考信号写入 EchoReference；提示音结束0.8秒后用户说出指令（好的.wav，测试时作为指令表中的唯一指令）。
+检查指令识别器不会因为提示音的回声提前结束，能在提示音之后识别出指令；
+作为对照，不提供回声消除器（不知道正在播放提示音）时的结果也一并打印。
+需要仓库中的 Vosk 模型文件。
+用法: python command_spotter_test.py
+"""
+
+import sys
+import os
+import numpy as np
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+# 添加到上级目录到系统路径中
+sys.path.append(parent_dir)
+sys.path.append(current_dir)
+
+from utils.audio_io import FileSource, load_audio_file
+from utils.resampler import StreamingResampler
+from utils.echo_canceller import EchoReference, EchoCanceller
+from utils.command_spotter import CommandSpotter
+from echo_cancel_test import make_echo_path
+
+MODEL_PATH = os.path.join(parent_dir, "models", "vosk-model-small-cn-0.22")
+PROMPT_WAV = os.path.join(parent_dir, "integrate_system", "我在.wav")
+COMMAND_WAV = os.path.join(parent_dir, "action_seq", "好的.wav")
+COMMANDS = {"好的": "1"}
+SAMPLE_RATE = 16000
+PROMPT_START_S = 0.3  # 唤醒后提示音开始播放的时刻
+COMMAND_GAP_S = 0.8  # 提示音结束到用户开口的间隔，长于指令识别器的结束静音时长（500ms）
+
+
+def load_16k(path):
+    samples, rate = load_audio_file(path)
+    return StreamingResampler(rate, SAMPLE_RATE).process(samples).astype(np.float64)
+
+
+def make_scene():
+    """返回 (回声参考信号, 麦克风信号int16, 指令开始的采样位置)"""
+    prompt = load_16k(PROMPT_WAV)
+    command = load_16k(COMMAND_WAV)
+    prompt_start = int(PROMPT_START_S * SAMPLE_RATE)
+    command_start = prompt_start + len(prompt) + int(COMMAND_GAP_S * SAMPLE_RATE)
+    total = command_start + len(command) + 4 * SAMPLE_RATE
+    far = np.zeros(total)
+    far[prompt_start:prompt_start + len(prompt)] = prompt
+    mic = np.convolve(far, make_echo_path())[:total]
+    mic[command_start:command_start + len(command)] += command
+    mic += np.random.default_rng(4).normal(0, 30, total)
+    return far[:prompt_start + len(prompt)], np.clip(mic, -32768, 32767).astype(np.int16), command_start
+
+
+def run_spotter(with_echo_canceller):
+    far, mic, command_start = make_scene()
+    source = FileSource(samples=mic, sample_rate=SAMPLE_RATE)
+    reference = EchoReference(source)
+    reference.write(far)  # 提示音从时间轴起点开始记录（前面补零）
+    canceller = EchoCanceller(reference) if with_echo_canceller else None
+    spotter = CommandSpotter(MODEL_PATH, commands=COMMANDS, audio_source=source, echo_canceller=canceller)
+    command = spotter.listen_for_command(start_position=0)
+    return command, source.position / SAMPLE_RATE, command_start / SAMPLE_RATE
+
+
+def main():
+    if not os.path.exists(os.path.join(MODEL_PATH, "am", "final.mdl")):
+        print(f"跳过：找不到 Vosk 模型文件 {MODEL_PATH}")
+        return 0
+
+    command, stopped_s, command_s = run_spotter(with_echo_canceller=False)
+    print(f"对照（不知道正在播放提示音）: 结果 {command}  在 {stopped_s:.2f}s 停止（指令从 {command_s:.2f}s 开始）")
+
+    command, stopped_s, command_s = run_spotter(with_echo_canceller=True)
+    print(f"提示音之后说指令: 结果 {command}  在 {stopped_s:.2f}s 停止（指令从 {command_s:.2f}s 开始）")
+    passed = command is not None and command.name == "好的"
+    print("全部通过" if passed else "存在失败项")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
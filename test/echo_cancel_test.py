@@ -0,0 +1,192 @@
+"""
+回声消除 离线测试脚本 V2.0
+用合成的“机器人播放的语音”和“用户的语音”模拟麦克风信号：播放信号经过带延迟和混响的回声路径传到麦克风，
+中间一段用户同时说话（双讲）。播放信号通过 ReferenceSink 以TTS的22050Hz写入，检查回声消除器的
+回声抑制量（ERLE）、双讲期间用户语音是否被保留，以及没有播放时是否原样透传；
+另外检查只在短提示音期间工作的第二个消费者（fork）能否沿用第一个消费者已收敛的滤波器。
+用法: python echo_cancel_test.py
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audio_io import FileSource, NullSink
+from utils.resampler import StreamingResampler
+from utils.echo_canceller import EchoReference, ReferenceSink, EchoCanceller
+
+SAMPLE_RATE = 16000
+TTS_SAMPLE_RATE = 22050
+CHUNK = 512
+SECONDS = 8
+NEAR_START, NEAR_END = 5, 7  # 用户说话（双讲）的时间段，单位秒
+
+
+def make_speech(seconds, f0=150.0, seed=0):
+    """带颤音、音节包络和少量气声的谐波信号，近似语音"""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    pitch = f0 + 30 * np.sin(2 * np.pi * 3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    envelope = 0.3 + 0.7 * np.abs(np.sin(2 * np.pi * 2.3 * t))
+    harmonics = sum(np.sin(k * phase + k) / k for k in range(1, 25))
+    breath = np.random.default_rng(seed).normal(0, 300, len(t))
+    return 3000 * harmonics * envelope + breath
+
+
+def make_echo_path(delay_ms=20, length_ms=80, decay_ms=15, gain=0.8):
+    """纯延迟 + 指数衰减混响的回声路径"""
+    rng = np.random.default_rng(3)
+    delay = SAMPLE_RATE * delay_ms // 1000
+    tail = np.arange(SAMPLE_RATE * (length_ms - delay_ms) // 1000)
+    rir = np.zeros(SAMPLE_RATE * length_ms // 1000)
+    rir[delay:] = rng.normal(0, 1, len(tail)) * np.exp(-tail / (SAMPLE_RATE * decay_ms / 1000))
+    return rir * gain / np.sqrt(np.sum(rir ** 2))
+
+
+def make_scene():
+    """返回 (播放信号16kHz, 用户语音, 麦克风信号int16)"""
+    far = make_speech(SECONDS, 120, seed=1)
+    echo = np.convolve(far, make_echo_path())[:len(far)]
+    near = np.zeros_like(far)
+    near[SAMPLE_RATE * NEAR_START:SAMPLE_RATE * NEAR_END] = make_speech(NEAR_END - NEAR_START, 220, seed=2)
+    noise = np.random.default_rng(4).normal(0, 30, len(far))
+    mic = np.clip(echo + near + noise, -32768, 32767).astype(np.int16)
+    return far, near, mic
+
+
+def play_through_sink(reference, far):
+    """像 TTS 回调一样，以22050Hz分块写入 ReferenceSink"""
+    to_tts_rate = StreamingResampler(SAMPLE_RATE, TTS_SAMPLE_RATE)
+    sink = ReferenceSink(NullSink(), reference)
+    sink.open(TTS_SAMPLE_RATE)
+    tts_audio = to_tts_rate.process(np.clip(far, -32768, 32767).astype(np.int16))
+    for i in range(0, len(tts_audio), 2048):
+        sink.write(tts_audio[i:i + 2048].tobytes())
+    sink.close()
+
+
+def run_canceller(mic, far=None):
+    """mic 通过 FileSource 回放，far 不为 None 时在回放开始前作为播放参考写入"""
+    source = FileSource(samples=mic, sample_rate=SAMPLE_RATE)
+    reference = EchoReference(source)
+    if far is not None:
+        play_through_sink(reference, far)
+    canceller = EchoCanceller(reference)
+    reader = source.open_reader()
+    canceller.reset(reader.position)
+
+    start = time.process_time()
+    out = []
+    while True:
+        data = reader.read(CHUNK)
+        if data is None:
+            break
+        out.append(canceller.process(data))
+    cpu = time.process_time() - start
+    out = np.concatenate(out)[:len(mic)].astype(np.float64)
+    return np.concatenate([out, np.zeros(len(mic) - len(out))]), cpu / SECONDS, canceller
+
+
+def erle_db(mic, out, start_s, end_s):
+    part = slice(int(start_s * SAMPLE_RATE), int(end_s * SAMPLE_RATE))
+    return 10 * np.log10(np.var(mic[part].astype(np.float64)) / np.var(out[part]))
+
+
+def test_echo_only_erle():
+    far, near, mic = make_scene()
+    out, cpu, canceller = run_canceller(mic, far)
+    converged = erle_db(mic, out, 3, NEAR_START)
+    print(f"只有回声: 第1秒 ERLE {erle_db(mic, out, 0, 1):5.1f} dB  收敛后 ERLE {converged:5.1f} dB  "
+          f"CPU {cpu * 1000:.1f} ms/音频秒")
+    assert converged > 12, f"回声抑制量不足: {converged:.1f} dB"
+
+
+def test_double_talk_keeps_near_end():
+    far, near, mic = make_scene()
+    out, _, _ = run_canceller(mic, far)
+    part = slice(SAMPLE_RATE * NEAR_START, SAMPLE_RATE * NEAR_END)
+    echo_before = np.std(mic[part] - near[part])
+    residual = np.std(out[part] - near[part])
+    after = erle_db(mic, out, NEAR_END, SECONDS)
+    print(f"双讲: 用户语音 {np.std(near[part]):.0f} rms  回声 {echo_before:.0f} rms -> 残留 {residual:.0f} rms  "
+          f"双讲结束后 ERLE {after:5.1f} dB")
+    assert residual < 0.5 * echo_before, "双讲期间回声没有被消除"
+    assert after > 12, "双讲后滤波器发散"
+
+
+def test_passthrough_without_playback():
+    _, _, mic = make_scene()
+    out, cpu, _ = run_canceller(mic)
+    n = len(mic) // 256 * 256
+    print(f"无播放: 输出与输入{'一致' if np.array_equal(out[:n], mic[:n]) else '不一致'}  CPU {cpu * 1000:.2f} ms/音频秒")
+    assert np.array_equal(out[:n], mic[:n])
+
+
+def test_reference_alignment():
+    """播放开始时参考信号对齐到当前采集位置，相邻的写入首尾相接，中间的空白为静音"""
+    source = FileSource(samples=np.zeros(SAMPLE_RATE * 4, dtype=np.int16), sample_rate=SAMPLE_RATE)
+    reference = EchoReference(source)
+    reader = source.open_reader()
+    reader.read(SAMPLE_RATE)  # 采集推进到1秒
+    first = reference.write(np.ones(1000, dtype=np.int16))
+    second = reference.write(np.full(1000, 2, dtype=np.int16))
+    reader.read(SAMPLE_RATE * 2)  # 采集推进到3秒，之前的播放早已结束
+    third = reference.write(np.full(1000, 3, dtype=np.int16))
+    print(f"参考信号位置: {first} {second} {third}")
+    assert (first, second, third) == (SAMPLE_RATE, SAMPLE_RATE + 1000, SAMPLE_RATE * 3)
+    assert not reference.read(SAMPLE_RATE + 2000, SAMPLE_RATE * 3 - SAMPLE_RATE - 2000).any()
+    assert (reference.read(SAMPLE_RATE * 3 - 10, 20)[10:] == 3).all()
+
+
+def test_fork_suppresses_short_prompt():
+    """热词检测在长回复期间收敛，之后的0.5秒提示音由识别端的 fork 从第一块起消除"""
+    reply = make_speech(6, 120, seed=1)
+    prompt = make_speech(0.5, 140, seed=5)
+    prompt_start = 7
+    far = np.zeros(SAMPLE_RATE * 8)
+    far[:len(reply)] = reply
+    far[SAMPLE_RATE * prompt_start:SAMPLE_RATE * prompt_start + len(prompt)] = prompt
+    echo = np.convolve(far, make_echo_path())[:len(far)]
+    mic = np.clip(echo + np.random.default_rng(4).normal(0, 30, len(far)), -32768, 32767).astype(np.int16)
+    source = FileSource(samples=mic, sample_rate=SAMPLE_RATE)
+    reference = EchoReference(source)
+    play_through_sink(reference, far)
+
+    def run(canceller, start_s, end_s):
+        reader = source.open_reader()
+        reader.seek(int(start_s * SAMPLE_RATE))
+        canceller.reset(reader.position)
+        out = []
+        for _ in range(int((end_s - start_s) * SAMPLE_RATE) // CHUNK):
+            out.append(canceller.process(reader.read(CHUNK)))
+        source.close_reader(reader)
+        return np.concatenate(out).astype(np.float64)
+
+    hotword = EchoCanceller(reference)
+    run(hotword, 0, 6)  # 播报回复期间
+    part = slice(SAMPLE_RATE * prompt_start, SAMPLE_RATE * prompt_start + len(prompt))
+    results = {}
+    for name, canceller in (("独立", EchoCanceller(reference)), ("fork", hotword.fork())):
+        out = run(canceller, prompt_start, prompt_start + 1)[:len(prompt)]
+        results[name] = 10 * np.log10(np.var(mic[part].astype(np.float64)) / np.var(out))
+    print(f"短提示音: 独立消费者 ERLE {results['独立']:5.1f} dB  fork ERLE {results['fork']:5.1f} dB")
+    assert results["fork"] > 12, f"fork 没有沿用已收敛的滤波器: {results['fork']:.1f} dB"
+    assert results["fork"] > results["独立"] + 3
+
+
+if __name__ == "__main__":
+    tests = [test_echo_only_erle, test_double_talk_keeps_near_end,
+             test_passthrough_without_playback, test_reference_alignment,
+             test_fork_suppresses_short_prompt]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    print("全部通过" if failed == 0 else f"{failed} 项失败")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,154 @@
+"""
+热词检测 基准测试脚本 V2.0
+把带标注的录音语料以不限速回放的方式送入 AsrVosk，多进程并行处理各个文件，输出：
+检测延迟分位数、每小时误唤醒次数(FA/h)、漏唤醒率(FR)以及每小时音频消耗的CPU秒数，
+便于对匹配器、解码参数的修改做数值对比。
+语料目录下每个子目录一类：子目录名为热词（如 小新小新/）的录音是该热词的正样本，
+其他子目录（如 negative/、noise/）为负样本或背景噪声，其中任何检测都算误唤醒。
+可选的 labels.json 给出正样本中热词说完的时刻 {"小新小新/001.wav": 1.52, ...}（秒），
+有标注时按标注计算延迟，否则使用识别器词时间戳估计的 WakeLatency。
+用法: python hotword_benchmark.py 语料目录 [--jobs 4] [--fuzzy] [--gate] [--hop-ms 64] [--partial-ms 128]
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import multiprocessing
+
+import numpy as np
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+# 添加到上级目录到系统路径中
+sys.path.append(parent_dir)
+
+from utils.audio_io import FileSource
+from utils.asr_vosk import AsrVosk
+from utils.vosk_registry import get_vosk_registry
+
+MODEL_PATH = os.path.join(parent_dir, "models", "vosk-model-small-cn-0.22")
+HOTWORDS = ["小新小新", "再见"]
+
+_options = None  # 工作进程内的测试参数
+
+
+def load_corpus(corpus_dir, hotwords):
+    """返回 [(录音路径, 类别, 期望的热词或None, 标注的热词结束时刻或None)]"""
+    labels = {}
+    labels_path = os.path.join(corpus_dir, "labels.json")
+    if os.path.exists(labels_path):
+        with open(labels_path, encoding="utf-8") as f:
+            labels = json.load(f)
+    samples = []
+    for category in sorted(os.listdir(corpus_dir)):
+        folder = os.path.join(corpus_dir, category)
+        if not os.path.isdir(folder):
+            continue
+        expected = category if category in hotwords else None
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(".wav"):
+                samples.append((os.path.join(folder, name), category, expected, labels.get(f"{category}/{name}")))
+    return samples
+
+
+def init_worker(options):
+    """工作进程初始化：每个进程加载一次模型，并屏蔽识别过程中的输出"""
+    global _options
+    _options = options
+    from vosk import SetLogLevel
+    SetLogLevel(-1)
+    sys.stdout = open(os.devnull, "w")
+    get_vosk_registry().warm_up(options["model"])
+
+
+def run_file(sample):
+    """
+    回放一个录音直到结束，记录其中所有的热词检测
+    Returns:
+        dict: 类别、期望热词、音频时长、CPU秒数，以及 [(热词, 检测位置秒, 延迟毫秒或None)]
+    """
+    wav, category, expected, keyword_end = sample
+    source = FileSource(wav, tail_silence_ms=1500)
+    asr = AsrVosk(_options["model"], {word: i + 1 for i, word in enumerate(_options["hotwords"])},
+                  audio_source=source, use_grammar=_options["grammar"], fuzzy=_options["fuzzy"],
+                  hop_ms=_options["hop_ms"], partial_interval_ms=_options["partial_ms"], gate=_options["gate"])
+    detections = []
+    start = time.process_time()
+    # 每次检测到热词后，从回放停下的位置继续监听，直到文件读完
+    while asr.listen_for_hotword() is not None:
+        detected_at = asr.detection_position / source.sample_rate
+        if keyword_end is not None:
+            latency = (detected_at - keyword_end) * 1000
+        else:
+            latency = asr.last_latency.total_ms if asr.last_latency is not None else None
+        detections.append((asr.last_match.name, detected_at, latency))
+    cpu = time.process_time() - start
+    return {"category": category, "expected": expected, "duration": source.duration, "cpu": cpu,
+            "detections": detections}
+
+
+def summarize(results):
+    positives = [r for r in results if r["expected"] is not None]
+    hours = sum(r["duration"] for r in results) / 3600
+    cpu = sum(r["cpu"] for r in results)
+    false_rejects = 0
+    false_accepts = 0
+    latencies = []
+    for r in results:
+        hits = [d for d in r["detections"] if d[0] == r["expected"]]
+        false_accepts += len(r["detections"]) - len(hits)
+        if r["expected"] is None:
+            continue
+        if hits:
+            # 正样本中只取第一次检测计算延迟，重复检测算作误唤醒
+            false_accepts += len(hits) - 1
+            if hits[0][2] is not None:
+                latencies.append(hits[0][2])
+        else:
+            false_rejects += 1
+
+    print(f"文件 {len(results)} 个（正样本 {len(positives)} 个），音频共 {hours * 60:.1f} 分钟")
+    print(f"漏唤醒: {false_rejects}/{len(positives)} ({false_rejects / max(len(positives), 1):.1%})")
+    print(f"误唤醒: {false_accepts} 次，{false_accepts / max(hours, 1e-9):.2f} 次/小时")
+    for category in sorted({r["category"] for r in results if r["expected"] is None}):
+        group = [r for r in results if r["category"] == category]
+        count = sum(len(r["detections"]) for r in group)
+        group_hours = sum(r["duration"] for r in group) / 3600
+        print(f"  {category}: {count} 次，{count / max(group_hours, 1e-9):.2f} 次/小时")
+    if latencies:
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        print(f"检测延迟: P50 {p50:.0f}ms  P90 {p90:.0f}ms  P99 {p99:.0f}ms  最大 {max(latencies):.0f}ms")
+    print(f"CPU: {cpu / max(hours, 1e-9):.0f} 秒/音频小时（实时率 {cpu / max(hours * 3600, 1e-9):.3f}）")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", help="语料目录，子目录名为热词或负样本类别")
+    parser.add_argument("--hotwords", nargs="+", default=HOTWORDS, help="检测的热词")
+    parser.add_argument("--model", default=MODEL_PATH, help="Vosk 模型路径")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="并行进程数")
+    parser.add_argument("--grammar", action="store_true", help="使用语法约束解码")
+    parser.add_argument("--fuzzy", action="store_true", help="使用模糊匹配")
+    parser.add_argument("--hop-ms", type=int, default=256, help="每次送入识别器的音频时长")
+    parser.add_argument("--partial-ms", type=int, default=None, help="计算中间结果的最小间隔")
+    parser.add_argument("--gate", action="store_true", help="启用语音门控，只在有人声时解码")
+    args = parser.parse_args()
+
+    samples = load_corpus(args.corpus, args.hotwords)
+    options = {"model": args.model, "hotwords": args.hotwords, "grammar": args.grammar, "fuzzy": args.fuzzy,
+               "hop_ms": args.hop_ms, "partial_ms": args.partial_ms, "gate": args.gate}
+    start = time.monotonic()
+    with multiprocessing.Pool(args.jobs, initializer=init_worker, initargs=(options,)) as pool:
+        results = pool.map(run_file, samples, chunksize=1)
+    elapsed = time.monotonic() - start
+    summarize(results)
+    audio_seconds = sum(r["duration"] for r in results)
+    print(f"耗时 {elapsed:.1f}s，{audio_seconds / max(elapsed, 1e-9):.1f} 倍实时（{args.jobs} 个进程）")
+
+
+if __name__ == "__main__":
+    main()
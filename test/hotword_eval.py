@@ -0,0 +1,81 @@
+"""
+热词检测 评估脚本 V2.0
+在录好的语料上对比精确匹配与模糊匹配（可指定多个阈值）的误唤醒率(FA)和漏唤醒率(FR)。
+语料目录下每个子目录一类：子目录名为热词（如 小新小新/）的录音应当检测到该热词，
+其他子目录（如 negative/、噪声/）的录音都不应检测到任何热词。
+用法: python hotword_eval.py 语料目录 [--thresholds 0.7 0.8 0.9] [--model 模型路径]
+"""
+
+import sys
+import os
+import argparse
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+# 添加到上级目录到系统路径中
+sys.path.append(parent_dir)
+
+from utils.audio_io import FileSource
+from utils.asr_vosk import AsrVosk
+
+MODEL_PATH = os.path.join(parent_dir, "models", "vosk-model-small-cn-0.22")
+HOTWORDS = {"小新小新": 1, "再见": 2}
+
+
+def load_corpus(corpus_dir):
+    """返回 [(录音路径, 期望的热词或None)]"""
+    samples = []
+    for label in sorted(os.listdir(corpus_dir)):
+        folder = os.path.join(corpus_dir, label)
+        if not os.path.isdir(folder):
+            continue
+        expected = label if label in HOTWORDS else None
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(".wav"):
+                samples.append((os.path.join(folder, name), expected))
+    return samples
+
+
+def detect(model_path, wav, fuzzy, threshold):
+    """回放一个录音，返回检测到的热词（没有检测到时为None）"""
+    thresholds = {word: threshold for word in HOTWORDS} if fuzzy else None
+    asr = AsrVosk(model_path, HOTWORDS, audio_source=FileSource(wav, tail_silence_ms=1500),
+                  fuzzy=fuzzy, hotword_thresholds=thresholds)
+    signal = asr.listen_for_hotword()
+    return asr.last_match.name if signal is not None else None
+
+
+def evaluate(model_path, samples, fuzzy, threshold=None):
+    """返回 (误唤醒数, 负样本数, 漏唤醒数, 正样本数)"""
+    false_accepts = negatives = false_rejects = positives = 0
+    for wav, expected in samples:
+        detected = detect(model_path, wav, fuzzy, threshold)
+        if expected is None:
+            negatives += 1
+            false_accepts += detected is not None
+        else:
+            positives += 1
+            false_rejects += detected != expected
+    return false_accepts, negatives, false_rejects, positives
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", help="语料目录，子目录名为热词或负样本类别")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8], help="模糊匹配的得分阈值")
+    parser.add_argument("--model", default=MODEL_PATH, help="Vosk 模型路径")
+    args = parser.parse_args()
+
+    samples = load_corpus(args.corpus)
+    print(f"正样本 {sum(e is not None for _, e in samples)} 个，负样本 {sum(e is None for _, e in samples)} 个")
+    configs = [("精确匹配", False, None)] + [(f"模糊匹配 阈值{t:.2f}", True, t) for t in args.thresholds]
+    for name, fuzzy, threshold in configs:
+        fa, negatives, fr, positives = evaluate(args.model, samples, fuzzy, threshold)
+        print(f"{name}: FA {fa}/{negatives} ({fa / max(negatives, 1):.1%})  "
+              f"FR {fr}/{positives} ({fr / max(positives, 1):.1%})")
+
+
+if __name__ == "__main__":
+    main()
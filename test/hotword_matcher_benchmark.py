@@ -0,0 +1,114 @@
+"""
+热词匹配 性能测试脚本 V2.0
+对比原先每个热词一个指针、每块音频都从头扫描整句拼音的匹配方式，与 HotwordMatcher（拼音 Aho-Corasick 自动机，
+只处理新增音节），分别在 5、50、500 个热词下输出每块音频的平均匹配耗时，并检查两者的检测结果。
+拼音转换的耗时不计入，只比较匹配本身。
+"""
+
+import sys
+import os
+import time
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypinyin import lazy_pinyin
+from utils.hotword_matcher import HotwordMatcher
+
+UTTERANCES = 200  # 模拟的句子数
+SYLLABLES_PER_UTTERANCE = 15  # 与 AsrVosk 中超过15个音节即重置一致
+CHARS = "小新再见猜拳来不玩了你好今天天气怎么样帮我看一下前面有什么向左右转走停跳舞唱歌开灯关门打招呼鞠躬坐下站起"
+
+
+class HotwordSequence:
+    """原实现：每个热词一个指针，每次传入整句拼音流从头推进"""
+
+    def __init__(self, name, pinyin_seq, signal):
+        self.name = name
+        self.pinyin_seq = pinyin_seq
+        self.signal = signal
+        self.pointer = 0
+
+    def reset(self):
+        self.pointer = 0
+
+    def match(self, pinyin_stream):
+        for p in pinyin_stream:
+            if p == ' ':
+                continue
+            elif p == self.pinyin_seq[self.pointer]:
+                self.pointer += 1
+                if self.pointer == len(self.pinyin_seq):
+                    self.reset()
+                    return True
+            else:
+                self.reset()
+                if p == self.pinyin_seq[0]:
+                    self.pointer = 1
+        return False
+
+
+def make_hotwords(count, rng):
+    hotwords = {"小新小新": 1, "再见": 2}
+    while len(hotwords) < count:
+        word = "".join(rng.choice(CHARS) for _ in range(rng.randint(2, 4)))
+        hotwords.setdefault(word, len(hotwords) + 1)
+    return hotwords
+
+
+def make_partials(rng):
+    """模拟 Vosk 中间结果：每块音频在上一次的结果后多识别出一个字，偶尔会改写最后一个字"""
+    utterances = []
+    for _ in range(UTTERANCES):
+        text = ""
+        partials = []
+        for _ in range(SYLLABLES_PER_UTTERANCE):
+            if text and rng.random() < 0.1:
+                text = text[:-1] + rng.choice(CHARS)
+            text += rng.choice(CHARS)
+            partials.append(lazy_pinyin(text))
+        utterances.append(partials)
+    return utterances
+
+
+def run_sequences(hotwords, utterances):
+    sequences = [HotwordSequence(word, lazy_pinyin(word), signal) for word, signal in hotwords.items()]
+    detections = 0
+    start = time.perf_counter()
+    for partials in utterances:
+        for seq in sequences:
+            seq.reset()
+        for pinyin_stream in partials:
+            for seq in sequences:
+                if seq.match(pinyin_stream):
+                    detections += 1
+    return time.perf_counter() - start, detections
+
+
+def run_matcher(hotwords, utterances):
+    matcher = HotwordMatcher(hotwords)
+    detections = 0
+    start = time.perf_counter()
+    for partials in utterances:
+        matcher.reset()
+        for pinyin_stream in partials:
+            detections += len(matcher.update(pinyin_stream))
+    return time.perf_counter() - start, detections
+
+
+def main():
+    rng = random.Random(0)
+    utterances = make_partials(rng)
+    chunks = UTTERANCES * SYLLABLES_PER_UTTERANCE
+    for count in (5, 50, 500):
+        hotwords = make_hotwords(count, rng)
+        seq_time, seq_detections = run_sequences(hotwords, utterances)
+        ac_time, ac_detections = run_matcher(hotwords, utterances)
+        print(f"{count:4d} 个热词: 原实现 {seq_time / chunks * 1e6:8.1f} us/块 (检测 {seq_detections} 次)  "
+              f"Aho-Corasick {ac_time / chunks * 1e6:6.1f} us/块 (检测 {ac_detections} 次)  "
+              f"加速 {seq_time / ac_time:5.1f} 倍")
+    print("注：原实现在中间结果重复出现时会重复检测、且无法检测相互重叠的热词，两者检测次数不完全一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+增量拼音转换 性能测试脚本 V2.0
+模拟有人在机器人旁边一直说话：中间结果每块音频多出一个词，对比每块都对整句调用 lazy_pinyin
+与 IncrementalPinyin 的耗时随句子长度的变化，并检查两者输出一致；
+另用夹杂字母、数字和标点的中间结果检查按词转换的结果，以及其中汉字的拼音仍与整句 lazy_pinyin 一致。
+"""
+
+import sys
+import os
+import time
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypinyin import lazy_pinyin
+from utils.incremental_pinyin import IncrementalPinyin
+
+WORDS = ["你好", "今天", "天气", "怎么样", "帮", "我", "看", "一下", "前面", "有", "什么", "银行",
+         "行走", "重庆", "小新", "再见", "猜拳", "不", "玩", "了", "向左", "转", "音乐", "快乐"]
+MIXED_WORDS = WORDS + ["a", "ok", "TonyPi", "3", "2.5", "，", "？", "a1", "小新a", "好的!"]
+MAX_WORDS = 200
+
+
+def make_partials(rng, vocabulary=WORDS):
+    """逐词增长的中间结果，偶尔改写最后一个词"""
+    words = []
+    partials = []
+    for _ in range(MAX_WORDS):
+        if words and rng.random() < 0.1:
+            words[-1] = rng.choice(vocabulary)
+        words.append(rng.choice(vocabulary))
+        partials.append(" ".join(words))
+    return partials
+
+
+def per_word_pinyin(text):
+    """IncrementalPinyin 的定义：逐词 lazy_pinyin，词之间以 ' ' 分隔"""
+    stream = []
+    for word in text.split(" "):
+        syllables = lazy_pinyin(word) if word else []
+        if syllables:
+            if stream:
+                stream.append(" ")
+            stream.extend(syllables)
+    return stream
+
+
+def check_mixed_script(rng):
+    """夹杂非汉字时与整句 lazy_pinyin 的分组不同，但按词转换的结果一致，汉字的拼音也一致"""
+    partials = make_partials(rng, MIXED_WORDS)
+    converter = IncrementalPinyin()
+    mismatches = sum(converter.update(text) != per_word_pinyin(text) for text in partials)
+    han_mismatches = sum(lazy_pinyin(text, errors="ignore")
+                         != [p for word in text.split(" ") for p in lazy_pinyin(word, errors="ignore")]
+                         for text in partials)
+    grouped = sum(per_word_pinyin(text) != lazy_pinyin(text) for text in partials)
+    print(f"夹杂非汉字: {len(partials)} 个中间结果，与逐词转换不一致 {mismatches} 个，"
+          f"汉字拼音与整句不一致 {han_mismatches} 个（非汉字分组与整句 lazy_pinyin 不同的 {grouped} 个）")
+
+
+def timed(func, partials):
+    """返回每块的耗时（微秒）列表"""
+    costs = []
+    for text in partials:
+        start = time.perf_counter()
+        func(text)
+        costs.append((time.perf_counter() - start) * 1e6)
+    return costs
+
+
+def main():
+    partials = make_partials(random.Random(0))
+    converter = IncrementalPinyin()
+    mismatches = sum(converter.update(text) != lazy_pinyin(text) for text in partials)
+    print(f"输出一致性检查: {len(partials)} 个中间结果，不一致 {mismatches} 个")
+    check_mixed_script(random.Random(1))
+
+    lazy_pinyin(partials[-1])  # 预热 pypinyin 词典
+    full = timed(lazy_pinyin, partials)
+    converter = IncrementalPinyin()
+    incremental = timed(converter.update, partials)
+    for words in (10, 50, 100, 200):
+        window = slice(max(0, words - 10), words)
+        avg = lambda costs: sum(costs[window]) / len(costs[window])
+        print(f"句长约 {words:3d} 词: 整句 lazy_pinyin {avg(full):7.1f} us/块  增量转换 {avg(incremental):6.1f} us/块")
+    print(f"累计: 整句 {sum(full) / 1000:.1f} ms  增量 {sum(incremental) / 1000:.1f} ms  "
+          f"（增量实际转换 {converter.converted_words} 个词）")
+
+
+if __name__ == "__main__":
+    main()
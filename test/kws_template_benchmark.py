@@ -0,0 +1,78 @@
+"""
+模板匹配热词检测 性能测试脚本 V2.0
+把同一批录音分别回放给 AsrVosk 和 TemplateKeywordSpotter，输出每秒音频消耗的CPU时间、
+检测到的热词以及检测位置（录音中的秒数）。提供 --hotword-end 时同时输出检测延迟（检测位置 - 热词结束时刻）。
+模板需先用 python utils/kws_template.py enroll 小新小新 录制。
+用法: python kws_template_benchmark.py 录音1.wav [录音2.wav ...] [--hotword-end 秒]
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+# 添加到上级目录到系统路径中
+sys.path.append(parent_dir)
+
+from utils.audio_io import FileSource
+from utils.hotword_engine import create_hotword_engine, HOTWORD_ENGINES
+from utils.kws_template import TEMPLATE_DIR
+
+MODEL_PATH = os.path.join(parent_dir, "models", "vosk-model-small-cn-0.22")
+HOTWORDS = {"小新小新": 1}
+
+
+def run(wav, engine, args):
+    """回放一个文件，返回 (信号, 检测位置秒, CPU秒/音频秒)"""
+    source = FileSource(wav, tail_silence_ms=1500)
+    detector = create_hotword_engine(HOTWORDS, engine=engine, model_path=args.model, template_dir=args.templates,
+                                     audio_source=source, hop_ms=args.hop_ms)
+    start = time.process_time()
+    signal = detector.listen_for_hotword()
+    cpu = time.process_time() - start
+    # 检测到热词时回放立即停止，CPU时间按实际处理的音频时长归一化
+    processed = source.position / source.sample_rate
+    detected_at = detector.detection_position / source.sample_rate if signal is not None else None
+    return signal, detected_at, cpu / max(processed, 1e-6)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("wavs", nargs="+", help="包含热词的录音文件")
+    parser.add_argument("--hotword-end", type=float, default=None, help="录音中热词说完的时刻（秒），用于计算检测延迟")
+    parser.add_argument("--model", default=MODEL_PATH, help="Vosk 模型路径")
+    parser.add_argument("--templates", default=TEMPLATE_DIR, help="模板目录")
+    parser.add_argument("--hop-ms", type=int, default=64, help="每次读取的音频时长")
+    parser.add_argument("--engines", nargs="+", default=list(HOTWORD_ENGINES), choices=HOTWORD_ENGINES,
+                        help="参与对比的引擎")
+    args = parser.parse_args()
+
+    totals = {engine: [] for engine in args.engines}
+    latencies = {engine: [] for engine in args.engines}
+    for wav in args.wavs:
+        print(f"录音: {wav}")
+        for engine in args.engines:
+            signal, detected_at, cpu = run(wav, engine, args)
+            totals[engine].append(cpu)
+            line = f"  {engine:8s}: CPU {cpu * 1000:6.1f} ms/音频秒  信号 {signal}"
+            if detected_at is not None:
+                line += f"  检测位置 {detected_at:.2f}s"
+                if args.hotword_end is not None:
+                    latencies[engine].append((detected_at - args.hotword_end) * 1000)
+                    line += f"  延迟 {latencies[engine][-1]:.0f}ms"
+            print(line)
+
+    for engine in args.engines:
+        line = f"平均 {engine:8s}: CPU {sum(totals[engine]) / len(totals[engine]) * 1000:.1f} ms/音频秒"
+        if latencies[engine]:
+            line += f"  延迟 {sum(latencies[engine]) / len(latencies[engine]):.0f}ms"
+            line += f"  检出 {len(latencies[engine])}/{len(args.wavs)}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+语音识别常驻会话 测试脚本 V2.0
+不需要 API Key 和网络：启动本地的 Paraformer 协议模拟服务（模拟握手和任务启动延迟），
+对比三种方式每轮发送第一帧音频之前的准备耗时：
+    新建连接 - 每轮重新建立连接（相当于 dashscope Recognition.start()）
+    常驻连接 - 复用后台保持的连接，只需等待 task-started
+    预开任务 - 上一轮回复播报期间已经调用 prepare()
+最后模拟服务端空闲超时断开，检查后台是否自动重连、下一轮是否仍然复用连接；
+并让模拟服务按静音断句，用 FileSource 回放一段语音给 ParaformerModel，检查收到句末结果后
+本地只需确认一小段静音即结束录音，而不是等满 VAD 的静音计时；
+再给 ParaformerModel 配一个解码很慢的本地识别器，检查云端在预算内返回时不必等本地解码完成
+（后两项需要能导入 ParaformerModel 的依赖）。
+用法: python paraformer_session_test.py [--turns 5] [--connect-delay-ms 150] [--task-delay-ms 50]
+"""
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+# 添加到上级目录到系统路径中
+sys.path.append(parent_dir)
+sys.path.append(current_dir)
+
+from utils.paraformer_session import ParaformerSessionManager
+from utils.audio_io import FileSource
+from utils.local_transcriber import LocalTranscriber
+from paraformer_stub_server import StubParaformerServer
+
+AUDIO_CHUNK = b"\x00\x00" * 1600  # 100ms 的16kHz静音
+
+
+def run_turn(manager, audio_ms=500):
+    """模拟一轮识别：取得任务、发送音频、取回结果"""
+    task = manager.acquire()
+    for _ in range(audio_ms // 100):
+        task.send_audio_frame(AUDIO_CHUNK)
+    text = task.stop()
+    return manager.last_latency, text
+
+
+def check(name, ok):
+    print(f"  [{'通过' if ok else '失败'}] {name}")
+    return ok
+
+
+def check_sentence_end_endpointing(sentence_silence_ms=200):
+    """模拟服务在有声音频之后静音 sentence_silence_ms 即返回句末结果，录音应在本地确认静音后立即结束"""
+    os.environ.setdefault("ALI_APIKEY", "test")
+    from large_models_interfaces.Speech2Text_interface import ParaformerModel
+    from utils.endpointer import EndpointPolicy
+
+    server = StubParaformerServer(sentence_silence_ms=sentence_silence_ms)
+    server.start()
+    os.environ["DASHSCOPE_WEBSOCKET_BASE_URL"] = server.url
+    rate = 16000
+    t = np.arange(rate) / rate
+    speech = (8000 * np.sin(2 * np.pi * 300 * t)).astype(np.int16)
+    samples = np.concatenate([np.zeros(rate // 2, np.int16), speech, np.zeros(rate * 3, np.int16)])
+    model = ParaformerModel(audio_source=FileSource(samples=samples, sample_rate=rate, speed=1.0))
+    model.sessions.wait_ready(timeout=5)
+    text = model.speech2text(start_position=0)
+    model.close()
+    server.stop()
+
+    endpointer = model.endpointer
+    trailing_ms = model.last_utterance_stats.trailing_silence_ms
+    print(f"句末结果断句: 结束原因 {endpointer.reason}  句末结果后 {endpointer.final_latency_ms}ms  "
+          f"尾部静音 {trailing_ms:.0f}ms（VAD 静音计时 {model.vad.end_silence_ms}ms）  结果 '{text}'")
+    passed = check("按句末结果结束录音", (endpointer.reason or "").startswith(EndpointPolicy.REASON_SENTENCE_END))
+    passed &= check("句末结果后只需确认一小段静音",
+                    endpointer.final_latency_ms is not None
+                    and endpointer.final_latency_ms <= endpointer.confirm_silence_ms + 200)
+    passed &= check("早于 VAD 静音计时结束", trailing_ms < model.vad.end_silence_ms)
+    passed &= check("识别结果正确", text.startswith("收到") and text.endswith("毫秒音频"))
+    return passed
+
+
+class SlowRecognizer:
+    """解码速度只有实时的三分之一的假识别器，模拟在树莓派上跟不上的 Vosk"""
+
+    def __init__(self, seconds_per_second=3.0, bytes_per_second=32000):
+        self.seconds_per_byte = seconds_per_second / bytes_per_second
+
+    def AcceptWaveform(self, data):
+        time.sleep(len(data) * self.seconds_per_byte)
+        return False
+
+    def Result(self):
+        return '{"text": ""}'
+
+    def FinalResult(self):
+        return '{"text": "本地 结果"}'
+
+    def Reset(self):
+        pass
+
+
+class SlowLocalTranscriber(LocalTranscriber):
+    def __init__(self, **kwargs):
+        # 不加载 Vosk 模型，其余流程（解码线程、队列、结束和取消）与 LocalTranscriber 相同
+        self.sample_rate = 16000
+        self.packet_ms = 200
+        self.max_queue_ms = 10000
+        self.rec = SlowRecognizer(**kwargs)
+        self.sentences = []
+        self.decoder = None
+        self._cancelled = None
+        self.on_sentence = None
+
+
+def check_hedged_turn_within_budget(cloud_budget_ms=1500):
+    """本地解码远慢于实时、云端很快时，录音结束后应在预算内采用云端结果返回"""
+    os.environ.setdefault("ALI_APIKEY", "test")
+    from large_models_interfaces.Speech2Text_interface import ParaformerModel
+
+    server = StubParaformerServer()
+    server.start()
+    os.environ["DASHSCOPE_WEBSOCKET_BASE_URL"] = server.url
+    rate = 16000
+    t = np.arange(rate * 3 // 2) / rate
+    speech = (8000 * np.sin(2 * np.pi * 300 * t)).astype(np.int16)
+    samples = np.concatenate([np.zeros(rate // 2, np.int16), speech, np.zeros(rate * 3, np.int16)])
+    model = ParaformerModel(audio_source=FileSource(samples=samples, sample_rate=rate, speed=1.0),
+                            local_transcriber=SlowLocalTranscriber(), cloud_budget_ms=cloud_budget_ms)
+    model.sessions.wait_ready(timeout=5)
+    start = time.monotonic()
+    text = model.speech2text(start_position=0)
+    elapsed_ms = (time.monotonic() - start) * 1000
+    model.close()
+    server.stop()
+
+    hedge = model.last_hedge
+    after_end_ms = elapsed_ms - model.last_utterance_stats.duration_ms
+    print(f"本地解码很慢: {hedge}  录音结束后约 {after_end_ms:.0f}ms 返回（预算 {cloud_budget_ms}ms）  结果 '{text}'")
+    passed = check("采用云端结果", hedge.winner == "cloud" and text.startswith("收到"))
+    passed &= check("不等待本地解码，在预算内返回", after_end_ms < cloud_budget_ms)
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=5, help="每种方式的轮数")
+    parser.add_argument("--connect-delay-ms", type=int, default=150, help="模拟的握手延迟")
+    parser.add_argument("--task-delay-ms", type=int, default=50, help="模拟的任务启动延迟")
+    args = parser.parse_args()
+
+    server = StubParaformerServer(connect_delay_ms=args.connect_delay_ms, task_delay_ms=args.task_delay_ms,
+                                  idle_timeout_s=1.0)
+    server.start()
+    print(f"模拟服务: {server.url}")
+    results = {}
+    passed = True
+
+    # 1. 每轮新建连接
+    latencies = []
+    for _ in range(args.turns):
+        manager = ParaformerSessionManager(url=server.url, api_key="test")
+        latency, text = run_turn(manager)
+        latencies.append(latency)
+        manager.close()
+    results["新建连接"] = latencies
+    passed &= check(f"识别结果正确（{text}）", text == "收到500毫秒音频")
+
+    # 2. 常驻连接 / 3. 预开任务（模拟服务端空闲1秒即断开，管理器在0.5秒时主动重建）
+    manager = ParaformerSessionManager(url=server.url, api_key="test", idle_timeout_s=0.5)
+    manager.start()
+    passed &= check("后台建立常驻连接", manager.wait_ready(timeout=5))
+    results["常驻连接"] = [run_turn(manager)[0] for _ in range(args.turns)]
+    latencies = []
+    for _ in range(args.turns):
+        manager.prepare()
+        time.sleep((args.task_delay_ms + 100) / 1000)  # 播报回复期间
+        latencies.append(run_turn(manager)[0])
+    results["预开任务"] = latencies
+
+    for name, latencies in results.items():
+        totals = [latency.total_ms for latency in latencies]
+        print(f"{name}: 平均 {sum(totals) / len(totals):.0f}ms  最大 {max(totals):.0f}ms  {latencies[-1]}")
+    average = {name: sum(l.total_ms for l in latencies) / len(latencies) for name, latencies in results.items()}
+    passed &= check("常驻连接不再握手", all(l.connect_ms == 0 for l in results["常驻连接"]))
+    passed &= check("预开任务命中", all(l.prepared for l in results["预开任务"]))
+    passed &= check("准备耗时 新建 > 常驻 > 预开", average["新建连接"] > average["常驻连接"] > average["预开任务"])
+
+    # 4. 空闲超时：服务端断开后后台重连，下一轮仍复用连接
+    connects = manager.connects
+    time.sleep(2.5)
+    passed &= check(f"空闲后后台重连（建立连接 {manager.connects - connects} 次）", manager.connects > connects)
+    latency, text = run_turn(manager)
+    passed &= check(f"空闲后复用连接 {latency}", latency.reused and text == "收到500毫秒音频")
+
+    # 5. 网络中断：断开所有连接后后台重连
+    server.drop_connections()
+    time.sleep(1.5)
+    latency, text = run_turn(manager)
+    passed &= check(f"断线后恢复 {latency}", latency.reused and text == "收到500毫秒音频")
+
+    print(f"会话统计: {manager.stats()}")
+    print(f"模拟服务: 连接 {server.connections} 次，任务 {server.tasks} 个，空闲断开 {server.idle_closed} 次")
+    manager.close()
+    server.stop()
+
+    # 6. 服务端断句：收到句末结果并确认静音后结束录音
+    passed &= check_sentence_end_endpointing()
+
+    # 7. 云端与本地同时识别：本地解码很慢时云端结果不被拖住
+    passed &= check_hedged_turn_within_budget()
+    print("全部通过" if passed else "存在失败项")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
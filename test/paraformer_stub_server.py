@@ -0,0 +1,267 @@
+"""
+Paraformer 实时语音识别 本地模拟服务 V2.0
+只用标准库实现的 websocket 服务，按 DashScope 实时语音识别协议应答：
+收到 run-task 后返回 task-started，统计之后收到的二进制音频，每收到 partial_ms 音频返回一条中间结果
+（"收到"、"收到音频"……），收到 finish-task 后返回句末结果（"收到N毫秒音频"）和 task-finished；
+设置 sentence_silence_ms 时，有声音频之后出现足够长的静音即返回句末结果，模拟服务端断句；
+同一连接上可以依次执行多个任务。
+可以模拟连接握手延迟、任务启动延迟和服务端的空闲超时断开，用于测试常驻连接和重连逻辑。
+整个程序也可以指向它运行：DASHSCOPE_WEBSOCKET_BASE_URL=ws://127.0.0.1:8765 python main.py
+用法: python paraformer_stub_server.py [--port 8765] [--connect-delay-ms 150] [--task-delay-ms 50] [--idle-timeout-s 60]
+"""
+
+import json
+import time
+import base64
+import socket
+import struct
+import hashlib
+import argparse
+import threading
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class StubParaformerServer:
+    """
+    用法：
+        server = StubParaformerServer(connect_delay_ms=150)
+        server.start()
+        manager = ParaformerSessionManager(url=server.url, api_key="test")
+        ...
+        server.stop()
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, connect_delay_ms: int = 0, task_delay_ms: int = 0,
+                 idle_timeout_s: float = None, bytes_per_second: int = 32000, partial_ms: int = 500,
+                 sentence_silence_ms: int = None):
+        """
+        Args:
+            host (str, optional): 监听地址. Defaults to "127.0.0.1".
+            port (int, optional): 监听端口，0 表示自动分配. Defaults to 0.
+            connect_delay_ms (int, optional): 回复 websocket 握手前的延迟，模拟 TLS 和握手耗时. Defaults to 0.
+            task_delay_ms (int, optional): 回复 task-started 前的延迟. Defaults to 0.
+            idle_timeout_s (float, optional): 连接上没有任务且没有数据的时间超过该值时服务端断开. Defaults to None（不断开）.
+            bytes_per_second (int, optional): 音频码率，用于把收到的字节数换算为时长. Defaults to 32000.
+            partial_ms (int, optional): 每收到这么长的音频返回一条中间结果. Defaults to 500.
+            sentence_silence_ms (int, optional): 有声音频之后静音达到该时长即返回句末结果. Defaults to None（只在 finish-task 时返回）.
+        """
+        self.connect_delay_ms = connect_delay_ms
+        self.task_delay_ms = task_delay_ms
+        self.idle_timeout_s = idle_timeout_s
+        self.bytes_per_second = bytes_per_second
+        self.partial_bytes = bytes_per_second * partial_ms // 1000
+        self.sentence_silence_bytes = bytes_per_second * sentence_silence_ms // 1000 if sentence_silence_ms else None
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen()
+        self.host, self.port = self._sock.getsockname()
+        self._running = False
+        self._clients = []
+
+        # 统计信息
+        self.connections = 0
+        self.tasks = 0
+        self.idle_closed = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self) -> None:
+        self._running = True
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def stop(self) -> None:
+        self._running = False
+        self._sock.close()
+        for client in list(self._clients):
+            try:
+                client.close()
+            except OSError:
+                pass
+
+    def drop_connections(self) -> None:
+        """断开所有客户端连接，模拟网络中断"""
+        for client in list(self._clients):
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _accept(self) -> None:
+        while self._running:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    # ---------- websocket 帧 ----------
+
+    @staticmethod
+    def _recv_exact(client, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = client.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("连接已关闭")
+            data += chunk
+        return data
+
+    def _recv_frame(self, client):
+        """返回 (opcode, payload)"""
+        head = self._recv_exact(client, 2)
+        opcode = head[0] & 0x0F
+        masked = head[1] & 0x80
+        length = head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self._recv_exact(client, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._recv_exact(client, 8))[0]
+        mask = self._recv_exact(client, 4) if masked else None
+        payload = self._recv_exact(client, length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    @staticmethod
+    def _send_frame(client, opcode: int, payload: bytes) -> None:
+        head = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            head += bytes([len(payload)])
+        elif len(payload) < 65536:
+            head += bytes([126]) + struct.pack(">H", len(payload))
+        else:
+            head += bytes([127]) + struct.pack(">Q", len(payload))
+        client.sendall(head + payload)
+
+    def _send_event(self, client, event: str, task_id: str, payload: dict = None, **header) -> None:
+        message = {"header": {"event": event, "task_id": task_id, **header}, "payload": payload or {}}
+        self._send_frame(client, 0x1, json.dumps(message, ensure_ascii=False).encode("utf-8"))
+
+    def _handshake(self, client) -> bool:
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = client.recv(4096)
+            if not chunk:
+                return False
+            request += chunk
+        headers = {}
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        time.sleep(self.connect_delay_ms / 1000)
+        if not headers.get("authorization", "").lower().startswith("bearer "):
+            client.sendall(b"HTTP/1.1 401 Unauthorized\r\nContent-Length: 0\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + WEBSOCKET_GUID).encode()).digest())
+        client.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                       b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        return True
+
+    # ---------- 识别协议 ----------
+
+    def _send_sentence_end(self, client, task_id: str, audio_bytes: int) -> None:
+        duration_ms = audio_bytes * 1000 // self.bytes_per_second
+        sentence = {"begin_time": 0, "end_time": duration_ms, "text": f"收到{duration_ms}毫秒音频", "sentence_end": True}
+        self._send_event(client, "result-generated", task_id, {"output": {"sentence": sentence}})
+
+    def _serve(self, client) -> None:
+        self._clients.append(client)
+        try:
+            if not self._handshake(client):
+                return
+            self.connections += 1
+            task_id = None
+            audio_bytes = 0
+            voiced = False  # 上一个句末结果之后是否收到过有声音频
+            silent_bytes = 0
+            while True:
+                # 没有任务时按空闲超时等待，超时即断开（与服务端的行为一致）
+                client.settimeout(self.idle_timeout_s if task_id is None else None)
+                try:
+                    opcode, payload = self._recv_frame(client)
+                except socket.timeout:
+                    self.idle_closed += 1
+                    self._send_frame(client, 0x8, struct.pack(">H", 1000))
+                    return
+                if opcode == 0x8:
+                    self._send_frame(client, 0x8, payload[:2])
+                    return
+                if opcode == 0x9:
+                    self._send_frame(client, 0xA, payload)
+                    continue
+                if opcode == 0x2:
+                    if task_id is None:
+                        self._send_event(client, "task-failed", "", error_code="InvalidParameter",
+                                         error_message="audio received before run-task")
+                    else:
+                        partials = audio_bytes // self.partial_bytes
+                        audio_bytes += len(payload)
+                        if audio_bytes // self.partial_bytes > partials:
+                            text = "收到音频" if partials else "收到"
+                            sentence = {"begin_time": 0, "end_time": None, "text": text, "sentence_end": False}
+                            self._send_event(client, "result-generated", task_id, {"output": {"sentence": sentence}})
+                        # 每个样本的高字节为 0 或 0xFF 时幅度小于256，视为静音
+                        if max(payload[1::2], default=0) not in (0, 255):
+                            voiced, silent_bytes = True, 0
+                        else:
+                            silent_bytes += len(payload)
+                        if voiced and self.sentence_silence_bytes and silent_bytes >= self.sentence_silence_bytes:
+                            self._send_sentence_end(client, task_id, audio_bytes)
+                            voiced = False
+                    continue
+                if opcode != 0x1:
+                    continue
+                message = json.loads(payload.decode("utf-8"))
+                header = message.get("header", {})
+                action = header.get("action")
+                if action == "run-task":
+                    if task_id is not None:
+                        self._send_event(client, "task-failed", header.get("task_id", ""),
+                                         error_code="InvalidParameter", error_message="task already running")
+                        continue
+                    time.sleep(self.task_delay_ms / 1000)
+                    task_id = header.get("task_id")
+                    audio_bytes = 0
+                    voiced, silent_bytes = False, 0
+                    self.tasks += 1
+                    self._send_event(client, "task-started", task_id)
+                elif action == "finish-task" and header.get("task_id") == task_id:
+                    # 按静音断句时只补发尚未结束的句子
+                    if voiced if self.sentence_silence_bytes else audio_bytes:
+                        self._send_sentence_end(client, task_id, audio_bytes)
+                    self._send_event(client, "task-finished", task_id, {"output": {}})
+                    task_id = None
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            if client in self._clients:
+                self._clients.remove(client)
+            try:
+                client.close()
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--connect-delay-ms", type=int, default=150, help="模拟的握手延迟")
+    parser.add_argument("--task-delay-ms", type=int, default=50, help="模拟的任务启动延迟")
+    parser.add_argument("--idle-timeout-s", type=float, default=60, help="服务端空闲超时")
+    parser.add_argument("--sentence-silence-ms", type=int, default=None, help="按静音断句，返回句末结果")
+    args = parser.parse_args()
+    server = StubParaformerServer(port=args.port, connect_delay_ms=args.connect_delay_ms,
+                                  task_delay_ms=args.task_delay_ms, idle_timeout_s=args.idle_timeout_s,
+                                  sentence_silence_ms=args.sentence_silence_ms)
+    server.start()
+    print(f"模拟服务已启动: {server.url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
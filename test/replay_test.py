@@ -0,0 +1,49 @@
+"""
+录音回放 测试脚本 V2.0
+不需要对着机器人说话：把录好的 WAV 文件通过 FileSource 回放给热词检测和语音转文本模块。
+用法: python replay_test.py 录音.wav [--speed 倍数] [--stt]
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+# 添加到上级目录到系统路径中
+sys.path.append(parent_dir)
+
+from utils.audio_io import FileSource
+from utils.asr_vosk import AsrVosk
+
+MODEL_PATH = os.path.join(parent_dir, "models", "vosk-model-small-cn-0.22")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("wav", help="要回放的录音文件")
+parser.add_argument("--speed", type=float, default=None, help="回放速度倍数，默认不限速")
+parser.add_argument("--stt", action="store_true", help="检测到唤醒词后继续把后面的录音交给语音转文本")
+args = parser.parse_args()
+
+# 1.创建回放输入源
+source = FileSource(args.wav, speed=args.speed, tail_silence_ms=1500)
+print(f"回放文件: {args.wav} 时长 {source.duration:.1f}s")
+
+# 2.热词检测
+asr = AsrVosk(MODEL_PATH, {"小新小新": 1, "再见": 2}, audio_source=source)
+start = time.time()
+signal = asr.listen_for_hotword()
+elapsed = time.time() - start
+print(f"热词信号: {signal} 检测位置: {asr.detection_position} 耗时 {elapsed:.2f}s "
+      f"({source.position / source.sample_rate / max(elapsed, 1e-6):.1f}倍实时)")
+
+# 3.语音转文本
+if args.stt and signal is not None:
+    from large_models_interfaces.Speech2Text_interface import ParaformerModel
+    paraformer = ParaformerModel(audio_source=source)
+    # 边识别边打印中间结果，稳定的部分可以提前交给下游
+    for event in paraformer.stream(start_position=asr.detection_position):
+        print(f"\n{event}")
+    print(paraformer.last_text)
@@ -0,0 +1,67 @@
+"""
+Vosk 语法模式 性能测试脚本 V2.0
+把同一批录音分别回放给自由识别模式和语法约束模式的 AsrVosk，输出每秒音频消耗的CPU时间、
+检测到的热词以及检测位置（录音中的秒数）。提供 --hotword-end 时同时输出检测延迟（检测位置 - 热词结束时刻）。
+用法: python vosk_grammar_benchmark.py 录音1.wav [录音2.wav ...] [--hotword-end 秒]
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+# 添加到上级目录到系统路径中
+sys.path.append(parent_dir)
+
+from utils.audio_io import FileSource
+from utils.asr_vosk import AsrVosk
+
+MODEL_PATH = os.path.join(parent_dir, "models", "vosk-model-small-cn-0.22")
+HOTWORDS = {"小新小新": 1, "再见": 2}
+
+
+def run(wav, use_grammar, model_path):
+    """回放一个文件，返回 (信号, 检测位置秒, CPU秒/音频秒)"""
+    source = FileSource(wav, tail_silence_ms=1500)
+    asr = AsrVosk(model_path, HOTWORDS, audio_source=source, use_grammar=use_grammar)
+    start = time.process_time()
+    signal = asr.listen_for_hotword()
+    cpu = time.process_time() - start
+    # 检测到热词时回放立即停止，CPU时间按实际处理的音频时长归一化
+    processed = source.position / source.sample_rate
+    detected_at = asr.detection_position / source.sample_rate if signal is not None else None
+    return signal, detected_at, cpu / max(processed, 1e-6)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("wavs", nargs="+", help="包含热词的录音文件")
+    parser.add_argument("--hotword-end", type=float, default=None, help="录音中热词说完的时刻（秒），用于计算检测延迟")
+    parser.add_argument("--model", default=MODEL_PATH, help="Vosk 模型路径")
+    args = parser.parse_args()
+
+    totals = {False: [], True: []}
+    for wav in args.wavs:
+        print(f"录音: {wav}")
+        for use_grammar in (False, True):
+            signal, detected_at, cpu = run(wav, use_grammar, args.model)
+            totals[use_grammar].append(cpu)
+            name = "语法约束" if use_grammar else "自由识别"
+            line = f"  {name}: CPU {cpu * 1000:6.1f} ms/音频秒  信号 {signal}"
+            if detected_at is not None:
+                line += f"  检测位置 {detected_at:.2f}s"
+                if args.hotword_end is not None:
+                    line += f"  延迟 {(detected_at - args.hotword_end) * 1000:.0f}ms"
+            print(line)
+
+    for use_grammar, cpus in totals.items():
+        name = "语法约束" if use_grammar else "自由识别"
+        print(f"平均 {name}: CPU {sum(cpus) / len(cpus) * 1000:.1f} ms/音频秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,284 @@
 """
 热词检测工具 V2.0
 ASR语音识别类，基于Vosk和PyAudio。
-支持多热词拼音流式检测，每个热词有独立指针，实时检测拼音序列，匹配即返回信号。
+支持多热词拼音流式检测，所有热词共用一个拼音 Aho-Corasick 自动机（utils.hotword_matcher），匹配即返回信号。
 """
 
-from vosk import Model, KaldiRecognizer
-import pyaudio
+import os
+import sys
 import json
-from pypinyin import lazy_pinyin
 import threading
 import numpy as np
 
-class HotwordSequence:
-    def __init__(self, name, pinyin_seq, signal):
-        self.name = name
-        self.pinyin_seq = pinyin_seq  # 期望的拼音序列
-        self.signal = signal          # 匹配到后返回的信号
-        self.pointer = 0             # 当前匹配到第几个拼音
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
 
-    def reset(self):
-        self.pointer = 0
+sys.path.append(parent_dir)
+
+from utils.audio_capture import get_audio_capture
+from utils.resampler import StreamingResampler
+from utils.vad import AdaptiveEnergyVAD
+from utils.speech_gate import SpeechGate
+from utils.vosk_registry import get_vosk_registry
+from utils.hotword_matcher import HotwordMatcher, FuzzyHotwordMatcher
+from utils.incremental_pinyin import IncrementalPinyin, word_pinyin
+
+TARGET_SAMPLE_RATE = 16000  # 识别模型的采样率
+VOICE_ACTIVITY_SIGNAL = -1  # 监听打断时检测到持续人声（而不是热词）返回的信号
+BARGE_IN_MIN_ERLE_DB = 10.0  # 回声消除达到该抑制量后才允许人声打断，避免机器人被自己的声音打断
+
+
+def build_grammar(hotwords) -> str:
+    """
+    由热词构建 Vosk 语法（JSON 短语列表）。
+    中文模型的词表以分词后的词语为单位，热词本身往往不在词表中，因此按单字拆开；
+    再加入 [unk] 作为垃圾词，其他说话内容会被识别为 [unk]，不会被强行解码成热词。
+    """
+    phrases = [" ".join(ch for ch in word if ch.strip()) for word in hotwords]
+    return json.dumps(phrases + ["[unk]"], ensure_ascii=False)
+
+
+class WakeLatency:
+    """
+    一次唤醒的延迟：从热词说完到 listen_for_hotword() 返回信号。
+    decode_ms 为热词结束之后识别器还需要接收的音频时长（解码前瞻、读取块大小和中间结果节流造成），
+    backlog_ms 为检测时已经采集但还没有送入识别器的音频时长（处理跟不上实时、回声消除按块缓存等造成）。
+    """
+
+    def __init__(self, keyword_end_ms, fed_ms, backlog_ms):
+        self.keyword_end_ms = keyword_end_ms  # 热词结束时刻（识别器时间轴），识别结果没有时间戳时为 None
+        self.decode_ms = fed_ms - keyword_end_ms if keyword_end_ms is not None else None
+        self.backlog_ms = backlog_ms
+
+    @property
+    def total_ms(self):
+        return self.decode_ms + self.backlog_ms if self.decode_ms is not None else None
+
+    def __repr__(self):
+        if self.decode_ms is None:
+            return f"WakeLatency(未知, backlog={self.backlog_ms:.0f}ms)"
+        return (f"WakeLatency(total={self.total_ms:.0f}ms, decode={self.decode_ms:.0f}ms, "
+                f"backlog={self.backlog_ms:.0f}ms)")
 
-    def match(self, pinyin_stream):
-        """
-        在拼音流中推进指针，若完全匹配则返回True，否则False。
-        匹配失败时指针回到0。
-        """
-        # 思路说明：
-        # 1. 遍历输入的拼音流，每次取一个拼音p。
-        # 2. 如果p是空格，直接跳过（因为拼音流中可能有空格分隔）。
-        # 3. 如果p等于当前热词序列指针所指的拼音（self.pinyin_seq[self.pointer]），指针前进一位。
-        #    - 如果指针已经到达热词序列末尾，说明完全匹配，重置指针并返回True。
-        # 4. 如果p不等于当前指针所指拼音，说明匹配失败，指针重置为0。
-        #    - 但如果p正好等于热词序列的第一个拼音，指针设为1（支持“重叠”匹配）。
-        # 5. 如果遍历结束都没有完全匹配，返回False。
-        for p in pinyin_stream:
-            if p == ' ':
-                continue
-            elif p == self.pinyin_seq[self.pointer]:
-                self.pointer += 1
-                if self.pointer == len(self.pinyin_seq):
-                    self.reset()
-                    return True
-            else:
-                self.reset()
-                if p == self.pinyin_seq[0]:
-                    self.pointer = 1
-        return False
 
 class AsrVosk:
-    def __init__(self, model_path, hotwords_dict, sample_rate=16000):
+    def __init__(self, model_path, hotwords_dict, sample_rate=16000, vad=None, audio_source=None, frontend=None,
+                 echo_canceller=None, use_grammar=False, fuzzy=False, hotword_thresholds=None,
+                 hop_ms=256, partial_interval_ms=None, gate=None):
         """
-        model_path: 语音识别模型路径
+        model_path: 语音识别模型路径，同一进程内的模型由 utils.vosk_registry 共享，只加载一次
         hotwords_dict: {热词: 信号值} 的字典
-        sample_rate: 采样率，默认16000
+        sample_rate: 期望的采集采样率，默认16000；进程内首次创建采集服务时生效
+        vad: 语音活动检测器（作用于16kHz音频），一句话说完后据此重置识别器；默认使用 AdaptiveEnergyVAD
+        audio_source: 音频输入源（utils.audio_io.AudioSource），默认使用共享的麦克风采集服务；
+                      传入 FileSource 可回放录音文件，文件读完时 listen_for_hotword() 返回 None
+        echo_canceller: 可选的回声消除器（utils.echo_canceller.EchoCanceller），从16kHz音频中减去机器人自己播放的声音，
+                        在前端处理之前进行，播放期间也可以检测热词
+        frontend: 可选的音频前端（utils.audio_frontend.AudioFrontEnd），在重采样之后对16kHz音频做降噪和增益，默认不处理
+        use_grammar: 是否使用语法约束解码：识别器只在热词和 [unk] 之间搜索，解码量远小于自由识别，
+                     但识别不出热词以外的内容；默认 False（自由识别后在中间结果中查找热词）
+        fuzzy: 是否使用模糊匹配（utils.hotword_matcher.FuzzyHotwordMatcher）：容忍易混淆的声母/韵母和个别音节错误，
+               并结合 Vosk 的词置信度打分；默认 False（拼音精确匹配）
+        hotword_thresholds: 模糊匹配时各热词的得分阈值 {热词: 0~1}，未列出的使用默认值0.8
+        hop_ms: 每次从音频源读取并送入识别器的时长，默认256ms；低延迟唤醒可设为40~80ms
+        partial_interval_ms: 计算中间结果（PartialResult）的最小间隔，识别器频繁接收音频，
+                             但累计到该时长的新音频才计算一次中间结果；默认与 hop_ms 相同
+        gate: 可选的语音门控（utils.speech_gate.SpeechGate，需使用本识别器的 vad 构造），
+              只在有人声时把音频送入识别器，降低待机时的CPU占用；也可以传 True 使用默认参数创建
         """
-        self.model = Model(model_path)
-        self.sample_rate = sample_rate
-        self.rec = KaldiRecognizer(self.model, self.sample_rate)
-        self.stream = None
-        # 构建热词序列对象列表
-        self.hotword_sequences = []
-        for word, signal in hotwords_dict.items():
-            pinyin_seq = lazy_pinyin(word)
-            self.hotword_sequences.append(HotwordSequence(word, pinyin_seq, signal))
-
-        self.frames_per_buffer = 4096 * sample_rate // 16000
+        self.model_path = model_path
+        self.model = get_vosk_registry().get_model(model_path)
+        # 共享进程级采集服务，不再为每次监听单独打开音频设备
+        self.audio_source = audio_source if audio_source is not None else get_audio_capture(sample_rate)
+        # 无论设备以什么采样率采集，识别器都只解码16kHz音频
+        self.sample_rate = TARGET_SAMPLE_RATE
+        self.resampler = StreamingResampler(self.audio_source.sample_rate, self.sample_rate)
+        self.use_grammar = use_grammar
+        self.fuzzy = fuzzy
+        self.hotword_thresholds = hotword_thresholds
+        self.reader = None
+        self.echo_canceller = echo_canceller
+        self.frontend = frontend
+        self.vad = vad if vad is not None else AdaptiveEnergyVAD(sample_rate=self.sample_rate, end_silence_ms=800)
+        self.gate = SpeechGate(self.vad, self.sample_rate) if gate is True else (gate or None)
+        self.last_utterance_stats = None  # 检测到热词时那段语音的统计信息
+        self.detection_position = None  # 检测到热词时在采集时间轴上的位置（采集采样率下的帧数）
+        self.speech_start_position = None  # 检测到热词的那段语音开始说话的位置，未检测到人声时为 None
+        self.pinyin = IncrementalPinyin()  # 中间结果只转换变化的词
+        self.last_match = None  # 最近一次匹配到的热词及其音节位置
+        self.last_latency = None  # 最近一次检测到热词的唤醒延迟（WakeLatency）
+        self.hop_ms = hop_ms
+        self.partial_interval_ms = partial_interval_ms if partial_interval_ms is not None else hop_ms
+        self.frames_per_buffer = hop_ms * self.audio_source.sample_rate // 1000
+        self.set_hotwords(hotwords_dict)
+
+    def set_hotwords(self, hotwords_dict):
+        """
+        更换热词集合，语法模式下同时按新的热词重建识别器；需在没有监听时调用
+        """
+        self.hotwords_dict = dict(hotwords_dict)
+        if self.fuzzy:
+            self.matcher = FuzzyHotwordMatcher(self.hotwords_dict, self.hotword_thresholds)
+        else:
+            # 所有热词构建为一个拼音自动机，每块音频只处理新增的音节
+            self.matcher = HotwordMatcher(self.hotwords_dict)
+        grammar = build_grammar(self.hotwords_dict) if self.use_grammar else None
+        self.rec = get_vosk_registry().create_recognizer(self.model_path, self.sample_rate, grammar)
+        # 中间结果附带每个词的置信度（模糊匹配）和时间戳（唤醒延迟统计）
+        self.rec.SetPartialWords(True)
+        self.rec.SetWords(True)
+        self._rec_samples = 0  # 送入当前识别器的总样本数，与 Vosk 词时间戳处于同一时间轴
+        self.pinyin.reset()
 
     def start(self):
-        self.p = pyaudio.PyAudio() # 改到这里初始化音频设备
-        self.stream = self.p.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True, frames_per_buffer=self.frames_per_buffer, input_device_index=0)
-        self.stream.start_stream()
+        # 从当前时刻开始读取共享采集流
+        self.reader = self.audio_source.open_reader()
+        self.resampler.reset()
+        if self.echo_canceller is not None:
+            self.echo_canceller.reset(self.reader.position)
+        if self.frontend is not None:
+            self.frontend.reset()
+        if self.gate is not None:
+            self.gate.reset()
+        self.vad.reset()
+
+    @staticmethod
+    def _syllable_confidences(words, syllable_count: int):
+        """把识别结果中每个词的置信度展开到该词的每个音节上，与拼音流对不上时返回 None"""
+        if not words:
+            return None
+        confidences = []
+        for word in words:
+            syllables = [p for p in word_pinyin(word.get('word', '')) if p.strip()]
+            confidences.extend([word.get('conf', 1.0)] * len(syllables))
+        return confidences if len(confidences) == syllable_count else None
+
+    @staticmethod
+    def _keyword_end_ms(match, words):
+        """由识别结果的词时间戳得到热词最后一个音节所在词的结束时刻（识别器时间轴，毫秒），没有时间戳时返回 None"""
+        if not words:
+            return None
+        count = 0
+        for word in words:
+            count += len([p for p in word_pinyin(word.get('word', '')) if p.strip()])
+            if count >= match.end:
+                return word['end'] * 1000 if 'end' in word else None
+        return None
+
+    def _reset_utterance(self):
+        """清空识别器和拼音流，开始识别新的一句"""
+        self.rec.Reset()
+        self.matcher.reset()
+        self.pinyin.reset()
 
     def stop(self):
-        if self.stream is not None:
-            self.stream.stop_stream()
-            self.stream.close()
-        self.p.terminate() # 这里断开与音频设备的连接
+        # 只关闭自己的读取器，麦克风保持常开
+        if self.reader is not None:
+            self.audio_source.close_reader(self.reader)
+            self.reader = None
 
-    def listen_for_hotword(self):
+    def _record_detection(self):
+        """记录检测时刻的语音统计与采集时间轴位置"""
+        stats = self.vad.stats()
+        self.last_utterance_stats = stats
+        self.detection_position = self.reader.position
+        self.speech_start_position = None
+        if stats.speech_start_ms is not None:
+            back_ms = stats.duration_ms - stats.speech_start_ms
+            self.speech_start_position = self.detection_position - int(back_ms * self.audio_source.sample_rate / 1000)
+
+    def listen_for_hotword(self, stop_event=None, min_speech_ms=None):
         """
         阻塞式监听，实时检测拼音流，匹配到热词序列即返回信号。
+        Args:
+            stop_event (threading.Event, optional): 置位后停止监听并返回 None，例如机器人播报结束.
+            min_speech_ms (int, optional): 用于播报期间监听打断。设置后持续人声达到该时长也会返回
+                VOICE_ACTIVITY_SIGNAL；需要配置回声消除器且其抑制量达到 BARGE_IN_MIN_ERLE_DB.
         """
         self.start()
+        listen_start_position = self.reader.position
+        processed_samples = 0  # 本次监听已经过处理链路（不论是否被门控）的16kHz样本数
+        pending_ms = 0.0  # 上次计算中间结果之后送入识别器的音频时长
         try:
-            while self.stream is not None:
-                data = self.stream.read(self.frames_per_buffer, exception_on_overflow=False)
-                self.rec.AcceptWaveform(data) # 如果识别成功，则输出识别结果
-                
-                result = self.rec.PartialResult()
-                try:
-                    text = json.loads(result).get('partial', '')
-                except Exception:
-                    text = ''
-                pinyin_stream = lazy_pinyin(text)
-                # 构建输出信息
-                output_text = f"中间结果：{text}  拼音流：{pinyin_stream}"
-                # 使用空格填充确保完全覆盖上一行
-                print(output_text)
-                # 多热词并发检测
-                for seq in self.hotword_sequences:
-                    if seq.match(pinyin_stream):
-                        self.rec.Reset() # 
+            while self.reader is not None:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                data = self.reader.read(self.frames_per_buffer)
+                if data is None:
+                    break
+                samples = self.resampler.process(data)
+                if self.echo_canceller is not None:
+                    samples = self.echo_canceller.process(samples)
+                if self.frontend is not None:
+                    samples = self.frontend.process(samples)
+                self.vad.process(samples)
+                processed_samples += len(samples)
+                if self.gate is not None:
+                    # 安静时不送入识别器，也不计算中间结果
+                    samples = self.gate.process(samples, self.vad.is_speech)
+                is_final = False
+                if len(samples):
+                    is_final = self.rec.AcceptWaveform(samples.tobytes())
+                    self._rec_samples += len(samples)
+                    pending_ms += len(samples) * 1000 / self.sample_rate
+
+                # 识别器判定一句结束时中间结果已被清空，改用最终结果；否则新音频累计足够时才计算中间结果
+                if is_final:
+                    result, text_key, words_key = self.rec.Result(), 'text', 'result'
+                elif len(samples) and pending_ms >= self.partial_interval_ms:
+                    result, text_key, words_key = self.rec.PartialResult(), 'partial', 'partial_result'
+                else:
+                    result = None
+                if result is not None:
+                    pending_ms = 0.0
+                    try:
+                        result = json.loads(result)
+                    except Exception:
+                        result = {}
+                    text = result.get(text_key, '')
+                    words = result.get(words_key)
+                    # 只在中间结果变化时输出
+                    if text != self.pinyin.text:
+                        print(f"中间结果：{text}")
+                    pinyin_stream = self.pinyin.update(text)
+                    # 多热词并发检测
+                    confidences = None
+                    if self.fuzzy:
+                        confidences = self._syllable_confidences(words, len(pinyin_stream) - pinyin_stream.count(" "))
+                    matches = self.matcher.update(pinyin_stream, confidences)
+                    if matches:
+                        self.last_match = max(matches, key=lambda m: m.score)
+                        captured_ms = (self.audio_source.position - listen_start_position) * 1000 / self.audio_source.sample_rate
+                        processed_ms = processed_samples * 1000 / self.sample_rate
+                        self.last_latency = WakeLatency(self._keyword_end_ms(self.last_match, words),
+                                                        self._rec_samples * 1000 / self.sample_rate,
+                                                        max(0.0, captured_ms - processed_ms))
+                        print(f"检测到热词: {self.last_match}  {self.last_latency}")
+                        self._record_detection()
+                        self._reset_utterance()
                         self.stop()
-                        return seq.signal
-                # 如果Pinyin_stream超过15仍然没有识别到
-                if len(pinyin_stream) > 15:
-                    self.rec.Reset()
+                        return self.last_match.signal
+                    # 如果Pinyin_stream超过15仍然没有识别到，或识别器已经开始新的一句
+                    if len(pinyin_stream) > 15:
+                        self._reset_utterance()
+                    elif is_final:
+                        self.matcher.reset()
+                        self.pinyin.reset()
+                # 播报期间有人持续说话，视为打断
+                if (min_speech_ms is not None and self.echo_canceller is not None
+                        and self.echo_canceller.erle_db >= BARGE_IN_MIN_ERLE_DB
+                        and self.vad.stats().speech_ms >= min_speech_ms):
+                    self.last_latency = None
+                    self._record_detection()
+                    self._reset_utterance()
+                    self.stop()
+                    return VOICE_ACTIVITY_SIGNAL
+                # 一句话已经说完仍然没有识别到，清空识别器准备下一句
+                if self.vad.utterance_ended:
+                    self._reset_utterance()
+                    self.vad.reset()
         finally:
             self.stop()
 
@@ -0,0 +1,69 @@
+"""
+异步运行工具 V2.0
+核心功能是提供一个进程级的后台事件循环线程：异步接口（基于 AsyncOpenAI 等异步客户端）都在这个循环中运行，
+同步接口只是把协程提交到该循环并等待结果。这样异步客户端的连接池在多次调用之间得以复用，
+同步接口也可以在任意线程（包括已有事件循环的线程之外的普通线程）中调用。
+"""
+
+import asyncio
+import threading
+
+
+class EventLoopThread:
+    """
+    在独立线程中常驻运行的事件循环
+    用法：
+        runner = get_event_loop_thread()
+        text = runner.run(model.get_response("你好"))   # 阻塞到协程完成
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="async-runner")
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout: float = None):
+        """
+        在后台事件循环中运行协程并等待结果
+        Args:
+            coro: 要运行的协程。
+            timeout (float, optional): 最长等待时间（秒），超时后取消协程并抛出 TimeoutError. Defaults to None（一直等待）.
+        Returns:
+            协程的返回值，协程抛出的异常会原样抛出
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("不能在后台事件循环中调用同步接口，请直接 await 对应的异步接口")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # 超时或等待期间被中断（例如 Ctrl+C）时取消协程，协程已结束时无影响
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+_event_loop_thread = None
+_event_loop_lock = threading.Lock()
+
+
+def get_event_loop_thread() -> EventLoopThread:
+    """获取进程内共享的后台事件循环线程，首次调用时创建"""
+    global _event_loop_thread
+    with _event_loop_lock:
+        if _event_loop_thread is None:
+            _event_loop_thread = EventLoopThread()
+        return _event_loop_thread
+
+
+def run_sync(coro, timeout: float = None):
+    """在共享的后台事件循环中运行协程并等待结果，供同步接口包装异步接口使用"""
+    return get_event_loop_thread().run(coro, timeout)
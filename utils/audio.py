@@ -4,7 +4,6 @@
 """
 
 import wave
-import pyaudio
 import os
 import sys
 import dashscope
@@ -12,12 +11,16 @@ from dashscope.audio.tts_v2 import *
 from pydub import AudioSegment
 import io
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.audio_io import AudioSink, SpeakerSink
 
-def play_wav(filename: str):
+
+def play_wav(filename: str, sink: AudioSink = None):
     """
-    使用 PyAudio 播放指定的 WAV 文件。
+    播放指定的 WAV 文件。
     Args:
         filename (str): 要播放的 WAV 文件路径。
+        sink (AudioSink, optional): 音频输出端，默认使用 PyAudio 输出到扬声器。
     """
     if not os.path.exists(filename):
         print(f"错误: WAV 文件 '{filename}' 不存在。")
@@ -29,29 +32,23 @@ def play_wav(filename: str):
         print(f"错误: 无法打开 WAV 文件 '{filename}' - {e}")
         return
 
-    # 初始化 PyAudio
-    p = pyaudio.PyAudio()
-
-    # 打开音频流
-    stream = p.open(format=p.get_format_from_width(wf.getsampwidth()),
-                    channels=wf.getnchannels(),
-                    rate=wf.getframerate(),
-                    output=True)
+    # 打开输出端
+    if sink is None:
+        sink = SpeakerSink()
+    sink.open(sample_rate=wf.getframerate(),
+              channels=wf.getnchannels(),
+              sample_width=wf.getsampwidth())
 
     # 读取数据并播放
     chunk = 1024 # 每次读取的帧数
     data = wf.readframes(chunk)
     print(f"[play_wav] 正在播放文件: {filename}")
     while data:
-        stream.write(data)
+        sink.write(data)
         data = wf.readframes(chunk)
 
-    # 停止并关闭流
-    stream.stop_stream()
-    stream.close()
-
-    # 终止 PyAudio
-    p.terminate()
+    # 停止并关闭输出端
+    sink.close()
     wf.close()
     print(f"[play_wav] 文件 '{filename}' 播放完毕。")
 
@@ -0,0 +1,295 @@
+"""
+音频采集服务 V2.0
+核心功能是在进程内维持唯一一路常开的麦克风输入流，把音频帧写入预分配的环形缓冲区，
+热词检测、语音转文本上传、VAD、录音等多个消费者各自持有读指针，互不干扰地读取同一份音频。
+"""
+
+import os
+import sys
+import threading
+import numpy as np
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+
+sys.path.append(parent_dir)
+
+from utils.audio_io import AudioSource
+
+
+class RingBuffer:
+    """
+    单写多读的环形缓冲区。
+    写入方（采集回调）只推进单调递增的 write_pos，读取方各自维护读指针，数据通路上不加锁。
+    缓冲区尾部额外预留 max_read 帧的镜像区，保证任意不超过 max_read 帧的读取在内存上都是连续的，
+    因此读取时可以直接返回视图而不必拷贝。
+    """
+
+    def __init__(self, capacity: int, max_read: int):
+        """
+        Args:
+            capacity (int): 环形缓冲区可保存的帧数。
+            max_read (int): 单次读取的最大帧数，同时也是镜像区的长度。
+        """
+        if max_read > capacity:
+            raise ValueError("max_read 不能大于 capacity")
+        self.capacity = capacity
+        self.max_read = max_read
+        self._buffer = np.zeros(capacity + max_read, dtype=np.int16)
+        self.write_pos = 0  # 累计写入的总帧数，只由写入方修改
+        self._cond = threading.Condition()
+
+    def write(self, samples: np.ndarray) -> None:
+        """写入一段int16音频帧，超出容量时只保留最新的部分"""
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            skipped = n - self.capacity
+            n = self.capacity
+        else:
+            skipped = 0
+
+        start = (self.write_pos + skipped) % self.capacity
+        first = min(n, self.capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        self._mirror(start, start + first)
+        if n > first:
+            self._buffer[:n - first] = samples[first:]
+            self._mirror(0, n - first)
+
+        # 数据写完后再发布新的写指针，读取方看到新指针时数据一定已经就绪
+        self.write_pos += n + skipped
+        with self._cond:
+            self._cond.notify_all()
+
+    def _mirror(self, begin: int, end: int) -> None:
+        """把落在缓冲区头部 [0, max_read) 的数据同步到尾部镜像区"""
+        if begin < self.max_read:
+            end = min(end, self.max_read)
+            self._buffer[self.capacity + begin:self.capacity + end] = self._buffer[begin:end]
+
+    def view(self, position: int, frames: int) -> np.ndarray:
+        """返回从绝对位置 position 开始、长度为 frames 的只读视图"""
+        index = position % self.capacity
+        data = self._buffer[index:index + frames]
+        data.flags.writeable = False
+        return data
+
+    def wait_for(self, predicate, timeout: float = None) -> bool:
+        """等待写入方发布新数据直到 predicate 成立，超时返回False"""
+        with self._cond:
+            return self._cond.wait_for(predicate, timeout)
+
+    def wake_all(self) -> None:
+        """唤醒所有等待中的读取方（用于关闭读取器）"""
+        with self._cond:
+            self._cond.notify_all()
+
+
+class RingReader:
+    """环形缓冲区的读取器，每个消费者持有一个，拥有独立的读指针"""
+
+    def __init__(self, ring: RingBuffer, position: int, sample_rate: int):
+        self.ring = ring
+        self.position = position  # 下一次读取的绝对帧位置
+        self.sample_rate = sample_rate
+        self.dropped_frames = 0  # 因读取过慢被写入方套圈而丢弃的帧数
+        self.closed = False
+
+    def available(self) -> int:
+        """当前可读的帧数"""
+        return self.ring.write_pos - self.position
+
+    def read(self, frames: int, timeout: float = None):
+        """
+        阻塞读取 frames 帧音频。
+        Args:
+            frames (int): 读取帧数，不能超过环形缓冲区的 max_read。
+            timeout (float, optional): 最长等待秒数，None 表示一直等待。
+        Returns:
+            np.ndarray: 环形缓冲区内的只读 int16 视图（零拷贝）。超时或读取器已关闭时返回 None。
+            视图指向的内存会在写入方绕回一圈后被覆盖，消费者应在 capacity 对应的时长内用完它。
+        """
+        if frames > self.ring.max_read:
+            raise ValueError(f"单次读取帧数 {frames} 超过上限 {self.ring.max_read}")
+
+        ready = self.ring.wait_for(lambda: self.closed or self.available() >= frames, timeout)
+        if not ready or self.closed:
+            return None
+
+        # 读取过慢被套圈时，跳到缓冲区中间位置继续读取，并记录丢弃的帧数
+        lag = self.available()
+        if lag > self.ring.capacity - self.ring.max_read:
+            skip = lag - self.ring.capacity // 2
+            self.position += skip
+            self.dropped_frames += skip
+
+        data = self.ring.view(self.position, frames)
+        self.position += frames
+        return data
+
+    def read_bytes(self, frames: int, timeout: float = None):
+        """读取 frames 帧音频并返回字节串，供只接受 bytes 的接口（Kaldi、DashScope）使用"""
+        data = self.read(frames, timeout)
+        return None if data is None else data.tobytes()
+
+    def seek(self, position: int) -> None:
+        """把读指针移动到绝对位置 position（不早于缓冲区中最旧的有效数据）"""
+        oldest = max(0, self.ring.write_pos - self.ring.capacity + self.ring.max_read)
+        self.position = min(max(position, oldest), self.ring.write_pos)
+
+    def close(self) -> None:
+        self.closed = True
+        self.ring.wake_all()
+
+
+class AudioCapture(AudioSource):
+    """
+    进程级音频采集服务，即麦克风实时输入源。
+    只打开一次输入设备，以回调方式把音频写入环形缓冲区，之后所有消费者通过 open_reader() 获取读取器。
+    """
+
+    def __init__(self, sample_rate: int = 16000, device_name: str = "USB PnP Audio Device",
+                 buffer_seconds: float = 10.0, device_index: int = None):
+        """
+        Args:
+            sample_rate (int, optional): 期望采样率，设备不支持时使用设备默认采样率. Defaults to 16000.
+            device_name (str, optional): 目标输入设备名称. Defaults to "USB PnP Audio Device".
+            buffer_seconds (float, optional): 环形缓冲区保存的音频时长. Defaults to 10.0.
+            device_index (int, optional): 直接指定设备索引，指定后不再扫描设备.
+        """
+        if device_index is None:
+            from large_models_interfaces.get_device_and_rate import get_input_device
+            device_index, sample_rate = get_input_device(sample_rate, device_name)
+        self.device_index = device_index
+        self._sample_rate = sample_rate
+        self.frames_per_buffer = sample_rate // 50  # 20ms 一次回调
+        self.ring = RingBuffer(int(buffer_seconds * sample_rate), sample_rate)
+        self.overflow_count = 0  # 设备层面的输入溢出次数
+        self._p = None
+        self._stream = None
+        self._lock = threading.Lock()
+        self._readers = []
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def position(self) -> int:
+        """当前已采集的总帧数，可作为音频时间轴上的绝对位置"""
+        return self.ring.write_pos
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        if status & pyaudio.paInputOverflow:
+            self.overflow_count += 1
+        return (None, pyaudio.paContinue)
+
+    def start(self) -> None:
+        """打开输入流（已打开时直接返回）"""
+        with self._lock:
+            if self._stream is not None:
+                return
+            if pyaudio is None:
+                raise RuntimeError("未安装 pyaudio，无法打开麦克风")
+            self._p = pyaudio.PyAudio()
+            self._stream = self._p.open(format=pyaudio.paInt16,
+                                        channels=1,
+                                        rate=self.sample_rate,
+                                        input=True,
+                                        frames_per_buffer=self.frames_per_buffer,
+                                        input_device_index=self.device_index,
+                                        stream_callback=self._callback)
+            self._stream.start_stream()
+            print(f"音频采集服务已启动: 设备 {self.device_index}, {self.sample_rate}Hz")
+
+    def stop(self) -> None:
+        """关闭输入流并唤醒所有读取器"""
+        with self._lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers = []
+            if self._stream is not None:
+                self._stream.stop_stream()
+                self._stream.close()
+                self._stream = None
+            if self._p is not None:
+                self._p.terminate()
+                self._p = None
+
+    def open_reader(self, preroll_frames: int = 0) -> RingReader:
+        """
+        创建一个新的读取器。
+        Args:
+            preroll_frames (int, optional): 读指针相对当前位置回退的帧数，用于取回已经采集到的音频.
+        Returns:
+            RingReader: 读取器，使用完后调用 close_reader() 或 reader.close()。
+        """
+        self.start()
+        reader = RingReader(self.ring, self.ring.write_pos, self.sample_rate)
+        if preroll_frames > 0:
+            reader.seek(self.ring.write_pos - preroll_frames)
+        with self._lock:
+            self._readers.append(reader)
+        return reader
+
+    def close_reader(self, reader: RingReader) -> None:
+        reader.close()
+        with self._lock:
+            if reader in self._readers:
+                self._readers.remove(reader)
+
+
+_capture = None
+_capture_lock = threading.Lock()
+
+
+def get_audio_capture(sample_rate: int = 16000, device_name: str = "USB PnP Audio Device") -> AudioCapture:
+    """
+    获取进程级共享的音频采集服务，首次调用时创建。
+    之后的调用直接返回同一实例，参数只在首次调用时生效。
+    """
+    global _capture
+    with _capture_lock:
+        if _capture is None:
+            _capture = AudioCapture(sample_rate=sample_rate, device_name=device_name)
+        return _capture
+
+
+def shutdown_audio_capture() -> None:
+    """关闭共享的音频采集服务，一般在程序退出时调用"""
+    global _capture
+    with _capture_lock:
+        if _capture is not None:
+            _capture.stop()
+            _capture = None
+
+
+if __name__ == "__main__":
+    capture = get_audio_capture()
+    reader = capture.open_reader()
+    chunk = capture.sample_rate // 10
+    print("开始采集，按 Ctrl+C 结束")
+    try:
+        while True:
+            data = reader.read(chunk)
+            vol_bar = "|" * min(20, int(np.max(np.abs(data.astype(np.int32))) / 500))
+            print(f"\r位置: {reader.position:>10d} 丢帧: {reader.dropped_frames} 音量: [{vol_bar:<20}]", end="")
+    except KeyboardInterrupt:
+        print()
+    finally:
+        shutdown_audio_capture()
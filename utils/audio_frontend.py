@@ -0,0 +1,143 @@
+"""
+音频前端处理工具 V2.0
+核心功能是在音频送入识别引擎前做信号调理：高通去直流、基于学习到的噪声谱做谱减降噪、自动增益控制（AGC）。
+按帧流式处理并保留状态，全部运算为 NumPy 向量化，每个消费者可以按需开关。
+"""
+
+import numpy as np
+
+
+class AudioFrontEnd:
+    """
+    短时傅里叶变换域的流式前端。
+    使用 50% 重叠的平方根汉宁窗做分析与合成，不做任何处理时可以完美重建原信号，
+    输出相对输入固定延迟 frame_len 个样本。
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 32, highpass: bool = True,
+                 noise_suppression: bool = True, agc: bool = True, highpass_hz: float = 80.0,
+                 over_subtraction: float = 2.0, gain_floor: float = 0.1, noise_learn_ms: int = 200,
+                 target_dbfs: float = -20.0, max_gain_db: float = 20.0, min_gain_db: float = -10.0):
+        """
+        Args:
+            sample_rate (int, optional): 采样率. Defaults to 16000.
+            frame_ms (int, optional): 分析帧长，帧移为其一半. Defaults to 32.
+            highpass (bool, optional): 是否启用高通（去直流）. Defaults to True.
+            noise_suppression (bool, optional): 是否启用谱减降噪. Defaults to True.
+            agc (bool, optional): 是否启用自动增益. Defaults to True.
+            highpass_hz (float, optional): 高通截止频率. Defaults to 80.0.
+            over_subtraction (float, optional): 谱减过减因子. Defaults to 2.0.
+            gain_floor (float, optional): 降噪增益下限，防止把噪声减成“音乐噪声”. Defaults to 0.1.
+            noise_learn_ms (int, optional): 噪声帧上噪声谱的跟踪时间常数，人声帧上放慢50倍. Defaults to 200.
+            target_dbfs (float, optional): AGC 目标电平. Defaults to -20.0.
+            max_gain_db (float, optional): AGC 最大增益. Defaults to 20.0.
+            min_gain_db (float, optional): AGC 最小增益. Defaults to -10.0.
+        """
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000 // 2 * 2
+        self.hop = self.frame_len // 2
+        self.highpass = highpass
+        self.noise_suppression = noise_suppression
+        self.agc = agc
+        self.over_subtraction = over_subtraction
+        self.gain_floor = gain_floor
+
+        hop_ms = 1000 * self.hop / sample_rate
+        self.noise_alpha = min(1.0, hop_ms / noise_learn_ms)
+        self.target_rms = 32768.0 * 10 ** (target_dbfs / 20)
+        self.max_gain = 10 ** (max_gain_db / 20)
+        self.min_gain = 10 ** (min_gain_db / 20)
+        self.agc_attack = min(1.0, hop_ms / 20.0)  # 增益下降（声音变大）时快速响应
+        self.agc_release = min(1.0, hop_ms / 500.0)  # 增益上升时缓慢响应，避免放大停顿中的噪声
+
+        self.window = np.sqrt(np.hanning(self.frame_len + 1)[:-1]).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_len, 1.0 / sample_rate)
+        # 截止频率以下的频点按余弦平滑衰减到0，避免硬截断引入振铃
+        ramp = np.clip(freqs / highpass_hz, 0.0, 1.0)
+        self.highpass_gain = (0.5 - 0.5 * np.cos(np.pi * ramp)).astype(np.float32)
+        self.reset()
+
+    def reset(self, keep_noise_profile: bool = True) -> None:
+        """清空帧缓存；默认保留已学习的噪声谱和AGC增益，新的一句话可以立即受益"""
+        self._input = np.zeros(self.frame_len - self.hop, dtype=np.float32)
+        self._overlap = np.zeros(self.frame_len - self.hop, dtype=np.float32)
+        if not keep_noise_profile or not hasattr(self, "noise_psd"):
+            self.noise_psd = None
+            self.gain = 1.0
+
+    def learn_noise(self, samples: np.ndarray) -> None:
+        """用一段只包含背景噪声的音频直接设定噪声谱（例如开机时录制的静音）"""
+        n_frames = (len(samples) - self.frame_len) // self.hop + 1
+        if n_frames <= 0:
+            return
+        frames = np.lib.stride_tricks.sliding_window_view(samples.astype(np.float32), self.frame_len)[::self.hop]
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        self.noise_psd = np.mean(np.abs(spectrum) ** 2, axis=0)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        处理一块 int16 音频
+        Returns:
+            np.ndarray: 处理后的 int16 音频，长度为本次凑齐的帧数 × 帧移
+        """
+        buffer = np.concatenate([self._input, samples.astype(np.float32)])
+        n_frames = (len(buffer) - self.frame_len) // self.hop + 1
+        if n_frames <= 0:
+            self._input = buffer
+            return np.zeros(0, dtype=np.int16)
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_len)[::self.hop][:n_frames]
+        self._input = buffer[n_frames * self.hop:]
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+
+        if self.highpass:
+            spectrum *= self.highpass_gain
+
+        if self.noise_suppression:
+            spectrum *= self._suppression_gain(np.abs(spectrum) ** 2)
+
+        # 逐帧重叠相加合成
+        synthesized = np.fft.irfft(spectrum, n=self.frame_len, axis=1).astype(np.float32) * self.window
+        out = np.empty(n_frames * self.hop, dtype=np.float32)
+        overlap = self._overlap
+        for i in range(n_frames):
+            out[i * self.hop:(i + 1) * self.hop] = overlap + synthesized[i, :self.hop]
+            overlap = synthesized[i, self.hop:]
+        self._overlap = overlap
+
+        if self.agc:
+            out = self._apply_agc(out, n_frames)
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+    def _suppression_gain(self, power: np.ndarray) -> np.ndarray:
+        """根据噪声谱计算每帧每个频点的谱减增益，同时更新噪声谱"""
+        gains = np.empty_like(power, dtype=np.float32)
+        for i, frame_power in enumerate(power):
+            if self.noise_psd is None:
+                self.noise_psd = frame_power.copy()
+            # 噪声谱学习：能量接近噪声估计的帧视为噪声帧，正常速度跟踪；
+            # 明显更响的帧（人声）放慢50倍，持续出现的新噪声（如风扇启动）最终仍会被学到
+            is_noise = np.sum(frame_power) < 2.0 * np.sum(self.noise_psd)
+            alpha = self.noise_alpha if is_noise else self.noise_alpha / 50
+            self.noise_psd += alpha * (frame_power - self.noise_psd)
+            gain = 1.0 - self.over_subtraction * self.noise_psd / (frame_power + 1e-9)
+            gains[i] = np.sqrt(np.maximum(gain, self.gain_floor ** 2))
+        return gains
+
+    def _apply_agc(self, out: np.ndarray, n_frames: int) -> np.ndarray:
+        """按帧移分块计算电平，增益在块内线性过渡，避免增益跳变产生咔哒声"""
+        blocks = out.reshape(n_frames, self.hop)
+        rms = np.sqrt(np.mean(blocks * blocks, axis=1)) + 1e-6
+        noise_rms = np.sqrt(np.sum(self.noise_psd) * 4 / self.frame_len ** 2) if self.noise_psd is not None else 0.0
+        gains = np.empty(n_frames + 1, dtype=np.float32)
+        gains[0] = self.gain
+        for i in range(n_frames):
+            # 只在明显高于噪声的块上调整增益，静音段保持原增益
+            if rms[i] > 2 * noise_rms:
+                desired = np.clip(self.target_rms / rms[i], self.min_gain, self.max_gain)
+                rate = self.agc_attack if desired < self.gain else self.agc_release
+                self.gain += rate * (desired - self.gain)
+            gains[i + 1] = self.gain
+        ramp = np.linspace(0.0, 1.0, self.hop, endpoint=False, dtype=np.float32)
+        block_gains = gains[:-1, None] + (gains[1:] - gains[:-1])[:, None] * ramp
+        return (blocks * block_gains).reshape(-1)
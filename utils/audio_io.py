@@ -0,0 +1,318 @@
+"""
+音频输入输出抽象 V2.0
+核心功能是把语音模块与具体的音频设备解耦。
+输入端（AudioSource）：麦克风实时采集（utils.audio_capture.AudioCapture）或 WAV/PCM 文件回放（FileSource），
+回放可以按实时速度，也可以尽可能快，便于在没有人对着机器人说话时批量回放录音语料进行测试。
+输出端（AudioSink）：扬声器播放（SpeakerSink）、丢弃（NullSink）或写入文件（WavFileSink）。
+"""
+
+import os
+import time
+import wave
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+
+class AudioSource(ABC):
+    """
+    音频输入源。
+    所有输入源共享同一套读取器接口：open_reader() 返回的读取器提供
+    read(frames, timeout) / read_bytes(frames, timeout) / available() / seek(position) / close()，
+    以及 position（下一次读取的绝对帧位置）、sample_rate、dropped_frames 属性。
+    """
+
+    @property
+    @abstractmethod
+    def sample_rate(self) -> int:
+        '''
+        return:
+            int: 输入源的采样率
+        '''
+        pass
+
+    @property
+    @abstractmethod
+    def position(self) -> int:
+        '''
+        return:
+            int: 输入源当前的时间轴位置（已产生的总帧数）
+        '''
+        pass
+
+    @abstractmethod
+    def open_reader(self, preroll_frames: int = 0):
+        '''
+        创建一个从当前位置（向前回退 preroll_frames 帧）开始读取的读取器
+        '''
+        pass
+
+    def close_reader(self, reader) -> None:
+        reader.close()
+
+
+class AudioSink(ABC):
+    """音频输出端，按 open -> write* -> close 的顺序使用，可以反复打开"""
+
+    @abstractmethod
+    def open(self, sample_rate: int, channels: int = 1, sample_width: int = 2) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, data: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        """立即停止输出并丢弃尚未播放的数据，可以在其他线程中调用；默认等同于 close"""
+        self.close()
+
+
+def load_audio_file(path: str, sample_rate: int = None) -> tuple:
+    """
+    读取 WAV 或原始 PCM 文件为单声道 int16 数组
+    Args:
+        path (str): 文件路径，.wav 读取文件头，其余后缀按 16bit 单声道 PCM 处理。
+        sample_rate (int, optional): 原始 PCM 文件的采样率，WAV 文件忽略该参数.
+    Returns:
+        tuple: (np.ndarray 样本, 采样率)
+    """
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"只支持16bit WAV文件: {path}")
+            channels = wf.getnchannels()
+            sample_rate = wf.getframerate()
+            data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        if channels > 1:
+            data = data.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        return data, sample_rate
+
+    if sample_rate is None:
+        raise ValueError(f"读取原始PCM文件需要指定采样率: {path}")
+    return np.fromfile(path, dtype=np.int16), sample_rate
+
+
+class FileSource(AudioSource):
+    """
+    文件回放输入源。
+    speed=1.0 时按真实时间推进，行为与麦克风一致；speed=None 时尽可能快，
+    此时时间轴随读取推进，数据读完后读取器返回 None，相当于麦克风被关闭。
+    """
+
+    def __init__(self, path: str = None, speed: float = None, sample_rate: int = None,
+                 samples: np.ndarray = None, tail_silence_ms: int = 0):
+        """
+        Args:
+            path (str, optional): WAV 或 PCM 文件路径.
+            speed (float, optional): 回放速度倍数，None 表示不限速. Defaults to None.
+            sample_rate (int, optional): 原始 PCM 文件或 samples 的采样率.
+            samples (np.ndarray, optional): 直接提供 int16 样本，代替文件.
+            tail_silence_ms (int, optional): 在末尾补充的静音时长，便于端点检测在文件结束前判定说话结束. Defaults to 0.
+        """
+        if samples is None:
+            samples, sample_rate = load_audio_file(path, sample_rate)
+        elif sample_rate is None:
+            raise ValueError("直接提供样本时需要指定采样率")
+        if tail_silence_ms > 0:
+            samples = np.concatenate([samples, np.zeros(sample_rate * tail_silence_ms // 1000, dtype=np.int16)])
+        self.path = path
+        self.samples = samples
+        self.speed = speed
+        self._sample_rate = sample_rate
+        self._consumed = 0  # 不限速模式下，所有读取器读到的最远位置
+        self._start_time = None
+        self._lock = threading.Lock()
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self._sample_rate
+
+    @property
+    def position(self) -> int:
+        if self.speed is None:
+            return self._consumed
+        if self._start_time is None:
+            return 0
+        elapsed = (time.monotonic() - self._start_time) * self.speed
+        return min(len(self.samples), int(elapsed * self._sample_rate))
+
+    def open_reader(self, preroll_frames: int = 0):
+        with self._lock:
+            if self._start_time is None:
+                self._start_time = time.monotonic()
+        reader = FileReader(self, self.position)
+        if preroll_frames > 0:
+            reader.seek(reader.position - preroll_frames)
+        return reader
+
+    def _advance(self, position: int) -> None:
+        with self._lock:
+            self._consumed = max(self._consumed, position)
+
+
+class FileReader:
+    """FileSource 的读取器，接口与 RingReader 一致"""
+
+    def __init__(self, source: FileSource, position: int):
+        self.source = source
+        self.position = position
+        self.sample_rate = source.sample_rate
+        self.dropped_frames = 0
+        self.closed = False
+
+    def available(self) -> int:
+        if self.source.speed is None:
+            return len(self.source.samples) - self.position
+        return self.source.position - self.position
+
+    def read(self, frames: int, timeout: float = None):
+        """读取 frames 帧，数据读完或读取器关闭时返回 None，最后不足一块的部分补零返回"""
+        total = len(self.source.samples)
+        if self.closed or self.position >= total:
+            return None
+
+        if self.source.speed is not None:
+            # 按回放速度等待数据“采集”完成
+            end = min(self.position + frames, total)
+            wait = (end / self.sample_rate - (time.monotonic() - self.source._start_time) * self.source.speed) / self.source.speed
+            if timeout is not None and wait > timeout:
+                time.sleep(max(0.0, timeout))
+                return None
+            if wait > 0:
+                time.sleep(wait)
+
+        data = self.source.samples[self.position:self.position + frames]
+        if len(data) < frames:
+            data = np.concatenate([data, np.zeros(frames - len(data), dtype=np.int16)])
+        self.position += frames
+        self.source._advance(min(self.position, total))
+        return data
+
+    def read_bytes(self, frames: int, timeout: float = None):
+        data = self.read(frames, timeout)
+        return None if data is None else data.tobytes()
+
+    def seek(self, position: int) -> None:
+        self.position = min(max(0, position), len(self.source.samples))
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class SpeakerSink(AudioSink):
+    """
+    通过 PyAudio 输出到扬声器。
+    写入时按约20ms分块，abort() 最多等待一小块写完即可关闭输出流并丢弃缓冲中尚未播放的音频。
+    """
+
+    WRITE_MS = 20  # 每次写入声卡的时长
+
+    def __init__(self, output_device_index: int = None):
+        self.output_device_index = output_device_index
+        self._p = None
+        self._stream = None
+        self._write_bytes = 0
+        self._aborted = False
+        self._lock = threading.Lock()
+
+    def open(self, sample_rate: int, channels: int = 1, sample_width: int = 2) -> None:
+        if pyaudio is None:
+            raise RuntimeError("未安装 pyaudio，无法打开扬声器")
+        with self._lock:
+            self._aborted = False
+            self._write_bytes = sample_rate * self.WRITE_MS // 1000 * channels * sample_width
+            self._p = pyaudio.PyAudio()
+            self._stream = self._p.open(format=self._p.get_format_from_width(sample_width),
+                                        channels=channels,
+                                        rate=sample_rate,
+                                        output=True,
+                                        output_device_index=self.output_device_index)
+
+    def write(self, data: bytes) -> None:
+        for i in range(0, len(data), self._write_bytes):
+            with self._lock:
+                if self._aborted or self._stream is None:
+                    return
+                self._stream.write(data[i:i + self._write_bytes])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._stream is not None:
+                self._stream.stop_stream()  # 等待缓冲中的音频播放完毕
+            self._release()
+
+    def abort(self) -> None:
+        with self._lock:
+            self._aborted = True
+            # 不先停止就关闭输出流，PortAudio 会直接丢弃尚未播放的缓冲
+            self._release()
+
+    def _release(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._p is not None:
+            self._p.terminate()
+            self._p = None
+
+
+class NullSink(AudioSink):
+    """丢弃所有输出，只统计写入的数据量"""
+
+    def __init__(self):
+        self.bytes_written = 0
+        self.sample_rate = None
+
+    def open(self, sample_rate: int, channels: int = 1, sample_width: int = 2) -> None:
+        self.sample_rate = sample_rate
+
+    def write(self, data: bytes) -> None:
+        self.bytes_written += len(data)
+
+    def close(self) -> None:
+        pass
+
+
+class WavFileSink(AudioSink):
+    """
+    把输出写入 WAV 文件。
+    path 中可以包含 {n}，每次 open 时替换为递增的序号，从而把多次播放分别保存。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.last_path = None
+        self._wf = None
+
+    def open(self, sample_rate: int, channels: int = 1, sample_width: int = 2) -> None:
+        self.last_path = self.path.format(n=self.count)
+        self.count += 1
+        output_dir = os.path.dirname(self.last_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self._wf = wave.open(self.last_path, "wb")
+        self._wf.setnchannels(channels)
+        self._wf.setsampwidth(sample_width)
+        self._wf.setframerate(sample_rate)
+
+    def write(self, data: bytes) -> None:
+        self._wf.writeframes(data)
+
+    def close(self) -> None:
+        if self._wf is not None:
+            self._wf.close()
+            self._wf = None
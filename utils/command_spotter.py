@@ -0,0 +1,209 @@
+"""
+本地语音指令识别工具 V2.0
+核心功能是在唤醒之后直接在本地识别简单的动作指令（"前进"、"挥手"、"鞠躬"……），
+不经过云端语音识别和大模型：用 resources/ActionGroupDict.py 中动作的中文名称构建 Vosk 语法，
+识别器只在这些指令和 [unk] 之间搜索，一句话说完即可得到结果，再直接交给动作执行器。
+只有整句恰好是一个指令、且置信度足够高时才算识别成功；其他情况（长句、多个动作、置信度低）
+返回 None，由调用方回退到云端识别，原始音频仍保留在采集缓冲区中。
+唤醒提示音播放期间，残留的回声会被 VAD 当作人声、被识别器当作 [unk]，因此提示音（回声参考信号）
+播完之前不判断指令是否说完，说完和无人声的计时从提示音结束时开始。
+"""
+
+import os
+import sys
+import json
+import importlib.util
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+
+sys.path.append(parent_dir)
+
+from utils.audio_capture import get_audio_capture
+from utils.resampler import StreamingResampler
+from utils.vad import AdaptiveEnergyVAD
+from utils.vosk_registry import get_vosk_registry
+from utils.asr_vosk import build_grammar
+
+TARGET_SAMPLE_RATE = 16000
+ACTION_GROUP_DICT_PATH = os.path.join(parent_dir, "resources", "ActionGroupDict.py")
+MIN_COMMAND_CHARS = 2  # 单字指令（"布"、"哭"）太容易被误识别，默认不参与本地识别
+
+
+def load_action_commands(path: str = ACTION_GROUP_DICT_PATH, min_chars: int = MIN_COMMAND_CHARS) -> dict:
+    """
+    读取动作组字典中的中文名称
+    按文件路径加载，避免与机器人系统目录（TonyPi）中同名的 ActionGroupDict 模块混淆
+    Returns:
+        dict: {中文名称: 动作编号}
+    """
+    spec = importlib.util.spec_from_file_location("resources_action_group_dict", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    commands = {}
+    for action_id, name in module.action_chinese_name_dict.items():
+        if len(name) >= min_chars and action_id in module.action_group_dict:
+            commands.setdefault(name, action_id)
+    return commands
+
+
+class CommandResult:
+    """一次本地指令识别的结果"""
+
+    def __init__(self, name, action_id, confidence, text):
+        self.name = name  # 指令的中文名称
+        self.action_id = action_id  # 动作编号（action_group_dict 的键）
+        self.confidence = confidence  # 指令中各字置信度的最小值
+        self.text = text  # 识别器的原始结果
+
+    def __repr__(self):
+        return f"CommandResult({self.name!r}, action_id={self.action_id}, confidence={self.confidence:.2f})"
+
+
+class CommandSpotter:
+    def __init__(self, model_path, commands=None, sample_rate=16000, audio_source=None, echo_canceller=None,
+                 frontend=None, min_confidence=0.8, timeout_ms=3000, end_silence_ms=500, hop_ms=64):
+        """
+        model_path: Vosk 模型路径，与热词检测共用同一个已加载的模型
+        commands: {中文名称: 动作编号}，默认读取 resources/ActionGroupDict.py
+        sample_rate: 期望的采集采样率，默认16000；进程内首次创建采集服务时生效
+        audio_source: 音频输入源，默认使用共享的麦克风采集服务
+        echo_canceller: 可选的回声消除器（唤醒提示音播放期间也能识别指令）
+        frontend: 可选的音频前端
+        min_confidence: 本地执行所需的最低置信度，默认0.8，低于该值回退到云端
+        timeout_ms: 一直没有说话时的最长等待时间，默认3000ms
+        end_silence_ms: 说话后静音达到该时长认为指令说完，默认500ms
+        hop_ms: 每次读取的音频时长，默认64ms
+        """
+        self.model_path = model_path
+        self.commands = commands if commands is not None else load_action_commands()
+        self.audio_source = audio_source if audio_source is not None else get_audio_capture(sample_rate)
+        self.sample_rate = TARGET_SAMPLE_RATE
+        self.resampler = StreamingResampler(self.audio_source.sample_rate, self.sample_rate)
+        self.echo_canceller = echo_canceller
+        self.frontend = frontend
+        self.min_confidence = min_confidence
+        self.vad = AdaptiveEnergyVAD(sample_rate=self.sample_rate, end_silence_ms=end_silence_ms,
+                                     no_speech_timeout_ms=timeout_ms)
+        self.frames_per_buffer = hop_ms * self.audio_source.sample_rate // 1000
+        self.rec = get_vosk_registry().create_recognizer(model_path, self.sample_rate, build_grammar(self.commands))
+        self.rec.SetWords(True)
+        self.last_result = None  # 最近一次识别的原始结果（无论是否成功），便于调试
+
+    def _parse(self, result: str):
+        """由识别器的最终结果得到指令，整句不是单个指令或置信度不足时返回 None"""
+        try:
+            result = json.loads(result)
+        except Exception:
+            return None
+        words = result.get("result") or []
+        if not words or any(w.get("word") == "[unk]" for w in words):
+            return None
+        name = "".join(w.get("word", "") for w in words)
+        action_id = self.commands.get(name)
+        if action_id is None:
+            return None
+        confidence = min(w.get("conf", 0.0) for w in words)
+        return CommandResult(name, action_id, confidence, result.get("text", ""))
+
+    def _playback_active(self) -> bool:
+        """回声参考信号在当前处理位置上是否仍有播放（包括滤波器覆盖的混响拖尾）"""
+        canceller = self.echo_canceller
+        if canceller is None:
+            return False
+        return canceller.position < canceller.reference.end + canceller.partitions * canceller.block_size
+
+    def listen_for_command(self, start_position=None, stop_event=None):
+        """
+        识别一句指令（阻塞直到说完、超时或出现指令以外的内容）
+        Args:
+            start_position (int, optional): 从采集时间轴上的该位置开始识别，一般为唤醒时刻，
+                这样"小新小新，前进"连着说也不会漏掉. Defaults to None（当前时刻）.
+            stop_event (threading.Event, optional): 置位后停止识别并返回 None.
+        Returns:
+            CommandResult: 识别到的指令；不是单个已知指令或置信度不足时返回 None
+        """
+        reader = self.audio_source.open_reader()
+        if start_position is not None:
+            reader.seek(start_position)
+        self.resampler.reset()
+        self.vad.reset()
+        self.rec.Reset()
+        if self.echo_canceller is not None:
+            self.echo_canceller.reset(reader.position)
+        if self.frontend is not None:
+            self.frontend.reset()
+        final = None
+        was_playing = False
+        try:
+            while stop_event is None or not stop_event.is_set():
+                data = reader.read(self.frames_per_buffer)
+                if data is None:
+                    break
+                samples = self.resampler.process(data)
+                if self.echo_canceller is not None:
+                    samples = self.echo_canceller.process(samples)
+                if self.frontend is not None:
+                    samples = self.frontend.process(samples)
+                playing = self._playback_active()
+                self.vad.process(samples)
+                if self.rec.AcceptWaveform(samples.tobytes()):
+                    final = self.rec.Result()
+                    if not playing or self._parse(final) is not None:
+                        break
+                    final = None  # 提示音期间按回声断出的句子，不是指令就丢弃，继续等待
+                if playing:
+                    was_playing = True
+                    continue
+                if was_playing:
+                    # 提示音刚播完：之前的"人声"多半是回声残留，从这里重新开始计算说完和无人声的时长；
+                    # 提示音期间的识别结果结算一次，是指令（用户抢在提示音里说的）就采用，否则丢弃
+                    was_playing = False
+                    self.vad.reset()
+                    final = self.rec.FinalResult()
+                    if self._parse(final) is not None:
+                        break
+                    final = None
+                # 已经出现指令以外的内容，不必等说完，直接交给云端
+                if "[unk]" in json.loads(self.rec.PartialResult()).get("partial", ""):
+                    break
+                if self.vad.utterance_ended:
+                    break
+        finally:
+            self.audio_source.close_reader(reader)
+        if final is None:
+            final = self.rec.FinalResult()
+        self.rec.Reset()
+        self.last_result = final
+        command = self._parse(final)
+        if command is None or command.confidence < self.min_confidence:
+            print(f"本地指令未识别（{final.strip() if final else ''}），交给云端处理")
+            return None
+        print(f"本地指令: {command}")
+        return command
+
+
+def execute_command(command: CommandResult, executor=None) -> None:
+    """
+    把识别到的指令交给动作执行器执行
+    Args:
+        command (CommandResult): 本地识别到的指令。
+        executor (ActionExecutor, optional): 动作执行器，默认新建一个（不播报）.
+    """
+    if executor is None:
+        # 延迟导入：动作执行器在导入时会修改 ALSA 相关的环境变量
+        sys.path.append(os.path.join(parent_dir, "action_seq"))
+        from action_seq.action_executor import ActionExecutor
+        executor = ActionExecutor()
+    executor.execute_sequence([{"sequence_id": 1, "action_id": command.action_id}])
+
+
+if __name__ == "__main__":
+    spotter = CommandSpotter("../models/vosk-model-small-cn-0.22", sample_rate=48000)
+    print(f"可识别的指令: {'、'.join(spotter.commands)}")
+    print("请说出一个动作指令……")
+    result = spotter.listen_for_command()
+    if result is not None:
+        execute_command(result)
@@ -0,0 +1,268 @@
+"""
+回声消除工具 V2.0
+核心功能是让机器人在播放语音的同时也能听：把扬声器正在播放的音频作为参考信号，
+用自适应滤波器估计它经过房间传到麦克风的回声，并从麦克风信号中减去。
+播放端通过 ReferenceSink 把音频记录到 EchoReference（按采集时间轴对齐），
+识别端为每个消费者创建一个 EchoCanceller，在重采样到16kHz之后、其他处理之前调用；
+只在短提示音期间工作的消费者用 fork() 从持续工作的消费者（热词检测）继承已收敛的滤波器。
+自适应滤波采用分块频域 NLMS（分段块频域自适应滤波器），全部运算为 NumPy 向量化。
+"""
+
+import threading
+import numpy as np
+
+from utils.audio_io import AudioSink
+from utils.resampler import StreamingResampler
+
+
+class EchoReference:
+    """
+    播放参考信号的时间轴缓存。
+    参考信号以16kHz保存，位置与采集时间轴一一对应（采集帧数按采样率换算），
+    没有播放的时段视为静音。
+    """
+
+    def __init__(self, audio_source, sample_rate: int = 16000, buffer_seconds: float = 10.0,
+                 delay_ms: int = 0):
+        """
+        Args:
+            audio_source: 麦克风输入源（utils.audio_io.AudioSource），用于确定播放开始时对应的采集位置。
+            sample_rate (int, optional): 参考信号的采样率，与回声消除处理的采样率一致. Defaults to 16000.
+            buffer_seconds (float, optional): 参考信号保留的时长，需覆盖识别端最大的积压. Defaults to 10.0.
+            delay_ms (int, optional): 已知的播放延迟（写入声卡到真正发声），未知部分由滤波器长度覆盖. Defaults to 0.
+        """
+        self.audio_source = audio_source
+        self.sample_rate = sample_rate
+        self.capacity = int(sample_rate * buffer_seconds)
+        self.delay = sample_rate * delay_ms // 1000
+        self._buffer = np.zeros(self.capacity, dtype=np.float32)
+        self.end = 0  # 最后写入的参考信号之后的位置
+        self._lock = threading.Lock()
+
+    def capture_to_reference(self, capture_position: int) -> int:
+        """把采集时间轴上的位置（采集采样率下的帧数）换算为参考信号的位置"""
+        return capture_position * self.sample_rate // self.audio_source.sample_rate
+
+    @property
+    def now(self) -> int:
+        return self.capture_to_reference(self.audio_source.position)
+
+    def _put(self, position: int, data: np.ndarray) -> None:
+        index = position % self.capacity
+        first = min(len(data), self.capacity - index)
+        self._buffer[index:index + first] = data[:first]
+        self._buffer[:len(data) - first] = data[first:]
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        记录一段即将播放的16kHz参考信号
+        紧接上一段播放时追加在其后，否则从当前采集位置（加上已知延迟）开始
+        Returns:
+            int: 这段参考信号在时间轴上的起点
+        """
+        samples = samples[-self.capacity:].astype(np.float32)
+        with self._lock:
+            position = max(self.end, self.now + self.delay)
+            gap = min(position - self.end, self.capacity)
+            if gap > 0:
+                self._put(position - gap, np.zeros(gap, dtype=np.float32))
+            self._put(position, samples)
+            self.end = position + len(samples)
+        return position
+
+    def truncate(self) -> None:
+        """播放被中止：丢弃当前时刻之后尚未播放的参考信号"""
+        with self._lock:
+            position = max(self.now + self.delay, self.end - self.capacity)
+            if position < self.end:
+                self._put(position, np.zeros(self.end - position, dtype=np.float32))
+                self.end = position
+
+    def read(self, position: int, frames: int) -> np.ndarray:
+        """读取时间轴上 [position, position + frames) 的参考信号，超出已记录范围的部分为0"""
+        out = np.zeros(frames, dtype=np.float32)
+        with self._lock:
+            start = max(position, self.end - self.capacity, 0)
+            stop = min(position + frames, self.end)
+            if stop <= start:
+                return out
+            index = start % self.capacity
+            count = stop - start
+            first = min(count, self.capacity - index)
+            offset = start - position
+            out[offset:offset + first] = self._buffer[index:index + first]
+            out[offset + first:offset + count] = self._buffer[:count - first]
+        return out
+
+
+class ReferenceSink(AudioSink):
+    """
+    包装另一个输出端：写入扬声器的同时把音频（转为单声道16kHz）记录到 EchoReference。
+    只支持16bit音频，其余位宽直接透传。
+    """
+
+    def __init__(self, sink: AudioSink, reference: EchoReference):
+        self.sink = sink
+        self.reference = reference
+        self._channels = 1
+        self._resampler = None
+
+    def open(self, sample_rate: int, channels: int = 1, sample_width: int = 2) -> None:
+        self.sink.open(sample_rate, channels, sample_width)
+        self._channels = channels
+        self._resampler = StreamingResampler(sample_rate, self.reference.sample_rate) if sample_width == 2 else None
+
+    def write(self, data: bytes) -> None:
+        # 先记录再写入：阻塞式写入返回时这段音频已经开始播放
+        resampler = self._resampler
+        if resampler is not None:
+            samples = np.frombuffer(data, dtype=np.int16)
+            if self._channels > 1:
+                samples = samples[:len(samples) // self._channels * self._channels]
+                samples = samples.reshape(-1, self._channels).mean(axis=1).astype(np.int16)
+            self.reference.write(resampler.process(samples))
+        self.sink.write(data)
+
+    def close(self) -> None:
+        self.sink.close()
+        self._resampler = None
+
+    def abort(self) -> None:
+        self._resampler = None  # 中止后仍可能有数据写入，不再记录为参考信号
+        self.sink.abort()
+        self.reference.truncate()
+
+
+class EchoCanceller:
+    """
+    分块频域 NLMS 回声消除器。
+    每块 block_size 个样本，滤波器被切成 filter_ms / block_size 段，在频域并行计算和更新。
+    参考信号为0（没有播放）时直接透传，几乎不消耗CPU。
+    双讲（播放时有人说话）处理采用双滤波器结构：后台滤波器始终自适应，
+    只有当它的残差明显小于前台滤波器时才复制到前台，输出始终取前台滤波器的残差；
+    双讲时后台滤波器发散，残差变大，前台滤波器保持不变，后台滤波器随后被前台滤波器恢复。
+    """
+
+    def __init__(self, reference: EchoReference, block_size: int = 256, filter_ms: int = 256,
+                 step_size: float = 0.3, copy_margin_db: float = 1.0, diverge_db: float = 6.0,
+                 source: "EchoCanceller" = None):
+        """
+        Args:
+            reference (EchoReference): 播放参考信号。
+            block_size (int, optional): 每块样本数，决定处理延迟. Defaults to 256.
+            filter_ms (int, optional): 滤波器覆盖的回声时长，需大于播放延迟与房间混响之和. Defaults to 256.
+            step_size (float, optional): NLMS 步长(0~1)，越大收敛越快、稳态误差越大. Defaults to 0.3.
+            copy_margin_db (float, optional): 后台滤波器残差比前台低多少分贝时复制到前台. Defaults to 1.0.
+            diverge_db (float, optional): 后台滤波器残差比前台高多少分贝时视为发散并用前台恢复. Defaults to 6.0.
+            source (EchoCanceller, optional): 共享回声路径估计的消费者，每次 reset() 时复制它已收敛的滤波器. Defaults to None.
+        """
+        self.reference = reference
+        self.block_size = block_size
+        self.filter_ms = filter_ms
+        self.copy_margin_db = copy_margin_db
+        self.diverge_db = diverge_db
+        self.source = source
+        self.partitions = max(1, reference.sample_rate * filter_ms // 1000 // block_size)
+        self.step_size = step_size
+        self.copy_ratio = 10 ** (-copy_margin_db / 10)
+        self.diverge_ratio = 10 ** (diverge_db / 10)
+
+        bins = block_size + 1
+        self.weights = np.zeros((self.partitions, bins), dtype=np.complex64)  # 前台滤波器（输出）
+        self._background = np.zeros((self.partitions, bins), dtype=np.complex64)  # 后台滤波器（自适应）
+
+        # 统计信息
+        self.erle_db = 0.0  # 回声抑制量（平滑值）
+        self.adapted_blocks = 0  # 有播放参考、参与了自适应的块数
+        self.reset()
+
+    def fork(self) -> "EchoCanceller":
+        """
+        创建一个共享回声路径估计的消费者（同一参考信号、同样的参数）
+        它每次 reset() 时从本消费者复制前台滤波器：本消费者在长时间播报期间持续自适应，
+        只在短提示音期间工作的消费者（语音识别、本地指令）也能从第一块起就消除回声
+        """
+        return EchoCanceller(self.reference, self.block_size, self.filter_ms, self.step_size,
+                             self.copy_margin_db, self.diverge_db, source=self)
+
+    def reset(self, capture_position: int = None, keep_filter: bool = True) -> None:
+        """
+        从采集时间轴上的 capture_position 开始处理新的音频流
+        默认保留已收敛的滤波器，回声路径通常不会变化
+        """
+        self.position = self.reference.now if capture_position is None else \
+            self.reference.capture_to_reference(capture_position)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._last_ref = np.zeros(self.block_size, dtype=np.float32)
+        self._spectra = np.zeros((self.partitions, self.block_size + 1), dtype=np.complex64)
+        self._ref_active = np.zeros(self.partitions, dtype=bool)  # 各段参考信号是否非零
+        self._power = np.zeros(self.block_size + 1, dtype=np.float32)
+        self._foreground_error = 0.0
+        self._background_error = 0.0
+        if not keep_filter:
+            self.weights[:] = 0
+            self._background[:] = 0
+        elif self.source is not None and self.source.adapted_blocks > 0:
+            # 回声路径相同，采用共享来源最新的估计（它见过的播放远多于本消费者）
+            self.weights[:] = self.source.weights
+            self._background[:] = self.weights
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        处理一块 int16 麦克风音频
+        Returns:
+            np.ndarray: 消除回声后的 int16 音频，长度为本次凑齐的块数 × block_size
+        """
+        buffer = np.concatenate([self._pending, samples.astype(np.float32)])
+        n_blocks = len(buffer) // self.block_size
+        self._pending = buffer[n_blocks * self.block_size:]
+        out = buffer[:n_blocks * self.block_size].copy()
+        for i in range(n_blocks):
+            block = out[i * self.block_size:(i + 1) * self.block_size]
+            block[:] = self._process_block(block)
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+    def _process_block(self, mic: np.ndarray) -> np.ndarray:
+        n = self.block_size
+        ref = self.reference.read(self.position, n)
+        self.position += n
+
+        self._ref_active[1:] = self._ref_active[:-1]
+        self._ref_active[0] = ref.any()
+        self._spectra[1:] = self._spectra[:-1]
+        if not self._ref_active.any():
+            # 整个滤波器长度内都没有播放，直接透传
+            self._last_ref = ref
+            self._spectra[0] = 0
+            return mic
+
+        self.adapted_blocks += 1
+        # 频域重叠保留：本段参考谱由上一块和本块参考信号拼接而成
+        self._spectra[0] = np.fft.rfft(np.concatenate([self._last_ref, ref]))
+        self._last_ref = ref
+        filters = np.stack([self.weights, self._background])
+        echoes = np.fft.irfft(np.sum(filters * self._spectra, axis=1), n=2 * n, axis=1)[:, n:]
+        error, background_error = mic - echoes
+
+        # 后台滤波器自适应，步长按各频点参考信号的平滑功率（所有分段之和）归一化
+        self._power = 0.9 * self._power + 0.1 * np.sum(np.abs(self._spectra) ** 2, axis=0)
+        error_spectrum = np.fft.rfft(np.concatenate([np.zeros(n, dtype=np.float32), background_error]))
+        gradient = np.conj(self._spectra) * (error_spectrum / (self._power + 1e-3 * n * n + 1.0))
+        # 梯度约束：时域只保留前一半，保证是线性卷积而不是循环卷积
+        constrained = np.fft.irfft(gradient, n=2 * n, axis=1)
+        constrained[:, n:] = 0
+        self._background += (self.step_size * np.fft.rfft(constrained, axis=1)).astype(np.complex64)
+
+        # 比较两个滤波器的平滑残差能量，决定复制方向
+        self._foreground_error = 0.7 * self._foreground_error + 0.3 * float(np.dot(error, error))
+        self._background_error = 0.7 * self._background_error + 0.3 * float(np.dot(background_error, background_error))
+        if self._background_error < self.copy_ratio * self._foreground_error:
+            self.weights[:] = self._background
+            self._foreground_error = self._background_error
+        elif self._background_error > self.diverge_ratio * self._foreground_error:
+            self._background[:] = self.weights
+            self._background_error = self._foreground_error
+
+        mic_energy = float(np.dot(mic, mic))
+        self.erle_db += 0.05 * (10 * np.log10((mic_energy + 1.0) / (float(np.dot(error, error)) + 1.0)) - self.erle_db)
+        return error
@@ -0,0 +1,90 @@
+"""
+端点检测策略 V2.0
+核心功能是综合三种信号判断用户一句话是否说完，尽早结束录音：
+    1. 识别服务返回了句末结果（sentence_end），并且本地 VAD 确认之后有一小段静音；
+    2. 本地 VAD 的静音计时达到结束时长（服务端没有给出句末结果时的兜底）；
+    3. 录音达到最长时长。
+服务端已经判定一句话结束时，不必再等满本地的静音计时，每轮对话可以节省1~2秒。
+句末结果到达后用户如果继续说话，则等待下一个句末结果。
+"""
+
+
+class EndpointPolicy:
+    """
+    用法：
+        endpointer = EndpointPolicy(vad)
+        endpointer.reset()
+        task.on_sentence = endpointer.on_sentence   # 识别结果的接收线程中调用
+        # 录音循环中：
+        vad.process(samples)
+        if endpointer.update():
+            print(endpointer.reason)
+    """
+
+    REASON_SENTENCE_END = "句末结果"
+    REASON_VAD = "本地静音"
+    REASON_NO_SPEECH = "无人声超时"
+    REASON_MAX_DURATION = "达到最长时长"
+
+    def __init__(self, vad, confirm_silence_ms: int = 300, resume_speech_ms: int = 200, max_duration_ms: int = 20000):
+        """
+        Args:
+            vad (VADInterface): 录音循环使用的 VAD（例如 AdaptiveEnergyVAD），只用到接口中声明的 is_speech、stats() 等成员。
+            confirm_silence_ms (int, optional): 收到句末结果后，本地还需确认的静音时长. Defaults to 300.
+            resume_speech_ms (int, optional): 句末结果之后又出现这么长的人声，认为用户还在继续说. Defaults to 200.
+            max_duration_ms (int, optional): 一轮录音的最长时长. Defaults to 20000.
+        """
+        self.vad = vad
+        self.confirm_silence_ms = confirm_silence_ms
+        self.resume_speech_ms = resume_speech_ms
+        self.max_duration_ms = max_duration_ms
+        self.reset()
+
+    def reset(self) -> None:
+        self._finals = 0  # 收到的句末结果数（接收线程中累加）
+        self._seen_finals = 0
+        self._armed_speech_ms = None  # 收到句末结果时已有的人声时长，None 表示尚未收到
+        self._armed_duration_ms = 0  # 收到句末结果时已处理的音频时长
+        self.reason = None  # 结束的原因
+        self.final_latency_ms = None  # 句末结果到达后又等待了多久才结束录音
+        self.final_source = None  # 最近一个句末结果的来源（"cloud" 或 "local"）
+
+    def on_sentence(self, sentence: dict, source: str = "cloud") -> None:
+        """传入识别服务返回的 sentence 字典，只关心非空的句末结果"""
+        if sentence.get("sentence_end") and sentence.get("text"):
+            self.final_source = source
+            self._finals += 1
+
+    def update(self) -> bool:
+        """
+        在每次 vad.process() 之后调用
+        Returns:
+            bool: 是否应当结束录音，结束原因见 reason
+        """
+        stats = self.vad.stats()
+        if self._finals > self._seen_finals:
+            self._seen_finals = self._finals
+            self._armed_speech_ms = stats.speech_ms
+            self._armed_duration_ms = stats.duration_ms
+        if self._armed_speech_ms is not None:
+            if stats.speech_ms - self._armed_speech_ms >= self.resume_speech_ms:
+                # 用户还在继续说，等待下一个句末结果
+                self._armed_speech_ms = None
+            elif not self.vad.is_speech and stats.trailing_silence_ms >= self.confirm_silence_ms:
+                self.final_latency_ms = stats.duration_ms - self._armed_duration_ms
+                self.reason = f"{self.REASON_SENTENCE_END}({self.final_source})"
+                return True
+        if self.vad.utterance_ended:
+            self.reason = self.REASON_VAD if stats.speech_start_ms is not None else self.REASON_NO_SPEECH
+            return True
+        if stats.duration_ms >= self.max_duration_ms:
+            self.reason = self.REASON_MAX_DURATION
+            return True
+        return False
+
+    def remaining_ms(self) -> float:
+        """距离结束录音还剩的时长（估计），用于倒计时显示"""
+        remaining = self.vad.remaining_ms()
+        if self._armed_speech_ms is not None:
+            remaining = min(remaining, max(0.0, self.confirm_silence_ms - self.vad.stats().trailing_silence_ms))
+        return remaining
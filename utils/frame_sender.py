@@ -0,0 +1,158 @@
+"""
+音频帧发送工具 V2.0
+核心功能是把音频上传从采集循环中剥离出来：采集线程只把音频放进有界队列，
+由独立的发送线程把小块音频合并成约100ms的数据包后再调用网络接口发送，
+网络卡顿时采集的节奏不受影响，队列满时丢弃最旧的数据并计数。
+"""
+
+import queue
+import threading
+import time
+
+
+class FrameSender:
+    """
+    独立发送线程。
+    用法：
+        sender = FrameSender(recognition.send_audio_frame, bytes_per_second=32000)
+        sender.start()
+        sender.put(data)  # 在采集循环中调用，不会阻塞
+        sender.stop()     # 发送完队列中剩余的数据后退出
+        sender.abort()    # 或者：丢弃剩余的数据，不等待发送线程
+    """
+
+    def __init__(self, send_func, bytes_per_second: int = 32000, packet_ms: int = 100,
+                 max_queue_ms: int = 5000):
+        """
+        Args:
+            send_func: 发送函数，接收一个 bytes 参数。
+            bytes_per_second (int, optional): 音频码率，16kHz 16bit 单声道为 32000. Defaults to 32000.
+            packet_ms (int, optional): 合并后每个数据包的时长. Defaults to 100.
+            max_queue_ms (int, optional): 队列最多缓存的音频时长，超出时丢弃最旧的数据. Defaults to 5000.
+        """
+        self.send_func = send_func
+        self.packet_bytes = bytes_per_second * packet_ms // 1000
+        self.bytes_per_second = bytes_per_second
+        self.max_queue_bytes = bytes_per_second * max_queue_ms // 1000
+        self._queue = queue.Queue()
+        self._queued_bytes = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._aborted = False
+        self.error = None  # 发送线程中出现的异常
+
+        # 统计信息
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.dropped_bytes = 0
+        self.max_queue_depth_ms = 0
+        self.max_send_ms = 0.0  # 单次发送的最长耗时
+
+    @property
+    def queue_depth_ms(self) -> int:
+        """当前队列中积压的音频时长"""
+        return self._queued_bytes * 1000 // self.bytes_per_second
+
+    @property
+    def dropped_ms(self) -> int:
+        return self.dropped_bytes * 1000 // self.bytes_per_second
+
+    def start(self) -> None:
+        self.error = None
+        self._aborted = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, data: bytes) -> None:
+        """放入一块音频，队列积压超过上限时丢弃最旧的数据"""
+        with self._lock:
+            self._queued_bytes += len(data)
+            while self._queued_bytes > self.max_queue_bytes:
+                try:
+                    old = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if old is None:
+                    self._queue.put(None)
+                    break
+                self._queued_bytes -= len(old)
+                self.dropped_bytes += len(old)
+            self.max_queue_depth_ms = max(self.max_queue_depth_ms, self.queue_depth_ms)
+        self._queue.put(data)
+
+    def stop(self, timeout: float = None) -> None:
+        """通知发送线程把剩余数据发完后退出，并等待其结束"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def abort(self) -> None:
+        """
+        丢弃队列中尚未发送的数据并通知发送线程退出，立即返回
+        正在进行的一次发送不会被打断，之后仍可调用 stop() 等待发送线程结束
+        """
+        if self._thread is None:
+            return
+        self._aborted = True
+        self._queue.put(None)
+
+    def _take(self, block: bool):
+        item = self._queue.get(block=block)
+        if item is not None:
+            with self._lock:
+                self._queued_bytes -= len(item)
+        return item
+
+    def _run(self) -> None:
+        packet = bytearray()
+        finished = False
+        while not finished and not self._aborted:
+            item = self._take(block=True)
+            if item is None:
+                finished = True
+            else:
+                packet += item
+                # 把已经到达的数据尽量合并，攒够一个数据包再发送
+                while len(packet) < self.packet_bytes:
+                    try:
+                        item = self._take(block=False)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        finished = True
+                        break
+                    packet += item
+            # 不足一个包时继续等待后续数据，结束时把剩余的数据一起发出
+            if packet and (len(packet) >= self.packet_bytes or finished):
+                self._send(bytes(packet))
+                packet = bytearray()
+
+    def _send(self, packet: bytes) -> None:
+        if self._aborted:
+            return
+        if self.error is not None:
+            self.dropped_bytes += len(packet)
+            return
+        start = time.monotonic()
+        try:
+            self.send_func(packet)
+        except Exception as e:
+            print(f"音频发送失败: {e}")
+            self.error = e
+            self.dropped_bytes += len(packet)
+            return
+        self.max_send_ms = max(self.max_send_ms, (time.monotonic() - start) * 1000)
+        self.packets_sent += 1
+        self.bytes_sent += len(packet)
+
+    def stats(self) -> dict:
+        return {
+            "packets_sent": self.packets_sent,
+            "sent_ms": self.bytes_sent * 1000 // self.bytes_per_second,
+            "dropped_ms": self.dropped_ms,
+            "queue_depth_ms": self.queue_depth_ms,
+            "max_queue_depth_ms": self.max_queue_depth_ms,
+            "max_send_ms": round(self.max_send_ms, 1),
+        }
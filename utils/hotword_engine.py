@@ -0,0 +1,46 @@
+"""
+热词检测引擎选择工具 V2.0
+核心功能是按配置创建热词检测引擎，所有引擎提供相同的 listen_for_hotword() 接口：
+    vosk     - AsrVosk，Kaldi 解码后在拼音流中匹配热词，无需录制，可识别任意热词
+    template - TemplateKeywordSpotter，MFCC + 子序列 DTW 模板匹配，CPU 占用低，需要先录制模板
+引擎可以通过参数或环境变量 HOTWORD_ENGINE 指定，默认 vosk。
+"""
+
+import os
+import sys
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+
+sys.path.append(parent_dir)
+
+HOTWORD_ENGINES = ("vosk", "template")
+# 只有 AsrVosk 支持的参数，使用模板引擎时忽略（模板匹配本身开销很小，不需要语音门控）
+VOSK_ONLY_OPTIONS = ("use_grammar", "fuzzy", "hotword_thresholds", "partial_interval_ms", "gate")
+
+
+def create_hotword_engine(hotwords_dict, engine=None, model_path=None, template_dir=None, **kwargs):
+    """
+    创建热词检测引擎
+    Args:
+        hotwords_dict (dict): {热词: 信号值}。
+        engine (str, optional): "vosk" 或 "template"，为 None 时读取环境变量 HOTWORD_ENGINE. Defaults to None.
+        model_path (str, optional): Vosk 模型路径，vosk 引擎必需.
+        template_dir (str, optional): 模板目录，template 引擎使用，默认 models/kws_templates.
+        **kwargs: 引擎的其他参数（sample_rate、audio_source、echo_canceller、hop_ms 等）。
+    Returns:
+        AsrVosk 或 TemplateKeywordSpotter
+    """
+    engine = engine or os.environ.get("HOTWORD_ENGINE", "vosk")
+    if engine == "vosk":
+        from utils.asr_vosk import AsrVosk
+        if model_path is None:
+            raise ValueError("vosk 引擎需要指定 model_path")
+        return AsrVosk(model_path, hotwords_dict, **kwargs)
+    if engine == "template":
+        from utils.kws_template import TemplateKeywordSpotter, TEMPLATE_DIR
+        options = {k: v for k, v in kwargs.items() if k not in VOSK_ONLY_OPTIONS}
+        return TemplateKeywordSpotter(hotwords_dict, template_dir=template_dir or TEMPLATE_DIR, **options)
+    raise ValueError(f"未知的热词检测引擎: {engine}，可选 {HOTWORD_ENGINES}")
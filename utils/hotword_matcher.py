@@ -0,0 +1,294 @@
+"""
+热词匹配工具 V2.0
+核心功能是在拼音流中同时检测大量热词：把所有热词的拼音序列构建成一个以拼音音节为字符的
+Aho-Corasick 自动机，每个音节只需一次状态转移，耗时与热词数量无关。
+Vosk 的中间结果每次都从头给出整句，匹配器记录已经处理过的音节及对应的自动机状态，
+只处理新增的音节；中间结果修改了前面的内容时，回退到分歧处重新处理。
+FuzzyHotwordMatcher 提供模糊匹配：容忍易混淆的声母/韵母（x/s、in/ing 等）和有限的音节增删改，
+结合 Vosk 的词置信度给出 0~1 的得分，每个热词可以设置各自的阈值。
+"""
+
+from functools import lru_cache
+from pypinyin import lazy_pinyin
+
+
+class HotwordMatch:
+    """
+    一次热词匹配，start/end 为该热词在本句拼音流（去掉空格后）中的音节位置，左闭右开；
+    score 为匹配得分（精确匹配为1.0）
+    """
+
+    def __init__(self, name, signal, start, end, score=1.0):
+        self.name = name
+        self.signal = signal
+        self.start = start
+        self.end = end
+        self.score = score
+
+    def __repr__(self):
+        return (f"HotwordMatch({self.name!r}, signal={self.signal}, syllables=[{self.start}, {self.end}), "
+                f"score={self.score:.2f})")
+
+
+class HotwordMatcher:
+    """
+    基于拼音音节的多模式增量匹配器。
+    用法：
+        matcher = HotwordMatcher({"小新小新": 1, "再见": 2})
+        matches = matcher.update(lazy_pinyin(partial_text))  # 每次传入完整的中间结果拼音
+        matcher.reset()  # 识别器重置（开始新的一句）时调用
+    """
+
+    def __init__(self, hotwords_dict: dict):
+        """
+        Args:
+            hotwords_dict (dict): {热词: 信号值}，热词按拼音（不区分声调）匹配。
+        """
+        self.patterns = []  # [(热词, 信号值, 音节数)]
+        self._goto = [{}]  # 每个状态的转移表 {音节: 下一状态}
+        self._fail = [0]
+        self._output = [[]]  # 每个状态结束的热词编号（已合并失配链上的输出）
+        for word, signal in hotwords_dict.items():
+            self._add(word, signal)
+        self._build()
+        self.reset()
+
+    def _add(self, word: str, signal) -> None:
+        """把一个热词的拼音序列加入字典树"""
+        syllables = [p for p in lazy_pinyin(word) if p.strip()]
+        if not syllables:
+            return
+        state = 0
+        for syllable in syllables:
+            next_state = self._goto[state].get(syllable)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][syllable] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(len(self.patterns))
+        self.patterns.append((word, signal, len(syllables)))
+
+    def _build(self) -> None:
+        """按广度优先计算失配指针，并把失配状态的输出合并进来"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        for state in queue:
+            for syllable, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and syllable not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(syllable, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def reset(self) -> None:
+        """开始新的一句，清空已处理的音节"""
+        self._syllables = []  # 已处理的音节
+        self._states = [0]  # _states[i] 为处理完前 i 个音节后的状态
+        self._reported = set()  # 已报告过的匹配 (热词编号, 结束位置)
+
+    def _step(self, state: int, syllable: str) -> int:
+        while state and syllable not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(syllable, 0)
+
+    def feed(self, syllables, confidences=None) -> list:
+        """
+        在已处理的音节之后追加新的音节（精确匹配不使用置信度）
+        Returns:
+            list: 新出现的 HotwordMatch，按结束位置排序
+        """
+        matches = []
+        state = self._states[-1]
+        for syllable in syllables:
+            if not syllable.strip():
+                continue
+            state = self._step(state, syllable)
+            self._syllables.append(syllable)
+            self._states.append(state)
+            end = len(self._syllables)
+            for index in self._output[state]:
+                if (index, end) in self._reported:
+                    continue
+                self._reported.add((index, end))
+                word, signal, length = self.patterns[index]
+                matches.append(HotwordMatch(word, signal, end - length, end))
+        return matches
+
+    def update(self, pinyin_stream: list, confidences=None) -> list:
+        """
+        传入本句完整的拼音流（例如 Vosk 中间结果的拼音），只处理与上次不同的部分
+        Args:
+            pinyin_stream (list): 拼音流，空格会被忽略。
+            confidences (list, optional): 与去掉空格后的音节一一对应的置信度，精确匹配不使用.
+        Returns:
+            list: 新出现的 HotwordMatch，按结束位置排序
+        """
+        syllables = [p for p in pinyin_stream if p.strip()]
+        common = 0
+        limit = min(len(syllables), len(self._syllables))
+        while common < limit and syllables[common] == self._syllables[common]:
+            common += 1
+        if common < len(self._syllables):
+            # 中间结果修改了前面的内容，回退到分歧处
+            del self._syllables[common:]
+            del self._states[common + 1:]
+            self._reported = {r for r in self._reported if r[1] <= common}
+        return self.feed(syllables[common:])
+
+    def __len__(self) -> int:
+        """当前句子已处理的音节数"""
+        return len(self._syllables)
+
+
+# 声母按长度优先排列，便于拆分音节
+INITIALS = ("zh", "ch", "sh", "b", "p", "m", "f", "d", "t", "n", "l", "g", "k", "h",
+            "j", "q", "x", "r", "z", "c", "s", "y", "w")
+# 容易听错/识别错的声母和韵母
+CONFUSABLE_INITIALS = {frozenset(pair) for pair in [("z", "zh"), ("c", "ch"), ("s", "sh"), ("x", "s"), ("x", "sh"),
+                                                     ("j", "z"), ("q", "c"), ("n", "l"), ("l", "r"), ("f", "h")]}
+CONFUSABLE_FINALS = {frozenset(pair) for pair in [("in", "ing"), ("en", "eng"), ("an", "ang"), ("ian", "iang"),
+                                                   ("uan", "uang"), ("eng", "ong"), ("un", "ong")]}
+CONFUSABLE_COST = 0.4  # 一处声母或韵母混淆的代价，一个音节完全不同（或多一个、少一个音节）的代价为1
+
+
+def split_syllable(syllable: str) -> tuple:
+    """把无声调拼音拆分为 (声母, 韵母)，零声母音节的声母为空字符串"""
+    for initial in INITIALS:
+        if syllable.startswith(initial) and len(syllable) > len(initial):
+            return initial, syllable[len(initial):]
+    return "", syllable
+
+
+@lru_cache(maxsize=65536)
+def substitution_cost(expected: str, heard: str) -> float:
+    """热词中的音节 expected 被识别为 heard 的代价"""
+    if expected == heard:
+        return 0.0
+    (i1, f1), (i2, f2) = split_syllable(expected), split_syllable(heard)
+    cost = 0.0
+    if i1 != i2:
+        if frozenset((i1, i2)) not in CONFUSABLE_INITIALS:
+            return 1.0
+        cost += CONFUSABLE_COST
+    if f1 != f2:
+        if frozenset((f1, f2)) not in CONFUSABLE_FINALS:
+            return 1.0
+        cost += CONFUSABLE_COST
+    return cost
+
+
+class FuzzyHotwordMatcher:
+    """
+    带得分的模糊热词匹配器，接口与 HotwordMatcher 相同。
+    对每个热词在拼音流上做 Sellers 近似子串匹配（匹配可以从任意位置开始的编辑距离），
+    每个新音节只需按热词长度更新一列，并为每个位置保存各热词的一列以便中间结果改写时回退。
+    得分 = (1 - 编辑距离 / 热词音节数) × 匹配范围内的平均置信度，
+    得分达到该热词的阈值时报告一次（得分持续高于阈值时不会重复报告）。
+    """
+
+    def __init__(self, hotwords_dict: dict, thresholds: dict = None, default_threshold: float = 0.8):
+        """
+        Args:
+            hotwords_dict (dict): {热词: 信号值}。
+            thresholds (dict, optional): {热词: 得分阈值}，未列出的热词使用 default_threshold.
+            default_threshold (float, optional): 默认得分阈值(0~1)；4个音节的热词允许两处声母/韵母混淆，
+                或一处混淆加上置信度略低. Defaults to 0.8.
+        """
+        thresholds = thresholds or {}
+        self.patterns = []  # [(热词, 信号值, 音节列表, 阈值)]
+        for word, signal in hotwords_dict.items():
+            syllables = [p for p in lazy_pinyin(word) if p.strip()]
+            if syllables:
+                self.patterns.append((word, signal, syllables, thresholds.get(word, default_threshold)))
+        self.reset()
+
+    def reset(self) -> None:
+        self._syllables = []
+        self._confidences = []
+        # _columns[k][j] 为处理完前 k 个音节后第 j 个热词的一列 [(代价, 起点)]
+        self._columns = [[[(float(i), 0) for i in range(len(p[2]) + 1)] for p in self.patterns]]
+        self._active = [[False] * len(self.patterns)]  # 每个位置上各热词的得分是否达到阈值
+
+    def _score(self, cost: float, length: int, start: int, end: int) -> float:
+        score = max(0.0, 1.0 - cost / length)
+        window = self._confidences[start:end]
+        if window:
+            score *= sum(window) / len(window)
+        return score
+
+    def feed(self, syllables, confidences=None) -> list:
+        """
+        在已处理的音节之后追加新的音节
+        Args:
+            syllables: 新的音节（空格会被忽略）。
+            confidences (optional): 与 syllables 一一对应的置信度(0~1)，没有时视为1.
+        Returns:
+            list: 新达到阈值的 HotwordMatch
+        """
+        matches = []
+        for index, syllable in enumerate(syllables):
+            if not syllable.strip():
+                continue
+            confidence = confidences[index] if confidences is not None else 1.0
+            self._syllables.append(syllable)
+            self._confidences.append(1.0 if confidence is None else confidence)
+            end = len(self._syllables)
+            previous_columns = self._columns[-1]
+            columns = []
+            active = []
+            for j, (word, signal, pattern, threshold) in enumerate(self.patterns):
+                previous = previous_columns[j]
+                column = [(0.0, end)]
+                for i, expected in enumerate(pattern, start=1):
+                    diagonal = previous[i - 1]
+                    cell = (diagonal[0] + substitution_cost(expected, syllable), diagonal[1])
+                    if previous[i][0] + 1 < cell[0]:  # 拼音流中多出一个音节
+                        cell = (previous[i][0] + 1, previous[i][1])
+                    if column[i - 1][0] + 1 < cell[0]:  # 热词中的音节没有被识别出来
+                        cell = (column[i - 1][0] + 1, column[i - 1][1])
+                    column.append(cell)
+                columns.append(column)
+
+                cost, start = column[-1]
+                is_active = False
+                if cost < len(pattern):
+                    score = self._score(cost, len(pattern), start, end)
+                    is_active = score >= threshold
+                    if is_active and not self._active[-1][j]:
+                        matches.append(HotwordMatch(word, signal, start, end, score))
+                active.append(is_active)
+            self._columns.append(columns)
+            self._active.append(active)
+        return matches
+
+    def update(self, pinyin_stream: list, confidences=None) -> list:
+        """
+        传入本句完整的拼音流，只处理与上次不同的部分
+        Args:
+            pinyin_stream (list): 拼音流，空格会被忽略。
+            confidences (list, optional): 与去掉空格后的音节一一对应的置信度.
+        Returns:
+            list: 新达到阈值的 HotwordMatch
+        """
+        syllables = [p for p in pinyin_stream if p.strip()]
+        if confidences is None:
+            confidences = [1.0] * len(syllables)
+        common = 0
+        limit = min(len(syllables), len(self._syllables))
+        while (common < limit and syllables[common] == self._syllables[common]
+               and confidences[common] == self._confidences[common]):
+            common += 1
+        if common < len(self._syllables):
+            del self._syllables[common:]
+            del self._confidences[common:]
+            del self._columns[common + 1:]
+            del self._active[common + 1:]
+        return self.feed(syllables[common:], confidences[common:])
+
+    def __len__(self) -> int:
+        return len(self._syllables)
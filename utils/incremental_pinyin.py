@@ -0,0 +1,67 @@
+"""
+增量拼音转换工具 V2.0
+核心功能是把 Vosk 不断增长的中间结果转换为拼音流，而不必每次对整句重新调用 pypinyin：
+与上一次的中间结果按词比较，只转换发生变化的词；每个词的拼音缓存在 LRU 缓存中。
+Vosk 中文模型的中间结果以空格分隔词语，按词（而不是单字）转换可以保留 pypinyin 对多音字的词组判断，
+汉字部分的拼音与对整句调用 lazy_pinyin 一致。非汉字内容（字母、数字、标点）不同：lazy_pinyin 把相邻的
+非汉字连同空格合并成一项（'a a 小心' -> 'a a ', 'xiao', 'xin'），这里每个词各自成项、词之间以 ' ' 分隔
+（'a', ' ', 'a', ' ', 'xiao', 'xin'），与 asr_vosk 按词展开置信度和时间戳时的音节计数保持一致。
+"""
+
+from functools import lru_cache
+from pypinyin import lazy_pinyin
+
+
+@lru_cache(maxsize=4096)
+def word_pinyin(word: str) -> tuple:
+    """单个词的拼音（带缓存），常用字词在几句话之后就不再需要调用 pypinyin"""
+    return tuple(lazy_pinyin(word))
+
+
+class IncrementalPinyin:
+    """
+    中间结果的增量拼音转换器。
+    用法：
+        converter = IncrementalPinyin()
+        pinyin_stream = converter.update(partial_text)  # 每次传入完整的中间结果
+        converter.reset()  # 识别器重置（开始新的一句）时调用
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.text = ""
+        self._words = []  # 上一次中间结果的词
+        self._offsets = []  # 每个词的拼音在拼音流中的起点
+        self.pinyin_stream = []  # 整句拼音流，随中间结果原地更新
+        self.converted_words = 0  # 本句实际转换（未命中上一次结果）的词数
+
+    def update(self, text: str) -> list:
+        """
+        传入完整的中间结果，返回整句的拼音流：逐词 lazy_pinyin 的结果，词之间以 ' ' 分隔
+        返回的列表会在下一次调用时原地修改
+        """
+        if text == self.text:
+            return self.pinyin_stream
+        words = text.split(" ")
+        common = 0
+        limit = min(len(words), len(self._words))
+        while common < limit and words[common] == self._words[common]:
+            common += 1
+        # 从最后一个相同的词之后开始改写
+        if common < len(self._words):
+            del self.pinyin_stream[self._offsets[common]:]
+            del self._words[common:]
+            del self._offsets[common:]
+        for word in words[common:]:
+            self._words.append(word)
+            self._offsets.append(len(self.pinyin_stream))
+            syllables = word_pinyin(word) if word else ()
+            if syllables:
+                if self.pinyin_stream:
+                    self.pinyin_stream.append(" ")
+                self.pinyin_stream.extend(syllables)
+            self.converted_words += 1
+        self.text = text
+        return self.pinyin_stream
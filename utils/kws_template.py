@@ -0,0 +1,416 @@
+"""
+模板匹配热词检测工具 V2.0
+核心功能是用少量录制的模板检测热词，作为 Vosk 全量解码之外的轻量方案：
+用 NumPy 向量化计算 MFCC 特征，再用子序列 DTW 把音频流与每个热词的模板逐帧对齐，
+对齐代价低于阈值即判定检测到热词。每帧的计算量只与模板总帧数成正比，远小于 Kaldi 解码。
+listen_for_hotword() 的用法和返回值与 AsrVosk 相同，两者可以通过 utils.hotword_engine 按配置切换。
+模板用 enroll 命令录制：python kws_template.py enroll 小新小新 --count 3
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+
+sys.path.append(parent_dir)
+
+from utils.audio_capture import get_audio_capture
+from utils.audio_io import load_audio_file
+from utils.resampler import StreamingResampler
+from utils.vad import AdaptiveEnergyVAD
+from utils.hotword_matcher import HotwordMatch
+from utils.asr_vosk import VOICE_ACTIVITY_SIGNAL, BARGE_IN_MIN_ERLE_DB, WakeLatency
+
+TARGET_SAMPLE_RATE = 16000
+TEMPLATE_DIR = os.path.join(parent_dir, "models", "kws_templates")
+DEFAULT_THRESHOLD = 0.22  # 只有一个模板、无法自动标定时使用的阈值（逐帧平均余弦距离）
+MIN_THRESHOLD = 0.2  # 自动标定的下限：录制的几个模板往往过于相似，标定结果偏严
+THRESHOLD_MARGIN = 1.5  # 自动标定：同一热词的模板之间相互匹配的最大代价再乘以该系数
+MEL_FLOOR = 1e-4  # 梅尔能量下限（约 -70dBFS），避免静音段的对数能量趋于负无穷、对微弱噪声过于敏感
+
+
+class MfccExtractor:
+    """
+    流式 MFCC 特征提取。
+    每次 process() 传入一块16kHz int16音频，返回其中新凑齐的各帧特征，不足一帧的部分留到下一次。
+    输出去掉了第0维（对数能量），只保留频谱形状，对音量不敏感。
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 25, hop_ms: int = 10, n_fft: int = 512,
+                 n_mels: int = 26, n_mfcc: int = 13, preemphasis: float = 0.97):
+        """
+        Args:
+            sample_rate (int, optional): 输入采样率. Defaults to 16000.
+            frame_ms (int, optional): 分析帧长. Defaults to 25.
+            hop_ms (int, optional): 帧移. Defaults to 10.
+            n_fft (int, optional): FFT点数. Defaults to 512.
+            n_mels (int, optional): 梅尔滤波器个数. Defaults to 26.
+            n_mfcc (int, optional): 倒谱系数个数（含第0维）. Defaults to 13.
+            preemphasis (float, optional): 预加重系数. Defaults to 0.97.
+        """
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.hop = sample_rate * hop_ms // 1000
+        self.hop_ms = hop_ms
+        self.n_fft = n_fft
+        self.preemphasis = preemphasis
+        self._window = np.hamming(self.frame_len).astype(np.float32)
+        self._mel = self._mel_filterbank(sample_rate, n_fft, n_mels)
+        # 正交 DCT-II 矩阵，只保留第1~n_mfcc-1维
+        n = np.arange(n_mels)
+        k = np.arange(1, n_mfcc)[:, None]
+        self._dct = (np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)).T.astype(np.float32)
+        self.reset()
+
+    @staticmethod
+    def _mel_filterbank(sample_rate, n_fft, n_mels):
+        mel = lambda f: 2595 * np.log10(1 + f / 700)
+        hz = lambda m: 700 * (10 ** (m / 2595) - 1)
+        points = hz(np.linspace(mel(20), mel(sample_rate / 2), n_mels + 2))
+        bins = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+        lower, center, upper = points[:-2, None], points[1:-1, None], points[2:, None]
+        rising = (bins - lower) / (center - lower)
+        falling = (upper - bins) / (upper - center)
+        return np.maximum(0, np.minimum(rising, falling)).T.astype(np.float32)  # (n_fft/2+1, n_mels)
+
+    def reset(self) -> None:
+        self._pending = np.zeros(0, dtype=np.float32)  # 预加重后尚未处理完的样本
+        self._last_sample = 0.0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: (帧数, n_mfcc-1) 的特征，可能为0帧
+        """
+        x = samples.astype(np.float32) / 32768.0
+        emphasized = np.empty_like(x)
+        if len(x):
+            emphasized[0] = x[0] - self.preemphasis * self._last_sample
+            emphasized[1:] = x[1:] - self.preemphasis * x[:-1]
+            self._last_sample = x[-1]
+        buffer = np.concatenate([self._pending, emphasized])
+        n_frames = (len(buffer) - self.frame_len) // self.hop + 1 if len(buffer) >= self.frame_len else 0
+        self._pending = buffer[n_frames * self.hop:]
+        if n_frames == 0:
+            return np.zeros((0, self._dct.shape[1]), dtype=np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_len)[::self.hop][:n_frames]
+        power = np.abs(np.fft.rfft(frames * self._window, n=self.n_fft, axis=1)) ** 2
+        return np.log(power @ self._mel + MEL_FLOOR) @ self._dct
+
+    def compute(self, samples: np.ndarray) -> np.ndarray:
+        """一次性计算整段音频的特征"""
+        self.reset()
+        features = self.process(samples)
+        self.reset()
+        return features
+
+
+def normalize_features(features: np.ndarray, mean: np.ndarray) -> np.ndarray:
+    """减去倒谱均值（CMN）后归一化为单位向量，两帧之间的距离取 1 - 余弦相似度"""
+    centered = features - mean
+    return centered / (np.linalg.norm(centered, axis=1, keepdims=True) + 1e-8)
+
+
+class SubsequenceDTW:
+    """
+    多模板的流式子序列 DTW。
+    所有模板的帧拼接成一个矩阵，每来一帧音频，一次矩阵乘法得到它与全部模板帧的距离，
+    再一次向量化更新所有模板的累计代价。路径每步音频前进一帧、模板前进0~2帧，
+    因此不依赖同一列内的前一格，整列可以并行更新；模板的第一帧在任意时刻都可以作为起点。
+    """
+
+    def __init__(self, templates: list):
+        """
+        Args:
+            templates (list): 每个模板为 (帧数, 维数) 的已归一化特征。
+        """
+        self.templates = np.concatenate(templates).astype(np.float32)
+        lengths = [len(t) for t in templates]
+        self.ends = np.cumsum(lengths) - 1  # 每个模板最后一帧在拼接矩阵中的位置
+        self.lengths = np.array(lengths, dtype=np.float32)
+        self.starts = self.ends - np.array(lengths) + 1
+        index = np.arange(len(self.templates))
+        start_of = np.repeat(self.starts, lengths)
+        self._is_start = index == start_of
+        self._prev1 = np.where(index - 1 >= start_of, index - 1, -1)
+        self._prev2 = np.where(index - 2 >= start_of, index - 2, -1)
+        self.reset()
+
+    def reset(self) -> None:
+        size = len(self.templates)
+        self._cost = np.full(size + 1, np.inf, dtype=np.float32)  # 末尾多一格恒为 inf，供越界的前驱索引使用
+        self._length = np.zeros(size + 1, dtype=np.float32)
+
+    def step(self, frame: np.ndarray) -> np.ndarray:
+        """
+        传入一帧已归一化的特征
+        Returns:
+            np.ndarray: 每个模板当前以该帧结尾的最佳对齐的平均代价（逐帧平均余弦距离）。
+                累计代价除以音频段与模板帧数的平均值，而不是路径长度，
+                否则路径停在模板最后一帧吸收静音帧时平均代价会持续下降，检测被推迟
+        """
+        distance = 1.0 - self.templates @ frame
+        cost, length = self._cost, self._length
+        candidates = np.stack([cost[:-1], cost[self._prev1], cost[self._prev2]])
+        choice = np.argmin(candidates, axis=0)
+        best = np.choose(choice, candidates)
+        source = np.choose(choice, [np.arange(len(distance)), self._prev1, self._prev2])
+        new_length = length[source] + 1
+        new_cost = best + distance
+        new_cost[self._is_start] = distance[self._is_start]
+        new_length[self._is_start] = 1
+        cost[:-1] = new_cost
+        length[:-1] = new_length
+        return cost[self.ends] / ((length[self.ends] + self.lengths) / 2)
+
+    def path_length(self, template: int) -> int:
+        """第 template 个模板当前最佳对齐覆盖的音频帧数"""
+        return int(self._length[self.ends[template]])
+
+
+class TemplateKeywordSpotter:
+    def __init__(self, hotwords_dict, template_dir=TEMPLATE_DIR, sample_rate=16000, vad=None, audio_source=None,
+                 frontend=None, echo_canceller=None, hop_ms=64, thresholds=None):
+        """
+        hotwords_dict: {热词: 信号值} 的字典，每个热词在 template_dir/<热词>/ 下需要至少一个模板录音
+        template_dir: 模板目录，默认 models/kws_templates
+        sample_rate: 期望的采集采样率，默认16000；进程内首次创建采集服务时生效
+        vad: 语音活动检测器（作用于16kHz音频），提供语音统计和一句话结束的判断；默认使用 AdaptiveEnergyVAD
+        audio_source: 音频输入源，默认使用共享的麦克风采集服务；传入 FileSource 可回放录音文件
+        frontend: 可选的音频前端（utils.audio_frontend.AudioFrontEnd）
+        echo_canceller: 可选的回声消除器（utils.echo_canceller.EchoCanceller）
+        hop_ms: 每次从音频源读取的时长，默认64ms
+        thresholds: 各热词的检测阈值 {热词: 平均代价}，未列出的由模板之间相互匹配自动标定
+        """
+        self.template_dir = template_dir
+        self.thresholds = thresholds or {}
+        self.audio_source = audio_source if audio_source is not None else get_audio_capture(sample_rate)
+        self.sample_rate = TARGET_SAMPLE_RATE
+        self.resampler = StreamingResampler(self.audio_source.sample_rate, self.sample_rate)
+        self.mfcc = MfccExtractor(self.sample_rate)
+        self.reader = None
+        self.echo_canceller = echo_canceller
+        self.frontend = frontend
+        self.vad = vad if vad is not None else AdaptiveEnergyVAD(sample_rate=self.sample_rate, end_silence_ms=800)
+        self.last_utterance_stats = None
+        self.detection_position = None
+        self.speech_start_position = None
+        self.last_match = None
+        self.last_latency = None
+        self.hop_ms = hop_ms
+        self.frames_per_buffer = hop_ms * self.audio_source.sample_rate // 1000
+        self.cmn_alpha = 0.005  # 音频流倒谱均值的更新系数（约2秒的时间常数）
+        self.set_hotwords(hotwords_dict)
+
+    def load_templates(self, word):
+        """读取一个热词的所有模板录音，返回 MFCC 特征列表"""
+        folder = os.path.join(self.template_dir, word)
+        if not os.path.isdir(folder):
+            return []
+        features = []
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(".wav"):
+                samples, rate = load_audio_file(os.path.join(folder, name))
+                if rate != self.sample_rate:
+                    samples = StreamingResampler(rate, self.sample_rate).process(samples)
+                features.append(self.mfcc.compute(samples))
+        return features
+
+    @staticmethod
+    def calibrate(templates):
+        """
+        同一热词的模板两两匹配（被匹配的一方按运行时的方式用全部模板的倒谱均值归一化），
+        取最大的对齐代价乘以余量作为阈值，且不低于 MIN_THRESHOLD；少于两个模板时返回默认阈值
+        """
+        if len(templates) < 2:
+            return DEFAULT_THRESHOLD
+        mean = np.concatenate(templates).mean(axis=0)
+        worst = 0.0
+        for i, template in enumerate(templates):
+            dtw = SubsequenceDTW([normalize_features(template, template.mean(axis=0))])
+            for j, other in enumerate(templates):
+                if i == j:
+                    continue
+                dtw.reset()
+                best = min(float(dtw.step(frame)[0]) for frame in normalize_features(other, mean))
+                worst = max(worst, best)
+        return max(MIN_THRESHOLD, worst * THRESHOLD_MARGIN)
+
+    def set_hotwords(self, hotwords_dict):
+        """更换热词集合并重新加载模板；没有模板的热词会被跳过"""
+        self.hotwords_dict = dict(hotwords_dict)
+        templates, raw, owners = [], [], []
+        self.word_thresholds = {}
+        for word in self.hotwords_dict:
+            features = self.load_templates(word)
+            if not features:
+                print(f"热词 '{word}' 没有模板，已跳过；请先运行 python kws_template.py enroll {word}")
+                continue
+            self.word_thresholds[word] = self.thresholds.get(word, self.calibrate(features))
+            for f in features:
+                templates.append(normalize_features(f, f.mean(axis=0)))
+                raw.append(f)
+                owners.append(word)
+        if not templates:
+            raise FileNotFoundError(f"没有任何热词的模板，请先录制模板到 {self.template_dir}")
+        self.dtw = SubsequenceDTW(templates)
+        self._owners = owners
+        self._template_thresholds = np.array([self.word_thresholds[w] for w in owners], dtype=np.float32)
+        # 音频流的倒谱均值从模板的平均值开始跟踪
+        self._cmn = np.concatenate(raw).mean(axis=0)
+        self._frames = 0  # 本次监听已处理的特征帧数
+
+    def start(self):
+        self.reader = self.audio_source.open_reader()
+        self.resampler.reset()
+        self.mfcc.reset()
+        self.dtw.reset()
+        if self.echo_canceller is not None:
+            self.echo_canceller.reset(self.reader.position)
+        if self.frontend is not None:
+            self.frontend.reset()
+        self.vad.reset()
+
+    def stop(self):
+        if self.reader is not None:
+            self.audio_source.close_reader(self.reader)
+            self.reader = None
+
+    def _record_detection(self):
+        """记录检测时刻的语音统计与采集时间轴位置"""
+        stats = self.vad.stats()
+        self.last_utterance_stats = stats
+        self.detection_position = self.reader.position
+        self.speech_start_position = None
+        if stats.speech_start_ms is not None:
+            back_ms = stats.duration_ms - stats.speech_start_ms
+            self.speech_start_position = self.detection_position - int(back_ms * self.audio_source.sample_rate / 1000)
+
+    def _detect(self, features):
+        """逐帧更新 DTW，返回达到阈值的最佳匹配（没有时为 None）"""
+        for frame in features:
+            self._cmn += self.cmn_alpha * (frame - self._cmn)
+            scores = self.dtw.step(normalize_features(frame[None, :], self._cmn)[0])
+            self._frames += 1
+            hits = np.nonzero(scores <= self._template_thresholds)[0]
+            if len(hits):
+                best = hits[np.argmin(scores[hits] / self._template_thresholds[hits])]
+                word = self._owners[best]
+                length = self.dtw.path_length(best)
+                # 得分：代价为0时为1，恰好等于阈值时为0.5
+                score = 1.0 - 0.5 * float(scores[best]) / self.word_thresholds[word]
+                return HotwordMatch(word, self.hotwords_dict[word], self._frames - length, self._frames, score)
+        return None
+
+    def listen_for_hotword(self, stop_event=None, min_speech_ms=None):
+        """
+        阻塞式监听，与 AsrVosk.listen_for_hotword() 相同：检测到热词返回其信号值，
+        设置 min_speech_ms 时持续人声也会返回 VOICE_ACTIVITY_SIGNAL，停止或音频结束时返回 None。
+        HotwordMatch 的 start/end 为特征帧（10ms）序号。
+        """
+        self.start()
+        self._frames = 0
+        listen_start_position = self.reader.position
+        fed_samples = 0
+        try:
+            while self.reader is not None:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                data = self.reader.read(self.frames_per_buffer)
+                if data is None:
+                    break
+                samples = self.resampler.process(data)
+                if self.echo_canceller is not None:
+                    samples = self.echo_canceller.process(samples)
+                if self.frontend is not None:
+                    samples = self.frontend.process(samples)
+                self.vad.process(samples)
+                fed_samples += len(samples)
+                match = self._detect(self.mfcc.process(samples))
+                if match is not None:
+                    self.last_match = match
+                    captured_ms = (self.audio_source.position - listen_start_position) * 1000 / self.audio_source.sample_rate
+                    fed_ms = fed_samples * 1000 / self.sample_rate
+                    keyword_end_ms = match.end * self.mfcc.hop_ms
+                    self.last_latency = WakeLatency(keyword_end_ms, fed_ms, max(0.0, captured_ms - fed_ms))
+                    print(f"检测到热词: {match}  {self.last_latency}")
+                    self._record_detection()
+                    self.stop()
+                    return match.signal
+                if (min_speech_ms is not None and self.echo_canceller is not None
+                        and self.echo_canceller.erle_db >= BARGE_IN_MIN_ERLE_DB
+                        and self.vad.stats().speech_ms >= min_speech_ms):
+                    self.last_latency = None
+                    self._record_detection()
+                    self.stop()
+                    return VOICE_ACTIVITY_SIGNAL
+                if self.vad.utterance_ended:
+                    self.vad.reset()
+        finally:
+            self.stop()
+
+
+def enroll(word, count=3, template_dir=TEMPLATE_DIR, sample_rate=16000):
+    """
+    录制热词模板：每次等待说一遍热词，由 VAD 截取人声部分保存为 template_dir/<热词>/NN.wav
+    """
+    from utils.audio_io import WavFileSink
+    folder = os.path.join(template_dir, word)
+    os.makedirs(folder, exist_ok=True)
+    existing = len([n for n in os.listdir(folder) if n.lower().endswith(".wav")])
+    capture = get_audio_capture(sample_rate)
+    resampler = StreamingResampler(capture.sample_rate, TARGET_SAMPLE_RATE)
+    vad = AdaptiveEnergyVAD(sample_rate=TARGET_SAMPLE_RATE, end_silence_ms=600, no_speech_timeout_ms=10000)
+    chunk = capture.sample_rate // 20
+    for n in range(existing, existing + count):
+        print(f"[{n - existing + 1}/{count}] 请说：{word}")
+        reader = capture.open_reader()
+        resampler.reset()
+        vad.reset()
+        recorded = []
+        try:
+            while not vad.utterance_ended:
+                samples = resampler.process(reader.read(chunk))
+                vad.process(samples)
+                recorded.append(samples)
+        finally:
+            capture.close_reader(reader)
+        stats = vad.stats()
+        if stats.speech_start_ms is None:
+            print("没有检测到人声，请重试")
+            continue
+        audio = np.concatenate(recorded)
+        # 前后各保留50ms
+        begin = max(0, int((stats.speech_start_ms - 50) * TARGET_SAMPLE_RATE / 1000))
+        end = int((stats.speech_end_ms + 50) * TARGET_SAMPLE_RATE / 1000)
+        sink = WavFileSink(os.path.join(folder, f"{n:02d}.wav"))
+        sink.open(TARGET_SAMPLE_RATE)
+        sink.write(audio[begin:end].tobytes())
+        sink.close()
+        print(f"已保存模板 {sink.last_path}（{(end - begin) / TARGET_SAMPLE_RATE:.2f}s）")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模板匹配热词检测")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    enroll_parser = subparsers.add_parser("enroll", help="录制热词模板")
+    enroll_parser.add_argument("word", help="热词")
+    enroll_parser.add_argument("--count", type=int, default=3, help="录制次数")
+    enroll_parser.add_argument("--dir", default=TEMPLATE_DIR, help="模板目录")
+    listen_parser = subparsers.add_parser("listen", help="用已录制的模板检测热词")
+    listen_parser.add_argument("words", nargs="+", help="热词")
+    listen_parser.add_argument("--dir", default=TEMPLATE_DIR, help="模板目录")
+    args = parser.parse_args()
+
+    if args.command == "enroll":
+        enroll(args.word, args.count, args.dir)
+    else:
+        spotter = TemplateKeywordSpotter({word: i + 1 for i, word in enumerate(args.words)}, template_dir=args.dir)
+        print(f"检测阈值: {spotter.word_thresholds}")
+        print("请说话，等待检测热词……")
+        signal = spotter.listen_for_hotword()
+        print(f"检测到热词，返回信号：{signal}")
@@ -0,0 +1,101 @@
+"""
+本地语音转写工具 V2.0
+核心功能是用仓库自带的 Vosk 中文模型在本地做完整的语音转文本（不使用语法约束），
+作为云端 Paraformer 识别的兜底：与云端识别同时接收同一份音频，网络慢或断开时仍能给出结果。
+解码在独立线程中进行（复用 FrameSender），采集循环只负责把音频放进队列，不会被解码拖慢。
+"""
+
+import os
+import sys
+import json
+
+# 获取当前脚本所在文件夹的绝对路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上级目录路径
+parent_dir = os.path.dirname(current_dir)
+
+sys.path.append(parent_dir)
+
+from utils.vosk_registry import get_vosk_registry
+from utils.frame_sender import FrameSender
+
+
+class LocalTranscriber:
+    """
+    用法：
+        transcriber = LocalTranscriber("../models/vosk-model-small-cn-0.22")
+        transcriber.start()
+        transcriber.put(data)        # 16kHz 16bit 单声道音频，不阻塞
+        text = transcriber.finish()  # 解码完队列中剩余的音频后返回全文
+        transcriber.cancel()         # 或者：不再需要结果时丢弃剩余的音频，立即返回
+    """
+
+    def __init__(self, model_path: str, sample_rate: int = 16000, packet_ms: int = 200, max_queue_ms: int = 10000):
+        """
+        Args:
+            model_path (str): Vosk 模型路径，与热词检测共用同一个已加载的模型。
+            sample_rate (int, optional): 输入音频的采样率. Defaults to 16000.
+            packet_ms (int, optional): 每次送入识别器的音频时长. Defaults to 200.
+            max_queue_ms (int, optional): 解码跟不上时队列最多缓存的音频时长. Defaults to 10000.
+        """
+        self.model_path = model_path
+        self.sample_rate = sample_rate
+        self.packet_ms = packet_ms
+        self.max_queue_ms = max_queue_ms
+        self.rec = get_vosk_registry().create_recognizer(model_path, sample_rate)
+        self.sentences = []
+        self.decoder = None  # 解码线程，每轮新建一个
+        self._cancelled = None  # 已取消、可能还在解码最后一个数据包的解码线程
+        self.on_sentence = None  # 可选的回调，识别器判定一句话结束时以 sentence 字典调用（在解码线程中）
+
+    @staticmethod
+    def _text(result: str) -> str:
+        """Vosk 中文模型的结果以空格分词，去掉空格得到连续文本"""
+        try:
+            return json.loads(result).get("text", "").replace(" ", "")
+        except Exception:
+            return ""
+
+    def _accept(self, data: bytes) -> None:
+        if self.rec.AcceptWaveform(data):
+            text = self._text(self.rec.Result())
+            self.sentences.append(text)
+            if self.on_sentence is not None:
+                self.on_sentence({"text": text, "sentence_end": True})
+
+    def start(self) -> None:
+        """开始新的一轮转写"""
+        if self._cancelled is not None:
+            # 识别器不能同时被两个线程使用，等上一轮取消的解码线程退出
+            self._cancelled.stop()
+            self._cancelled = None
+        self.rec.Reset()
+        self.sentences = []
+        self.decoder = FrameSender(self._accept, bytes_per_second=self.sample_rate * 2,
+                                   packet_ms=self.packet_ms, max_queue_ms=self.max_queue_ms)
+        self.decoder.start()
+
+    def put(self, data: bytes) -> None:
+        if self.decoder is not None:
+            self.decoder.put(data)
+
+    def finish(self) -> str:
+        """
+        结束本轮转写
+        Returns:
+            str: 识别文本
+        """
+        if self.decoder is not None:
+            self.decoder.stop()
+            if self.decoder.dropped_ms:
+                print(f"本地识别跟不上，丢弃了 {self.decoder.dropped_ms}ms 音频")
+            self.decoder = None
+        self.sentences.append(self._text(self.rec.FinalResult()))
+        return "".join(self.sentences)
+
+    def cancel(self) -> None:
+        """结束本轮转写但不需要结果：丢弃队列中尚未解码的音频，不等待解码线程"""
+        if self.decoder is not None:
+            self.decoder.abort()
+            self._cancelled = self.decoder
+            self.decoder = None
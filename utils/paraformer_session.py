@@ -0,0 +1,457 @@
+"""
+语音识别会话管理工具 V2.0
+核心功能是让 Paraformer 实时语音识别的 websocket 连接常驻，每轮对话不再重新建立连接：
+dashscope SDK 的 Recognition.start() 每次都要重新完成 TCP + TLS + websocket 握手，
+再等待服务端确认任务（task-started）之后才能发送第一帧音频。
+本模块直接使用 DashScope 实时语音识别的 websocket 协议（run-task / finish-task 指令，
+task-started / result-generated / task-finished / task-failed 事件，音频以二进制帧发送），
+在同一个连接上依次执行多个识别任务：
+    1. 后台线程保持若干个连接常驻，连接空闲过久或被服务端断开时在后台重新连接；
+    2. prepare() 在播报回复期间提前开好下一轮的识别任务，用户开口时可以直接发送音频；
+    3. 每轮记录发送第一帧音频之前的准备耗时（SetupLatency）。
+服务地址默认读取环境变量 DASHSCOPE_WEBSOCKET_BASE_URL（与 dashscope SDK 相同），
+测试时可以指向本地的协议模拟服务（test/paraformer_stub_server.py）。
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from collections import deque
+
+import websocket
+
+DEFAULT_URL = "wss://dashscope.aliyuncs.com/api-ws/v1/inference"
+
+
+class SetupLatency:
+    """一轮识别在发送第一帧音频之前的准备耗时"""
+
+    def __init__(self, connect_ms: float, task_ms: float, reused: bool, prepared: bool):
+        self.connect_ms = connect_ms  # 建立连接（含TLS和websocket握手）的耗时，复用常驻连接时为0
+        self.task_ms = task_ms  # 发出 run-task 到收到 task-started 的等待时间，任务已提前开好时接近0
+        self.reused = reused  # 是否复用了常驻连接
+        self.prepared = prepared  # 是否使用了提前开好的任务
+
+    @property
+    def total_ms(self) -> float:
+        return self.connect_ms + self.task_ms
+
+    def __repr__(self):
+        if self.prepared:
+            source = "预开任务"
+        elif self.reused:
+            source = "常驻连接"
+        else:
+            source = "新建连接"
+        return (f"SetupLatency({source}, 总计={self.total_ms:.0f}ms, 连接={self.connect_ms:.0f}ms, "
+                f"任务={self.task_ms:.0f}ms)")
+
+
+class RecognitionTask:
+    """
+    常驻连接上的一个识别任务
+    用法：
+        task = manager.acquire()
+        task.send_audio_frame(data)  # 可交给 FrameSender 在独立线程中调用
+        text = task.stop()           # 发送 finish-task 并等待最终结果
+    """
+
+    def __init__(self, connection, parameters: dict):
+        self.connection = connection
+        self.parameters = parameters
+        self.task_id = uuid.uuid4().hex
+        self.created_at = time.monotonic()
+        self.started = threading.Event()
+        self.finished = threading.Event()
+        self.error = None  # 任务失败或连接断开时的错误信息
+        self.sentences = []  # 已结束的句子文本
+        self.partial = ""  # 当前尚未结束的句子
+        self.on_sentence = None  # 可选的回调，参数为服务端返回的 sentence 字典
+        self._finish_sent = False
+
+    @property
+    def text(self) -> str:
+        """已识别的完整文本（所有已结束的句子）"""
+        return "".join(self.sentences)
+
+    @property
+    def usable(self) -> bool:
+        return self.error is None and not self._finish_sent and not self.connection.closed.is_set()
+
+    def _message(self, action: str, payload: dict) -> str:
+        return json.dumps({"header": {"action": action, "task_id": self.task_id, "streaming": "duplex"},
+                           "payload": payload})
+
+    def run(self) -> None:
+        """发送 run-task 指令，不等待服务端确认"""
+        self.connection.send_text(self._message("run-task", {
+            "task_group": "audio", "task": "asr", "function": "recognition",
+            "model": self.parameters["model"],
+            "parameters": {k: v for k, v in self.parameters.items() if k != "model"},
+            "input": {},
+        }))
+
+    def wait_started(self, timeout: float = None) -> bool:
+        """等待 task-started，任务失败或连接断开时立即返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.started.is_set():
+            if self.error is not None:
+                return False
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self.started.wait(0.05 if remaining is None else min(0.05, remaining))
+        return self.error is None
+
+    def send_audio_frame(self, data: bytes) -> None:
+        if self.error is not None:
+            raise ConnectionError(f"识别任务已失败: {self.error}")
+        self.connection.send_binary(data)
+
+    def stop(self, timeout: float = 10) -> str:
+        """
+        结束任务并等待服务端返回最终结果
+        Args:
+            timeout (float, optional): 等待 task-finished 的最长时间（秒），超时时关闭连接，由后台重新连接. Defaults to 10.
+        Returns:
+            str: 识别结果
+        """
+        self.cancel()
+        if not self.finished.wait(timeout):
+            print(f"等待识别结果超时（{timeout}s），关闭该连接")
+            self.connection.close()
+        if self.error is not None:
+            print(f"识别任务出错: {self.error}")
+        return self.text
+
+    def cancel(self) -> None:
+        """发送 finish-task 但不等待结果（用于丢弃提前开好但没有用上的任务）"""
+        if self._finish_sent or self.finished.is_set():
+            return
+        self._finish_sent = True
+        try:
+            self.connection.send_text(self._message("finish-task", {"input": {}}))
+        except Exception as e:
+            self._fail(f"发送 finish-task 失败: {e}")
+
+    def _fail(self, error: str) -> None:
+        if self.error is None:
+            self.error = error
+        self.finished.set()
+
+    def _handle(self, header: dict, payload: dict) -> None:
+        event = header.get("event")
+        if event == "task-started":
+            self.started.set()
+        elif event == "result-generated":
+            sentence = payload.get("output", {}).get("sentence", {})
+            if "text" not in sentence:
+                return
+            if sentence.get("sentence_end"):
+                self.sentences.append(sentence["text"])
+                self.partial = ""
+            else:
+                self.partial = sentence["text"]
+            if self.on_sentence is not None:
+                self.on_sentence(sentence)
+        elif event == "task-finished":
+            self.finished.set()
+        elif event == "task-failed":
+            self._fail(f"{header.get('error_code')}: {header.get('error_message')}")
+
+
+class _Connection:
+    """一个 websocket 连接，接收线程把事件分发给连接上当前的任务"""
+
+    def __init__(self, url: str, headers: list, timeout: float):
+        start = time.monotonic()
+        self.ws = websocket.create_connection(url, header=headers, timeout=timeout, enable_multithread=True)
+        self.connect_ms = (time.monotonic() - start) * 1000
+        self.ws.settimeout(None)
+        self.task = None  # 连接上正在执行（或提前开好）的任务
+        self.reserved = False  # 已被取出、即将在上面开任务
+        self.last_active = time.monotonic()
+        self.closed = threading.Event()
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+        self._thread.start()
+
+    @property
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_active
+
+    @property
+    def free(self) -> bool:
+        return self.task is None and not self.reserved and not self.closed.is_set()
+
+    def send_text(self, message: str) -> None:
+        self.last_active = time.monotonic()
+        self.ws.send(message)
+
+    def send_binary(self, data: bytes) -> None:
+        self.last_active = time.monotonic()
+        self.ws.send_binary(data)
+
+    def _receive(self) -> None:
+        try:
+            while True:
+                message = self.ws.recv()
+                if not message:
+                    break
+                if isinstance(message, bytes):
+                    continue
+                message = json.loads(message)
+                header = message.get("header", {})
+                task = self.task
+                if task is None or header.get("task_id") != task.task_id:
+                    continue
+                task._handle(header, message.get("payload", {}))
+                if task.finished.is_set():
+                    self.task = None
+                    self.last_active = time.monotonic()
+        except Exception:
+            pass
+        finally:
+            self.closed.set()
+            task = self.task
+            if task is not None:
+                task._fail("连接已断开")
+
+    def close(self) -> None:
+        self.closed.set()
+        try:
+            self.ws.close(timeout=1)
+        except Exception:
+            pass
+
+
+class ParaformerSessionManager:
+    """
+    常驻识别连接池
+    用法：
+        manager = ParaformerSessionManager(api_key=api_key)
+        manager.start()          # 后台建立并维护常驻连接
+        manager.prepare()        # 播报回复时调用，提前开好下一轮的任务
+        task = manager.acquire() # 取得一个已就绪的任务，manager.last_latency 为本轮的准备耗时
+    """
+
+    def __init__(self, model: str = "paraformer-realtime-v2", sample_rate: int = 16000, format: str = "pcm",
+                 language_hints: list = None, api_key: str = None, url: str = None, pool_size: int = 1,
+                 idle_timeout_s: float = 50, prepared_ttl_s: float = 20, connect_timeout_s: float = 10):
+        """
+        Args:
+            model (str, optional): 模型名称. Defaults to "paraformer-realtime-v2".
+            sample_rate (int, optional): 发送音频的采样率. Defaults to 16000.
+            format (str, optional): 音频格式. Defaults to "pcm".
+            language_hints (list, optional): 语言提示，只有 paraformer-realtime-v2 支持. Defaults to None.
+            api_key (str, optional): DashScope API Key，默认读取环境变量 ALI_APIKEY.
+            url (str, optional): 服务地址，默认读取环境变量 DASHSCOPE_WEBSOCKET_BASE_URL，未设置时使用官方地址.
+            pool_size (int, optional): 常驻连接数. Defaults to 1.
+            idle_timeout_s (float, optional): 连接空闲超过该时长后在后台重建，应小于服务端的空闲超时. Defaults to 50.
+            prepared_ttl_s (float, optional): 提前开好的任务最多保留的时长，超时后丢弃并重新开一个. Defaults to 20.
+            connect_timeout_s (float, optional): 建立连接和等待任务就绪的超时时间. Defaults to 10.
+        """
+        self.url = url or os.environ.get("DASHSCOPE_WEBSOCKET_BASE_URL", DEFAULT_URL)
+        api_key = api_key if api_key is not None else os.environ.get("ALI_APIKEY", "")
+        self.headers = [f"Authorization: bearer {api_key}", "X-DashScope-DataInspection: enable"]
+        self.parameters = {"model": model, "format": format, "sample_rate": sample_rate}
+        if language_hints:
+            self.parameters["language_hints"] = language_hints
+        self.pool_size = pool_size
+        self.idle_timeout_s = idle_timeout_s
+        self.prepared_ttl_s = prepared_ttl_s
+        self.connect_timeout_s = connect_timeout_s
+
+        self._connections = []
+        self._prepared = None  # 提前开好的任务
+        self._prepare_until = 0.0  # 在此时刻之前保持有一个提前开好的任务
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._running = False
+
+        # 统计信息
+        self.last_latency = None
+        self.latencies = deque(maxlen=100)
+        self.connects = 0  # 建立连接的次数
+        self.dropped = 0  # 被服务端断开或出错的连接数
+        self.refreshed = 0  # 因空闲过久主动重建的连接数
+
+    def start(self) -> None:
+        """启动后台维护线程，保持常驻连接"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._maintain, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._prepared = None
+        for connection in connections:
+            if connection.task is not None:
+                connection.task.cancel()
+            connection.close()
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """等待至少有一个常驻连接建立完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while deadline is None or time.monotonic() < deadline:
+            with self._lock:
+                if any(not c.closed.is_set() for c in self._connections):
+                    return True
+            time.sleep(0.02)
+        return False
+
+    def prepare(self, hold_s: float = 60) -> None:
+        """
+        在后台提前开好下一轮的识别任务（例如在播报回复期间调用）
+        Args:
+            hold_s (float, optional): 在这段时间内保持有一个就绪的任务，过期的任务会被替换. Defaults to 60.
+        """
+        self._prepare_until = time.monotonic() + hold_s
+        self._wakeup.set()
+
+    def acquire(self, timeout: float = None) -> RecognitionTask:
+        """
+        取得一个已就绪（收到 task-started）的识别任务
+        依次尝试：提前开好的任务 -> 空闲的常驻连接上新开任务 -> 新建连接
+        Returns:
+            RecognitionTask: 可以直接发送音频的任务
+        """
+        timeout = self.connect_timeout_s if timeout is None else timeout
+        start = time.monotonic()
+        self._prepare_until = 0.0
+        with self._lock:
+            task, self._prepared = self._prepared, None
+        if task is not None:
+            if task.usable and time.monotonic() - task.created_at < self.prepared_ttl_s and task.wait_started(timeout):
+                self._record(SetupLatency(0.0, (time.monotonic() - start) * 1000, True, True))
+                return task
+            task.cancel()
+
+        connect_ms = 0.0
+        connection = self._take_free()
+        reused = connection is not None
+        if connection is None:
+            connection = self._connect()
+            connect_ms = connection.connect_ms
+            with self._lock:
+                self._connections.append(connection)
+        task_start = time.monotonic()
+        task = self._run_task(connection)
+        if not task.wait_started(max(0.0, timeout - (task_start - start))):
+            error = task.error or "等待 task-started 超时"
+            task.cancel()
+            connection.close()
+            raise ConnectionError(f"识别任务启动失败: {error}")
+        self._record(SetupLatency(connect_ms, (time.monotonic() - task_start) * 1000, reused, False))
+        self._wakeup.set()  # 连接被占用后由后台补足常驻连接
+        return task
+
+    def _record(self, latency: SetupLatency) -> None:
+        self.last_latency = latency
+        self.latencies.append(latency)
+
+    def _connect(self) -> _Connection:
+        connection = _Connection(self.url, self.headers, self.connect_timeout_s)
+        self.connects += 1
+        return connection
+
+    def _take_free(self):
+        """取出一个空闲的常驻连接，找不到时返回 None"""
+        with self._lock:
+            for connection in self._connections:
+                if connection.free:
+                    # 先占住连接，避免后台线程同时在上面开任务
+                    connection.reserved = True
+                    return connection
+        return None
+
+    def _run_task(self, connection: _Connection) -> RecognitionTask:
+        task = RecognitionTask(connection, self.parameters)
+        connection.task = task
+        connection.reserved = False
+        try:
+            task.run()
+        except Exception as e:
+            task._fail(f"发送 run-task 失败: {e}")
+            connection.task = None
+            connection.close()
+        return task
+
+    def _maintain(self) -> None:
+        retry_interval = 1.0
+        next_retry = 0.0
+        while self._running:
+            self._wakeup.wait(0.5)
+            self._wakeup.clear()
+            if not self._running:
+                break
+            now = time.monotonic()
+            stale = []
+            with self._lock:
+                for connection in list(self._connections):
+                    if connection.closed.is_set():
+                        self._connections.remove(connection)
+                        self.dropped += 1
+                    elif connection.free and connection.idle_seconds > self.idle_timeout_s:
+                        # 空闲连接在服务端超时之前主动重建
+                        self._connections.remove(connection)
+                        stale.append(connection)
+                        self.refreshed += 1
+                # 临时新建的连接超出常驻数量时，关闭多余的空闲连接
+                extra = len(self._connections) - self.pool_size
+                for connection in [c for c in self._connections if c.free][:max(extra, 0)]:
+                    self._connections.remove(connection)
+                    stale.append(connection)
+                prepared = self._prepared
+                if prepared is not None and (not prepared.usable or now - prepared.created_at > self.prepared_ttl_s):
+                    self._prepared = None
+                    stale_task = prepared
+                else:
+                    stale_task = None
+                missing = self.pool_size - len(self._connections)
+            if stale_task is not None:
+                stale_task.cancel()
+            for connection in stale:
+                connection.close()
+
+            if missing > 0 and now >= next_retry:
+                try:
+                    connection = self._connect()
+                    with self._lock:
+                        self._connections.append(connection)
+                    retry_interval = 1.0
+                except Exception as e:
+                    print(f"识别连接建立失败，{retry_interval:.0f}s 后重试: {e}")
+                    next_retry = now + retry_interval
+                    retry_interval = min(retry_interval * 2, 30.0)
+                self._wakeup.set()
+                continue
+
+            if self._prepared is None and now < self._prepare_until:
+                connection = self._take_free()
+                if connection is not None:
+                    task = self._run_task(connection)
+                    with self._lock:
+                        self._prepared = task
+
+    def stats(self) -> dict:
+        totals = [latency.total_ms for latency in self.latencies]
+        return {
+            "turns": len(totals),
+            "avg_setup_ms": round(sum(totals) / len(totals), 1) if totals else None,
+            "max_setup_ms": round(max(totals), 1) if totals else None,
+            "prepared_hits": sum(1 for latency in self.latencies if latency.prepared),
+            "connects": self.connects,
+            "dropped": self.dropped,
+            "refreshed": self.refreshed,
+        }
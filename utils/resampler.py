@@ -0,0 +1,90 @@
+"""
+流式重采样工具 V2.0
+核心功能是把任意采样率的采集音频流式地重采样到识别引擎需要的16kHz。
+采用多相（polyphase）FIR 滤波，滤波器状态在相邻音频块之间保留，块边界处不会产生断裂噪声。
+"""
+
+from math import gcd
+import numpy as np
+
+
+class StreamingResampler:
+    """
+    有状态的多相重采样器。
+    每次 process() 传入一块 int16 音频，返回对应的重采样结果；块的大小可以任意，
+    连续多块的输出与把整段音频一次性重采样的结果一致（只相差固定的滤波器延迟）。
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int = 16000, zero_crossings: int = 10, beta: float = 5.0):
+        """
+        Args:
+            orig_sr (int): 输入采样率。
+            target_sr (int, optional): 输出采样率. Defaults to 16000.
+            zero_crossings (int, optional): 低通滤波器单侧的过零点数量，越大过渡带越陡、计算量越大. Defaults to 10.
+            beta (float, optional): Kaiser窗参数. Defaults to 5.0.
+        """
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        g = gcd(orig_sr, target_sr)
+        self.up = target_sr // g
+        self.down = orig_sr // g
+        self.passthrough = (self.up == self.down)
+
+        if not self.passthrough:
+            # 在上采样后的采样率上设计低通原型滤波器，截止频率取输入、输出奈奎斯特频率中较低者
+            max_rate = max(self.up, self.down)
+            half_len = zero_crossings * max_rate
+            n = np.arange(-half_len, half_len + 1, dtype=np.float64)
+            cutoff = 1.0 / max_rate
+            h = cutoff * np.sinc(cutoff * n) * np.kaiser(len(n), beta)
+            h *= self.up / h.sum()
+
+            # 拆分为 up 个相位，每个相位 taps 个系数；逆序存放便于与输入窗口直接做点积
+            self.taps = -(-len(h) // self.up)
+            h = np.concatenate([h, np.zeros(self.taps * self.up - len(h))])
+            self.phases = h.reshape(self.taps, self.up).T[:, ::-1].astype(np.float32).copy()
+        self.reset()
+
+    def reset(self) -> None:
+        """清空滤波器状态，开始处理一段新的音频流"""
+        if self.passthrough:
+            return
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)  # 上一块末尾的输入样本
+        self._in_count = 0  # 已输入的总样本数
+        self._out_count = 0  # 已输出的总样本数
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        重采样一块 int16 音频。
+        Args:
+            samples (np.ndarray): int16 输入样本。
+        Returns:
+            np.ndarray: int16 输出样本，长度随块边界在 len*up/down 附近浮动。
+        """
+        if self.passthrough:
+            return samples
+        ext = np.concatenate([self._history, samples.astype(np.float32)])
+        end = self._in_count + len(samples)
+
+        # 第 n 个输出样本需要的最新输入样本为 n*down//up，只输出输入已经到齐的部分
+        n_end = (end * self.up + self.down - 1) // self.down
+        n = np.arange(self._out_count, n_end, dtype=np.int64)
+        base = n * self.down // self.up
+        phase = n * self.down % self.up
+        # ext 的首个元素对应全局输入位置 in_count-taps+1，窗口 [start, start+taps) 以 base 结尾
+        start = base - self._in_count
+
+        windows = np.lib.stride_tricks.sliding_window_view(ext, self.taps)[start]
+        if self.up == 1:
+            out = windows @ self.phases[0]
+        else:
+            out = np.einsum('ij,ij->i', windows, self.phases[phase])
+
+        self._history = ext[len(ext) - (self.taps - 1):]
+        self._in_count = end
+        self._out_count = n_end
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+    def process_bytes(self, data: bytes) -> bytes:
+        """重采样一块 int16 PCM 字节串"""
+        return self.process(np.frombuffer(data, dtype=np.int16)).tobytes()
@@ -0,0 +1,101 @@
+"""
+语音门控工具 V2.0
+核心功能是在热词识别器前面加一道开销很小的门：只有 VAD 判为人声、或者音频能量明显高于底噪时，
+才把音频送入识别器；安静时识别器不解码也不计算中间结果，待机时的CPU占用随之大幅下降。
+门打开时先补上最近一段预录音频（pre-roll），避免 VAD 确认人声的延迟切掉热词的开头；
+人声结束后门再保持一小段时间，让识别器收到热词的结尾。
+"""
+
+from collections import deque
+import numpy as np
+
+
+class SpeechGate:
+    """
+    用法：
+        gate = SpeechGate(vad)
+        vad.process(samples)
+        samples = gate.process(samples, vad.is_speech)  # 门关闭时返回空数组
+        print(gate)  # 门控比例等统计
+    """
+
+    def __init__(self, vad, sample_rate: int = 16000, preroll_ms: int = 300, hold_ms: int = 300,
+                 energy_margin_db: float = 6.0):
+        """
+        Args:
+            vad: 提供 noise_floor_db 的 VAD（例如 AdaptiveEnergyVAD），能量判断以其底噪为基准。
+            sample_rate (int, optional): 输入采样率. Defaults to 16000.
+            preroll_ms (int, optional): 门打开时补送的预录音频时长. Defaults to 300.
+            hold_ms (int, optional): 人声和能量都消失后门继续保持打开的时长. Defaults to 300.
+            energy_margin_db (float, optional): 音频块能量高出底噪该分贝数即打开门，比 VAD 更早响应. Defaults to 6.0.
+        """
+        self.vad = vad
+        self.sample_rate = sample_rate
+        self.preroll_samples = sample_rate * preroll_ms // 1000
+        self.hold_samples = sample_rate * hold_ms // 1000
+        self.energy_margin_db = energy_margin_db
+        self.total_samples = 0  # 经过门的总样本数
+        self.passed_samples = 0  # 送入识别器的样本数（含预录音频）
+        self.open_count = 0  # 门打开的次数
+        self.reset()
+
+    def reset(self) -> None:
+        """关闭门并清空预录音频，统计计数保留"""
+        self._preroll = deque()
+        self._preroll_len = 0
+        self.is_open = False
+        self._hold = 0
+
+    def reset_stats(self) -> None:
+        self.total_samples = 0
+        self.passed_samples = 0
+        self.open_count = 0
+
+    @property
+    def gated_ratio(self) -> float:
+        """没有送入识别器的音频比例"""
+        if self.total_samples == 0:
+            return 0.0
+        return max(0.0, 1.0 - self.passed_samples / self.total_samples)
+
+    def _loud(self, samples: np.ndarray) -> bool:
+        noise_floor_db = getattr(self.vad, "noise_floor_db", None)
+        if noise_floor_db is None or len(samples) == 0:
+            return False
+        x = samples.astype(np.float32) / 32768.0
+        energy_db = 10 * np.log10(np.mean(x * x) + 1e-10)
+        return energy_db > noise_floor_db + self.energy_margin_db
+
+    def process(self, samples: np.ndarray, is_speech: bool) -> np.ndarray:
+        """
+        传入一块音频及 VAD 的判断，返回应送入识别器的音频（门关闭时为空数组）
+        """
+        self.total_samples += len(samples)
+        if is_speech or self._loud(samples):
+            self._hold = self.hold_samples
+        elif self._hold > 0:
+            self._hold = max(0, self._hold - len(samples))
+        active = self._hold > 0
+
+        if active and not self.is_open:
+            # 门刚打开：先补送预录音频
+            self.is_open = True
+            self.open_count += 1
+            output = np.concatenate(list(self._preroll) + [samples])
+            self._preroll.clear()
+            self._preroll_len = 0
+        elif active:
+            output = samples
+        else:
+            self.is_open = False
+            self._preroll.append(samples.copy())
+            self._preroll_len += len(samples)
+            while self._preroll and self._preroll_len - len(self._preroll[0]) >= self.preroll_samples:
+                self._preroll_len -= len(self._preroll.popleft())
+            return samples[:0]
+        self.passed_samples += len(output)
+        return output
+
+    def __repr__(self):
+        return (f"SpeechGate(门控比例={self.gated_ratio:.1%}, 打开次数={self.open_count}, "
+                f"音频={self.total_samples / self.sample_rate:.1f}s)")
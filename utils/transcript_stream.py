@@ -0,0 +1,109 @@
+"""
+识别结果流工具 V2.0
+核心功能是把实时识别服务逐步返回的句子结果（中间结果不断被修正，句末结果不再变化）整理成
+TranscriptEvent 事件流，并给中间结果标注稳定性：连续几次更新都没有变化的前缀基本不会再被修改，
+下游可以在用户说完之前就根据稳定的部分开始意图判断、查缓存或预取工具调用。
+"""
+
+import time
+from collections import deque
+
+
+def common_prefix(texts) -> str:
+    """多个字符串的最长公共前缀"""
+    texts = list(texts)
+    if not texts:
+        return ""
+    prefix = texts[0]
+    for text in texts[1:]:
+        n = 0
+        while n < min(len(prefix), len(text)) and prefix[n] == text[n]:
+            n += 1
+        prefix = prefix[:n]
+    return prefix
+
+
+class TranscriptEvent:
+    """一条识别结果事件"""
+
+    def __init__(self, text: str, is_final: bool, stable: bool, stable_text: str, sentence_index: int,
+                 transcript: str, begin_ms=None, end_ms=None, source: str = "cloud", utterance_end: bool = False):
+        self.text = text  # 当前句子的文本
+        self.is_final = is_final  # 句子已结束，文本不会再变化
+        self.stable = stable  # 整句文本已经稳定（句末结果，或连续多次更新没有变化）
+        self.stable_text = stable_text  # 当前句子中已经稳定的前缀
+        self.sentence_index = sentence_index  # 本轮识别中的第几句，从0开始
+        self.transcript = transcript  # 本轮到目前为止的完整文本（已结束的句子 + 当前句子）
+        self.begin_ms = begin_ms  # 句子在本轮上传音频中的起止时间（毫秒），服务端未给出时为 None
+        self.end_ms = end_ms
+        self.source = source  # "cloud" 或 "local"
+        self.utterance_end = utterance_end  # 本轮识别结束，transcript 为最终采用的结果
+        self.received_at = time.monotonic()  # 收到结果的时刻
+
+    def __repr__(self):
+        if self.utterance_end:
+            kind = "结束"
+        elif self.is_final:
+            kind = "句末"
+        elif self.stable:
+            kind = "稳定"
+        else:
+            kind = "中间"
+        return f"TranscriptEvent({kind}, {self.text!r}, 稳定部分={self.stable_text!r}, 来源={self.source})"
+
+
+class TranscriptTracker:
+    """
+    把服务端返回的 sentence 字典转换为 TranscriptEvent 并交给回调
+    用法：
+        tracker = TranscriptTracker(on_event)
+        task.on_sentence = tracker.on_sentence   # 在接收线程中调用
+        tracker.finish(text, "cloud")           # 本轮结束时发出 utterance_end 事件
+    """
+
+    def __init__(self, on_event, stable_updates: int = 2):
+        """
+        Args:
+            on_event: 回调函数，参数为 TranscriptEvent，在识别结果的接收线程中调用，应尽快返回。
+            stable_updates (int, optional): 最近几次中间结果的公共前缀视为稳定. Defaults to 2.
+        """
+        self.on_event = on_event
+        self.stable_updates = stable_updates
+        self.reset()
+
+    def reset(self) -> None:
+        self.sentences = []  # 已结束的句子
+        self._partials = deque(maxlen=self.stable_updates)
+        self.closed = False
+
+    def _emit(self, event: TranscriptEvent) -> None:
+        try:
+            self.on_event(event)
+        except Exception as e:
+            print(f"识别结果回调出错: {e}")
+
+    def on_sentence(self, sentence: dict, source: str = "cloud") -> None:
+        if self.closed or "text" not in sentence:
+            return
+        text = sentence["text"]
+        index = len(self.sentences)
+        if sentence.get("sentence_end"):
+            self.sentences.append(text)
+            self._partials.clear()
+            event = TranscriptEvent(text, True, True, text, index, "".join(self.sentences),
+                                    sentence.get("begin_time"), sentence.get("end_time"), source)
+        else:
+            self._partials.append(text)
+            stable_text = common_prefix(self._partials) if len(self._partials) == self.stable_updates else ""
+            event = TranscriptEvent(text, False, stable_text == text, stable_text, index,
+                                    "".join(self.sentences) + text, sentence.get("begin_time"),
+                                    sentence.get("end_time"), source)
+        self._emit(event)
+
+    def finish(self, text: str, source: str = "cloud") -> None:
+        """发出本轮结束事件，之后到达的结果（例如晚到的云端结果）不再转发"""
+        if self.closed:
+            return
+        self.closed = True
+        self._emit(TranscriptEvent(text, True, True, text, len(self.sentences), text, source=source,
+                                   utterance_end=True))
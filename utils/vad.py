@@ -0,0 +1,207 @@
+"""
+语音活动检测工具 V2.0
+核心功能是判断音频流中哪些部分是人声，用于录音的自动结束（端点检测）和热词检测的分段。
+基于帧能量与频谱平坦度判决，噪声底噪随环境自适应，并带有起始确认与拖尾（hangover）平滑，所有时间参数以毫秒配置。
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+class UtteranceStats:
+    """一段语音（从上次 reset 起）的统计信息，时间单位均为毫秒"""
+
+    def __init__(self, speech_start_ms, speech_end_ms, trailing_silence_ms, speech_ms, duration_ms, noise_floor_db):
+        self.speech_start_ms = speech_start_ms  # 首次检测到人声的位置，无人声时为 None
+        self.speech_end_ms = speech_end_ms  # 最后一帧人声结束的位置，无人声时为 None
+        self.trailing_silence_ms = trailing_silence_ms  # 最后一帧人声之后（或开头以来）的静音时长
+        self.speech_ms = speech_ms  # 判为人声的总时长
+        self.duration_ms = duration_ms  # 已处理的音频总时长
+        self.noise_floor_db = noise_floor_db  # 当前估计的噪声底噪（dBFS）
+
+    def __repr__(self):
+        return (f"UtteranceStats(start={self.speech_start_ms}, end={self.speech_end_ms}, "
+                f"trailing_silence={self.trailing_silence_ms:.0f}ms, speech={self.speech_ms:.0f}ms, "
+                f"duration={self.duration_ms:.0f}ms, noise_floor={self.noise_floor_db or 0:.1f}dB)")
+
+
+class VADInterface(ABC):
+
+    @abstractmethod
+    def process(self, samples: np.ndarray) -> bool:
+        '''
+        处理一块 int16 音频
+        return:
+            bool: 处理完这块音频后是否处于人声状态
+        '''
+        pass
+
+    @abstractmethod
+    def reset(self) -> None:
+        '''
+        开始统计新的一段语音
+        '''
+        pass
+
+    @abstractmethod
+    def stats(self) -> UtteranceStats:
+        '''
+        return:
+            UtteranceStats: 当前这段语音的统计信息
+        '''
+        pass
+
+    @property
+    @abstractmethod
+    def is_speech(self) -> bool:
+        '''
+        最近处理的音频是否处于人声状态（与 process() 的返回值相同）
+        '''
+        pass
+
+    @property
+    @abstractmethod
+    def utterance_ended(self) -> bool:
+        '''
+        出现过人声且其后的静音已达到结束阈值时返回True
+        '''
+        pass
+
+    @abstractmethod
+    def remaining_ms(self) -> float:
+        '''
+        return:
+            float: 距离判定这段语音结束还剩的静音时长（毫秒）
+        '''
+        pass
+
+
+class AdaptiveEnergyVAD(VADInterface):
+    """
+    自适应能量VAD。
+    一帧被判为人声需同时满足：能量高出噪声底噪 threshold_db 以上，且频谱平坦度低于 flatness_max
+    （风扇、电流声等宽带噪声的频谱接近平坦，人声则有明显的谐波结构）。能量特别高的帧不再检查平坦度。
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20, threshold_db: float = 10.0,
+                 flatness_max: float = 0.5, start_ms: int = 60, hangover_ms: int = 200,
+                 end_silence_ms: int = 1000, no_speech_timeout_ms: int = 5000,
+                 noise_rise_ms: int = 2000, initial_noise_db: float = None):
+        """
+        Args:
+            sample_rate (int, optional): 输入音频采样率. Defaults to 16000.
+            frame_ms (int, optional): 分析帧长. Defaults to 20.
+            threshold_db (float, optional): 判为人声所需的高于底噪的分贝数. Defaults to 10.0.
+            flatness_max (float, optional): 人声帧允许的最大频谱平坦度(0~1). Defaults to 0.5.
+            start_ms (int, optional): 连续人声达到该时长才确认开始说话. Defaults to 60.
+            hangover_ms (int, optional): 人声帧消失后维持人声状态的时长. Defaults to 200.
+            end_silence_ms (int, optional): 说话后静音达到该时长认为一句话结束. Defaults to 1000.
+            no_speech_timeout_ms (int, optional): 一直没有人声时，达到该时长也认为结束. Defaults to 5000.
+            noise_rise_ms (int, optional): 底噪向上跟踪的时间常数，说话期间放慢5倍. Defaults to 2000.
+            initial_noise_db (float, optional): 底噪初始估计(dBFS)，为 None 时取第一帧的能量. Defaults to None.
+        """
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db
+        self.flatness_max = flatness_max
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.hangover_frames = hangover_ms // frame_ms
+        self.end_silence_ms = end_silence_ms
+        self.no_speech_timeout_ms = no_speech_timeout_ms
+        self.noise_alpha = min(1.0, frame_ms / noise_rise_ms)
+        self.noise_floor_db = initial_noise_db
+        self._window = np.hanning(self.frame_len).astype(np.float32)
+        self.reset()
+
+    def reset(self) -> None:
+        """开始新的一段语音，噪声底噪保留以延续对环境的估计"""
+        self._pending = np.zeros(0, dtype=np.int16)  # 不足一帧的剩余样本
+        self._frame_index = 0
+        self._run = 0  # 连续人声帧计数
+        self._hang = 0  # 剩余拖尾帧数
+        self._is_speech = False
+        self._speech_start = None
+        self._speech_end = None
+        self._speech_frames = 0
+
+    def _features(self, frames: np.ndarray):
+        """批量计算多帧的能量(dBFS)和频谱平坦度"""
+        x = frames.astype(np.float32) / 32768.0
+        energy_db = 10 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+        power = np.abs(np.fft.rfft(x * self._window, axis=1)[:, 1:]) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy_db, flatness
+
+    def process(self, samples: np.ndarray) -> bool:
+        samples = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+        n_frames = len(samples) // self.frame_len
+        self._pending = samples[n_frames * self.frame_len:].copy()
+        if n_frames == 0:
+            return self._is_speech
+
+        frames = samples[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        energy_db, flatness = self._features(frames)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = float(energy_db[0])
+        for e, f in zip(energy_db, flatness):
+            margin = e - self.noise_floor_db
+            voiced = margin > self.threshold_db and (f < self.flatness_max or margin > 2 * self.threshold_db)
+
+            # 噪声底噪：低于底噪时快速下降，否则缓慢上升（说话期间更慢），持续的噪声最终会被吸收进底噪
+            if e < self.noise_floor_db:
+                self.noise_floor_db += 0.5 * (e - self.noise_floor_db)
+            else:
+                alpha = self.noise_alpha / 5 if voiced else self.noise_alpha
+                self.noise_floor_db += alpha * (e - self.noise_floor_db)
+
+            # 起始确认与拖尾平滑
+            self._run = self._run + 1 if voiced else 0
+            if self._run >= self.start_frames:
+                if self._speech_start is None:
+                    self._speech_start = self._frame_index - self.start_frames + 1
+                self._is_speech = True
+                self._hang = self.hangover_frames
+            elif self._hang > 0:
+                self._hang -= 1
+            else:
+                self._is_speech = False
+
+            if voiced and self._speech_start is not None:
+                self._speech_end = self._frame_index + 1
+                self._speech_frames += 1
+            self._frame_index += 1
+        return self._is_speech
+
+    @property
+    def is_speech(self) -> bool:
+        return self._is_speech
+
+    @property
+    def trailing_silence_ms(self) -> float:
+        last = self._speech_end if self._speech_end is not None else 0
+        return (self._frame_index - last) * self.frame_ms
+
+    @property
+    def has_speech(self) -> bool:
+        return self._speech_start is not None
+
+    @property
+    def utterance_ended(self) -> bool:
+        if self.has_speech:
+            return not self.is_speech and self.trailing_silence_ms >= self.end_silence_ms
+        return self.trailing_silence_ms >= self.no_speech_timeout_ms
+
+    def remaining_ms(self) -> float:
+        """距离判定结束还剩的静音时长，用于倒计时显示"""
+        limit = self.end_silence_ms if self.has_speech else self.no_speech_timeout_ms
+        return max(0.0, limit - self.trailing_silence_ms)
+
+    def stats(self) -> UtteranceStats:
+        to_ms = lambda frames: None if frames is None else frames * self.frame_ms
+        return UtteranceStats(speech_start_ms=to_ms(self._speech_start),
+                              speech_end_ms=to_ms(self._speech_end),
+                              trailing_silence_ms=self.trailing_silence_ms,
+                              speech_ms=self._speech_frames * self.frame_ms,
+                              duration_ms=self._frame_index * self.frame_ms,
+                              noise_floor_db=self.noise_floor_db)
@@ -0,0 +1,151 @@
+"""
+Vosk 模型注册表 V2.0
+核心功能是让每个模型目录在进程内只加载一次：热词检测、猜拳游戏等各处按模型路径获取同一个 vosk.Model，
+再各自创建开销很小的 KaldiRecognizer。启动时可以调用 warm_up() 提前加载，
+并记录每个模型的加载耗时和加载前后进程常驻内存(RSS)的增量。
+"""
+
+import os
+import time
+import threading
+
+from vosk import Model, KaldiRecognizer, SetLogLevel
+
+
+def current_rss_mb():
+    """当前进程的常驻内存(MB)，无法获取时返回 None（只支持 Linux 的 /proc）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class ModelInfo:
+    """一个已加载模型的统计信息"""
+
+    def __init__(self, path, load_seconds, rss_delta_mb):
+        self.path = path
+        self.load_seconds = load_seconds
+        self.rss_delta_mb = rss_delta_mb  # 加载前后 RSS 的增量，近似为模型占用的内存
+        self.recognizers = 0  # 由该模型创建的识别器数量
+
+    def __repr__(self):
+        rss = f"{self.rss_delta_mb:.1f}MB" if self.rss_delta_mb is not None else "未知"
+        return (f"ModelInfo({self.path!r}, 加载耗时={self.load_seconds:.2f}s, 内存={rss}, "
+                f"识别器={self.recognizers})")
+
+
+class VoskModelRegistry:
+    """
+    按模型目录（规范化后的绝对路径）缓存 vosk.Model，线程安全。
+    同一模型被多个线程同时请求时只会加载一次，其余线程等待加载完成。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}  # {绝对路径: Model}
+        self._loading = {}  # {绝对路径: threading.Lock}，保证同一模型只加载一次
+        self.info = {}  # {绝对路径: ModelInfo}
+
+    @staticmethod
+    def _key(model_path: str) -> str:
+        return os.path.realpath(model_path)
+
+    def get_model(self, model_path: str) -> Model:
+        """返回模型目录对应的 vosk.Model，首次请求时加载"""
+        key = self._key(model_path)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                model = self._models.get(key)
+            if model is not None:
+                return model
+            if not os.path.isdir(key):
+                raise FileNotFoundError(f"Vosk模型未找到: {key}")
+            rss_before = current_rss_mb()
+            start = time.monotonic()
+            model = Model(key)
+            load_seconds = time.monotonic() - start
+            rss_after = current_rss_mb()
+            rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            with self._lock:
+                self._models[key] = model
+                self.info[key] = ModelInfo(key, load_seconds, rss_delta)
+                self._loading.pop(key, None)
+            print(f"Vosk模型已加载: {self.info[key]}")
+            return model
+
+    def create_recognizer(self, model_path: str, sample_rate: int = 16000, grammar: str = None) -> KaldiRecognizer:
+        """
+        用共享的模型创建一个新的识别器，每个使用方（每路音频）各自持有一个
+        Args:
+            model_path (str): 模型目录。
+            sample_rate (int, optional): 输入音频采样率. Defaults to 16000.
+            grammar (str, optional): Vosk 语法（JSON 短语列表），为 None 时自由识别. Defaults to None.
+        """
+        model = self.get_model(model_path)
+        if grammar is None:
+            recognizer = KaldiRecognizer(model, sample_rate)
+        else:
+            recognizer = KaldiRecognizer(model, sample_rate, grammar)
+        with self._lock:
+            self.info[self._key(model_path)].recognizers += 1
+        return recognizer
+
+    def warm_up(self, *model_paths, sample_rate: int = 16000) -> None:
+        """
+        启动时提前加载模型，并用一小段静音走一遍解码，避免第一次使用时的额外延迟
+        """
+        for model_path in model_paths:
+            recognizer = KaldiRecognizer(self.get_model(model_path), sample_rate)
+            recognizer.AcceptWaveform(bytes(sample_rate // 10 * 2))
+            recognizer.FinalResult()
+
+    def is_loaded(self, model_path: str) -> bool:
+        with self._lock:
+            return self._key(model_path) in self._models
+
+    def report(self) -> str:
+        """所有已加载模型的加载耗时和内存占用"""
+        with self._lock:
+            infos = list(self.info.values())
+        if not infos:
+            return "尚未加载任何Vosk模型"
+        lines = [repr(info) for info in infos]
+        rss = current_rss_mb()
+        if rss is not None:
+            lines.append(f"进程当前内存: {rss:.1f}MB")
+        return "\n".join(lines)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_vosk_registry() -> VoskModelRegistry:
+    """获取进程级共享的模型注册表，首次调用时创建"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = VoskModelRegistry()
+        return _registry
+
+
+if __name__ == "__main__":
+    import sys
+    SetLogLevel(-1)
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "vosk-model-small-cn-0.22")
+    registry = get_vosk_registry()
+    registry.warm_up(path)
+    registry.create_recognizer(path)
+    registry.create_recognizer(path)  # 第二次不再加载模型
+    print(registry.report())